@@ -0,0 +1,421 @@
+"""
+CAPSTACK ML Async Jobs - Long-running computations behind submit/poll/stream
+Runs registered computations as bulk work in the background, streams their partial results and keeps finished results on disk until they expire
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from .job_runner import FINISHED_STATUSES, JobFinished, JobNotFound
+from .metrics import ASYNC_JOBS, ASYNC_JOB_PARTIALS
+from .model_registry import publish_manifest
+from .scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next partial result once it is cancelled"""
+
+
+class ResultNotReady(RuntimeError):
+    """The job has no result (still running, failed or cancelled)"""
+
+
+@dataclass
+class JobKind:
+    """A registered computation and the request model of its parameters"""
+
+    name: str
+    request_model: Type[BaseModel]
+    func: Callable[[Any, "JobContext"], Dict[str, Any]]
+    description: str = ""
+    # Checks beyond the request model, run at submission so bad jobs are rejected up front
+    validate: Optional[Callable[[Any], Any]] = None
+
+
+@dataclass
+class AsyncJob:
+    """Job record returned by the poll endpoint; the result itself is fetched separately"""
+
+    id: str
+    kind: str
+    status: str = "queued"
+    progress: float = 0.0
+    partial: Optional[Dict[str, Any]] = None
+    partial_seq: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobContext:
+    """Handle a running computation reports through"""
+
+    def __init__(self, manager: "AsyncJobManager", job: AsyncJob, cancel: threading.Event):
+        self._manager = manager
+        self.job = job
+        self._cancel = cancel
+
+    def checkpoint(self):
+        """Yield to interactive requests between chunks; raises JobCancelled once cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        scheduler.checkpoint()
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def emit(self, partial: Dict[str, Any], progress: float):
+        """Publish a partial result, then checkpoint"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self._manager._publish_partial(self.job, partial, progress)
+        self.checkpoint()
+
+
+class _Subscriber:
+    """An event stream listener on the event loop, fed from job threads"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, event: str, data: Dict[str, Any]):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, (event, data))
+        except RuntimeError:
+            # The loop closed under a disconnected stream
+            pass
+
+
+class AsyncJobManager:
+    """
+    Submit/poll/cancel/result store for long computations.
+
+    Jobs run on a small thread pool inside a ``bulk`` scheduler slot, so
+    interactive requests overtake them between chunks. Each partial result
+    replaces the previous one in the job record and is pushed to event
+    stream subscribers. Records and results are JSON files under
+    ``job_dir``; finished jobs expire ``ttl_seconds`` after they end and a
+    sweeper deletes them. Records of jobs cut short by a restart are marked
+    failed.
+    """
+
+    def __init__(self, job_dir: str = "", ttl_seconds: float = 0, workers: int = 0):
+        self.job_dir = Path(job_dir or os.getenv("ASYNC_JOB_DIR", "data/async_jobs"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("ASYNC_JOB_TTL_SECONDS", "3600"))
+        self.workers = workers or int(os.getenv("ASYNC_JOB_WORKERS", "2"))
+        self.kinds: Dict[str, JobKind] = {}
+        self._jobs: Dict[str, AsyncJob] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._subscribers: Dict[str, List[_Subscriber]] = {}
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sweeper: Optional[threading.Thread] = None
+        self._loaded = False
+        self._closed = threading.Event()
+
+    def register(self, name: str, request_model: Type[BaseModel],
+                 func: Callable[[Any, JobContext], Dict[str, Any]], description: str = "",
+                 validate: Optional[Callable[[Any], Any]] = None):
+        """
+        Make ``func(request, context)`` submittable as job kind ``name``.
+
+        ``func`` reports partial results through ``context.emit`` and returns
+        a JSON-serializable result.
+        """
+        self.kinds[name] = JobKind(name, request_model, func, description, validate)
+
+    # -- records -------------------------------------------------------------
+
+    def _record_path(self, job_id: str) -> Path:
+        return self.job_dir / f"{job_id}.json"
+
+    def _result_path(self, job_id: str) -> Path:
+        return self.job_dir / f"{job_id}.result.json"
+
+    def _save(self, job: AsyncJob):
+        try:
+            publish_manifest(job.to_dict(), self._record_path(job.id))
+        except (OSError, ValueError) as e:
+            logger.warning("Could not persist async job %s: %s", job.id, str(e))
+
+    def _load(self):
+        """Read persisted records on first use (lock held)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.job_dir.is_dir():
+            return
+        for path in self.job_dir.glob("*.json"):
+            if path.name.endswith(".result.json"):
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    job = AsyncJob(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("Skipping unreadable async job record %s: %s", path, str(e))
+                continue
+            if not job.finished:
+                self._settle(job, "failed", error="Interrupted by a service restart")
+            self._jobs[job.id] = job
+
+    def _settle(self, job: AsyncJob, status: str, error: Optional[str] = None):
+        """Finish a job record (lock held)"""
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + self.ttl_seconds
+        self._save(job)
+        ASYNC_JOBS.labels(job.kind, status).inc()
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Delete finished jobs past their expiry; returns how many were removed"""
+        now = now or time.time()
+        with self._lock:
+            self._load()
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.expires_at is not None and job.expires_at <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+                for path in (self._record_path(job_id), self._result_path(job_id)):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+        if expired:
+            logger.info("Purged %d expired async jobs", len(expired))
+        return len(expired)
+
+    def _sweep(self):
+        interval = min(max(self.ttl_seconds / 4, 1.0), 60.0)
+        while not self._closed.wait(interval):
+            try:
+                self.purge_expired()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Async job sweep failed: %s", str(e))
+
+    # -- execution -----------------------------------------------------------
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Worker pool and TTL sweeper, started with the first job (lock held)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="async-job")
+            self._sweeper = threading.Thread(target=self._sweep, name="async-job-sweeper",
+                                             daemon=True)
+            self._sweeper.start()
+        return self._executor
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> AsyncJob:
+        """
+        Validate ``params`` against the kind's request model and queue the job.
+
+        Raises KeyError for an unknown kind, pydantic's ValidationError for
+        invalid parameters and whatever the kind's ``validate`` raises.
+        """
+        job_kind = self.kinds[kind]
+        request = job_kind.request_model.model_validate(params)
+        if job_kind.validate is not None:
+            job_kind.validate(request)
+        job = AsyncJob(id=uuid.uuid4().hex, kind=kind)
+        cancel = threading.Event()
+        with self._lock:
+            if self._closed.is_set():
+                raise RuntimeError("Async job manager is shut down")
+            self._load()
+            self._jobs[job.id] = job
+            self._cancel_events[job.id] = cancel
+            self._save(job)
+            self._pool().submit(self._run, job_kind, job, request, cancel)
+        logger.info("Async job %s (%s) submitted", job.id, kind)
+        return job
+
+    def _run(self, job_kind: JobKind, job: AsyncJob, request: BaseModel, cancel: threading.Event):
+        with scheduler.hold("bulk"):
+            with self._lock:
+                if cancel.is_set():
+                    return
+                job.status = "running"
+                job.started_at = time.time()
+                self._save(job)
+            self._notify(job, "status", job.to_dict())
+            try:
+                result = job_kind.func(request, JobContext(self, job, cancel))
+            except JobCancelled:
+                return
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Async job %s (%s) failed: %s", job.id, job.kind, str(e))
+                with self._lock:
+                    if not cancel.is_set():
+                        self._settle(job, "failed", error=f"{type(e).__name__}: {e}")
+                self._finish(job)
+                return
+
+        try:
+            # Compact: results of population sweeps hold a value per row
+            publish_manifest(result, self._result_path(job.id), indent=None)
+        except (OSError, TypeError, ValueError) as e:
+            with self._lock:
+                self._settle(job, "failed", error=f"Result could not be stored: {e}")
+            self._finish(job)
+            return
+        with self._lock:
+            if job.finished:
+                # Cancelled after the computation finished
+                return
+            job.progress = 1.0
+            self._settle(job, "succeeded")
+        logger.info("Async job %s (%s) succeeded in %.2fs", job.id, job.kind,
+                    job.finished_at - job.started_at)
+        self._finish(job)
+
+    def _publish_partial(self, job: AsyncJob, partial: Dict[str, Any], progress: float):
+        with self._lock:
+            job.partial = partial
+            job.partial_seq += 1
+            job.progress = round(min(max(progress, 0.0), 1.0), 4)
+            self._save(job)
+            event = {"seq": job.partial_seq, "progress": job.progress, "partial": partial}
+        ASYNC_JOB_PARTIALS.labels(job.kind).inc()
+        self._notify(job, "partial", event)
+
+    def _notify(self, job: AsyncJob, event: str, data: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(job.id, ()))
+        for subscriber in subscribers:
+            subscriber.put(event, data)
+
+    def _finish(self, job: AsyncJob):
+        """Close the job's event streams with its final record"""
+        with self._lock:
+            self._cancel_events.pop(job.id, None)
+        self._notify(job, "done", job.to_dict())
+
+    # -- API -----------------------------------------------------------------
+
+    def get(self, job_id: str) -> AsyncJob:
+        with self._lock:
+            self._load()
+            job = self._jobs.get(job_id)
+        if job is None or (job.expires_at is not None and job.expires_at <= time.time()):
+            raise JobNotFound(job_id)
+        return job
+
+    def list(self, kind: Optional[str] = None) -> List[AsyncJob]:
+        """Unexpired jobs, newest first"""
+        now = time.time()
+        with self._lock:
+            self._load()
+            jobs = [job for job in self._jobs.values()
+                    if (kind is None or job.kind == kind)
+                    and (job.expires_at is None or job.expires_at > now)]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> AsyncJob:
+        """Cancel a queued or running job; a running one stops at its next partial result"""
+        with self._lock:
+            job = self.get(job_id)
+            if job.finished:
+                raise JobFinished(f"Job {job_id} already {job.status}")
+            self._cancel_events[job_id].set()
+            self._settle(job, "cancelled")
+        self._finish(job)
+        return job
+
+    def result_file(self, job_id: str) -> Path:
+        """Path of a succeeded job's JSON result"""
+        job = self.get(job_id)
+        if job.status != "succeeded":
+            raise ResultNotReady(f"Job {job_id} is {job.status}"
+                                 + (f": {job.error}" if job.error else ""))
+        path = self._result_path(job_id)
+        if not path.is_file():
+            raise JobNotFound(job_id)
+        return path
+
+    async def events(self, job_id: str, keepalive_seconds: float = 15.0):
+        """
+        Server-sent events for a job: its current record, each new partial
+        result and a final ``done`` event.
+        """
+        job = self.get(job_id)
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            snapshot = job.to_dict()
+            if not job.finished:
+                self._subscribers.setdefault(job_id, []).append(subscriber)
+        try:
+            yield _sse("status", snapshot)
+            if snapshot["status"] in FINISHED_STATUSES:
+                yield _sse("done", snapshot)
+                return
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscriber.queue.get(),
+                                                         keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event == "partial" and data["seq"] <= (snapshot.get("partial_seq") or 0):
+                    continue
+                yield _sse(event, data)
+                if event == "done":
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            streams = sum(len(subscribers) for subscribers in self._subscribers.values())
+        return {"workers": self.workers, "ttl_seconds": self.ttl_seconds,
+                "jobs": counts, "event_streams": streams}
+
+    def shutdown(self):
+        """Cancel unfinished jobs and stop the sweeper; called on service shutdown"""
+        with self._lock:
+            self._closed.set()
+            active = [job_id for job_id, job in self._jobs.items() if not job.finished]
+        for job_id in active:
+            try:
+                self.cancel(job_id)
+            except (JobNotFound, JobFinished):
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async_jobs = AsyncJobManager()
@@ -0,0 +1,560 @@
+"""
+CAPSTACK ML Compiled Trees - Reduced-precision tree ensemble inference
+Packs sklearn and XGBoost ensembles into flat float32/quantized node arrays
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# float64 keeps the native estimators; the others compile them at load time
+PRECISIONS = ("float64", "float32", "int16", "int8")
+_QUANT_DTYPES = {"int16": np.int16, "int8": np.int8}
+# Upper bound on the (rows x trees) node-index matrix held during traversal
+_MAX_CELLS_PER_CHUNK = 1 << 16
+
+
+def inference_precision() -> str:
+    """Serving precision from INFERENCE_PRECISION (default float64)"""
+    precision = os.getenv("INFERENCE_PRECISION", "float64").lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"INFERENCE_PRECISION must be one of {', '.join(PRECISIONS)}")
+    return precision
+
+
+def _floor_float32(thresholds: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 not above each threshold.
+
+    Trees compare float32 features, so ``x <= t`` and ``x <= floor32(t)``
+    route every float32 input identically: storing thresholds in float32
+    does not change a single split decision.
+    """
+    t32 = thresholds.astype(np.float32)
+    above = t32.astype(np.float64) > thresholds
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Expected path length of an unsuccessful BST search (Isolation Forest)"""
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+
+class _NodeBuilder:
+    """Accumulates trees into flat node arrays in sibling-adjacent order"""
+
+    def __init__(self, n_outputs: int):
+        self.n_outputs = n_outputs
+        self.features, self.thresholds, self.children = [], [], []
+        self.values, self.roots = [], []
+        self.offset = 0
+        self.max_depth = 0
+
+    def add(self, feature, threshold, left, right, values, depth):
+        """Add one tree; leaves are marked by ``left == -1``"""
+        left = np.asarray(left)
+        right = np.asarray(right)
+        values = np.asarray(values, dtype=np.float64).reshape(len(left), self.n_outputs)
+        # Breadth-first renumbering that places every right child directly
+        # after its left sibling: the next node is child[node] + (x > t)
+        order = [0]
+        for node in order:
+            if left[node] >= 0:
+                order.append(left[node])
+                order.append(right[node])
+        order = np.asarray(order, dtype=np.int64)
+        new_id = np.empty(len(left), dtype=np.int64)
+        new_id[order] = np.arange(len(order)) + self.offset
+
+        is_leaf = left[order] < 0
+        # Leaves point at themselves with an infinite threshold, so rows can
+        # take the same number of steps without checking for leaves
+        self.features.append(np.where(is_leaf, 0, np.asarray(feature)[order]).astype(np.int32))
+        self.thresholds.append(np.where(is_leaf, np.inf, np.asarray(threshold)[order]))
+        self.children.append(
+            np.where(is_leaf, new_id[order], new_id[np.maximum(left[order], 0)]).astype(np.int32)
+        )
+        self.values.append(values[order])
+        self.roots.append(self.offset)
+        self.offset += len(order)
+        self.max_depth = max(self.max_depth, int(depth))
+
+
+class CompiledForest:
+    """
+    Tree ensemble compiled to flat arrays for batched float32 traversal.
+
+    Thresholds are float32, leaf values float32 or integer-quantized with a
+    per-tree scale. Rows are evaluated for all trees at once, one tree level
+    per NumPy step over cache-sized chunks, so a request walks a few small
+    contiguous arrays instead of calling into every estimator. Exposes the
+    sklearn prediction methods the service uses (``predict``,
+    ``predict_proba``, ``decision_function``, ``score_samples``).
+    """
+
+    def __init__(self, builder: _NodeBuilder, kind: str, aggregate: str,
+                 base: np.ndarray, precision: str = "float32",
+                 classes: Optional[np.ndarray] = None, output: str = "identity",
+                 n_features: int = 0, offset: float = 0.0, normalizer: float = 1.0,
+                 source: str = ""):
+        if precision not in PRECISIONS[1:]:
+            raise ValueError(f"Unsupported compiled precision: {precision}")
+        self.kind = kind
+        self.aggregate = aggregate
+        self.output = output
+        self.precision = precision
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.offset_ = offset
+        self.source = source
+        self.n_trees = len(builder.roots)
+        self.max_depth = builder.max_depth
+        self._normalizer = normalizer
+        self._base = np.asarray(base, dtype=np.float64)
+
+        self.feature = np.concatenate(builder.features)
+        self.threshold = _floor_float32(np.concatenate(builder.thresholds))
+        self.child = np.concatenate(builder.children)
+        self.roots = np.asarray(builder.roots, dtype=np.int32)
+
+        if precision in _QUANT_DTYPES:
+            # One scale per tree: late boosting stages have much smaller
+            # leaves than early ones and would lose them to a global scale
+            dtype = _QUANT_DTYPES[precision]
+            peaks = np.array([np.abs(v).max() for v in builder.values])
+            self.value_scale = (np.where(peaks > 0, peaks, 1.0) / np.iinfo(dtype).max)
+            self.values = np.concatenate([
+                np.round(v / scale) for v, scale in zip(builder.values, self.value_scale)
+            ]).astype(dtype)
+            self.value_scale = self.value_scale.astype(np.float32)[:, None]
+        else:
+            self.value_scale = None
+            self.values = np.concatenate(builder.values).astype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self.feature, self.threshold, self.child, self.values, self.roots
+        )) + (0 if self.value_scale is None else self.value_scale.nbytes)
+
+    def _leaf_sums(self, X: np.ndarray) -> np.ndarray:
+        """Sum of leaf values over all trees, shape (n_rows, n_outputs)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        totals = np.empty((n_rows, self.values.shape[1]), dtype=np.float64)
+        chunk = max(1, _MAX_CELLS_PER_CHUNK // max(self.n_trees, 1))
+        for start in range(0, n_rows, chunk):
+            block = X[start:start + chunk]
+            flat = block.ravel()
+            row_offsets = (np.arange(block.shape[0], dtype=np.int32) * n_features)[:, None]
+            node = np.repeat(self.roots[None, :], block.shape[0], axis=0)
+            # np.take on flat arrays is much cheaper than 2-D fancy indexing
+            for _ in range(self.max_depth):
+                column = np.take(self.feature, node)
+                column += row_offsets
+                node = np.take(self.child, node) + (
+                    np.take(flat, column) > np.take(self.threshold, node)
+                )
+            leaves = np.take(self.values, node, axis=0)
+            if self.value_scale is not None:
+                leaves = leaves * self.value_scale
+            totals[start:start + chunk] = leaves.sum(axis=1, dtype=np.float64)
+        return totals
+
+    def raw_predict(self, X: np.ndarray) -> np.ndarray:
+        sums = self._leaf_sums(X)
+        if self.aggregate == "mean":
+            sums /= self.n_trees
+        return self._base + sums * self._normalizer
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        raw = self.raw_predict(X)
+        if self.output == "sigmoid":
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if self.output == "softmax":
+            shifted = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return shifted / shifted.sum(axis=1, keepdims=True)
+        return raw
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.kind == "classifier":
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        if self.kind == "isolation":
+            return np.where(self.decision_function(X) < 0, -1, 1)
+        return self.raw_predict(X)[:, 0]
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        mean_depth = self.raw_predict(X)[:, 0]
+        return -np.power(2.0, -mean_depth / self._path_normalizer)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+    def __repr__(self) -> str:
+        return (f"CompiledForest(source={self.source}, trees={self.n_trees}, "
+                f"max_depth={self.max_depth}, precision={self.precision})")
+
+
+def _sklearn_tree_arrays(tree) -> Tuple[np.ndarray, ...]:
+    t = tree.tree_
+    return t.feature, t.threshold, t.children_left, t.children_right, t.max_depth
+
+
+def _compile_random_forest(model, precision: str) -> CompiledForest:
+    is_classifier = hasattr(model, "classes_")
+    n_outputs = len(model.classes_) if is_classifier else 1
+    builder = _NodeBuilder(n_outputs)
+    for estimator in model.estimators_:
+        feature, threshold, left, right, depth = _sklearn_tree_arrays(estimator)
+        value = estimator.tree_.value[:, 0, :]
+        if is_classifier:
+            # Normalize counts to class fractions like predict_proba does
+            value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+        builder.add(feature, threshold, left, right, value, depth)
+    return CompiledForest(
+        builder,
+        kind="classifier" if is_classifier else "regressor",
+        aggregate="mean",
+        base=np.zeros(n_outputs),
+        precision=precision,
+        classes=getattr(model, "classes_", None),
+        n_features=model.n_features_in_,
+        source=type(model).__name__,
+    )
+
+
+def _compile_gradient_boosting(model, precision: str) -> CompiledForest:
+    n_features = model.n_features_in_
+    stages, n_outputs = model.estimators_.shape
+    builder = _NodeBuilder(n_outputs)
+    for stage in range(stages):
+        for k in range(n_outputs):
+            estimator = model.estimators_[stage, k]
+            feature, threshold, left, right, depth = _sklearn_tree_arrays(estimator)
+            value = np.zeros((len(feature), n_outputs))
+            value[:, k] = estimator.tree_.value[:, 0, 0]
+            builder.add(feature, threshold, left, right, value, depth)
+    base = model._raw_predict_init(np.zeros((1, n_features)))[0]  # pylint: disable=protected-access
+    is_classifier = hasattr(model, "classes_")
+    output = "identity"
+    if is_classifier:
+        output = "sigmoid" if n_outputs == 1 else "softmax"
+    return CompiledForest(
+        builder,
+        kind="classifier" if is_classifier else "regressor",
+        aggregate="sum",
+        base=base,
+        precision=precision,
+        classes=getattr(model, "classes_", None),
+        output=output,
+        n_features=n_features,
+        normalizer=model.learning_rate,
+        source=type(model).__name__,
+    )
+
+
+def _compile_isolation_forest(model, precision: str) -> CompiledForest:
+    builder = _NodeBuilder(1)
+    for estimator, features in zip(model.estimators_, model.estimators_features_):
+        feature, threshold, left, right, depth = _sklearn_tree_arrays(estimator)
+        # Trees see a feature subset; map split features back to input columns
+        feature = np.where(feature >= 0, np.asarray(features)[np.maximum(feature, 0)], -2)
+        # Leaf value: depth plus the expected remaining path length
+        node_depth = np.zeros(len(left), dtype=np.float64)
+        for node in range(len(left)):
+            if left[node] >= 0:
+                node_depth[left[node]] = node_depth[right[node]] = node_depth[node] + 1
+        n_samples = estimator.tree_.n_node_samples
+        builder.add(feature, threshold, left, right,
+                    node_depth + _average_path_length(n_samples), depth)
+    compiled = CompiledForest(
+        builder,
+        kind="isolation",
+        aggregate="mean",
+        base=np.zeros(1),
+        precision=precision,
+        n_features=model.n_features_in_,
+        offset=model.offset_,
+        source=type(model).__name__,
+    )
+    compiled._path_normalizer = float(_average_path_length([model.max_samples_])[0])
+    return compiled
+
+
+def _parse_base_score(raw: str) -> float:
+    return float(raw.strip("[]").split(",")[0])
+
+
+def _compile_xgboost(model, precision: str) -> CompiledForest:
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+    objective = learner["objective"]["name"]
+    base_score = _parse_base_score(learner["learner_model_param"]["base_score"])
+    if objective.startswith("reg:squarederror") or objective == "reg:linear":
+        kind, output, base = "regressor", "identity", base_score
+    elif objective == "binary:logistic":
+        kind, output = "classifier", "sigmoid"
+        base = math.log(base_score / (1.0 - base_score))
+    else:
+        raise ValueError(f"Unsupported XGBoost objective for compilation: {objective}")
+
+    builder = _NodeBuilder(1)
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        right = np.asarray(tree["right_children"], dtype=np.int64)
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        is_leaf = left < 0
+        # XGBoost splits on x < t; for float32 inputs that is x <= prev_float32(t)
+        threshold = np.where(
+            is_leaf, np.inf, np.nextafter(conditions, np.float32(-np.inf)).astype(np.float64)
+        )
+        depth = np.zeros(len(left), dtype=np.int64)
+        for node in range(len(left)):
+            if left[node] >= 0:
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+        builder.add(np.asarray(tree["split_indices"]), threshold, left, right,
+                    np.where(is_leaf, conditions, 0.0), depth.max())
+    return CompiledForest(
+        builder,
+        kind=kind,
+        aggregate="sum",
+        base=np.array([base]),
+        precision=precision,
+        classes=getattr(model, "classes_", np.array([0, 1])) if kind == "classifier" else None,
+        output=output,
+        n_features=int(learner["learner_model_param"]["num_feature"]),
+        source=type(model).__name__,
+    )
+
+
+def compile_model(model, precision: str = "float32") -> CompiledForest:
+    """Compile a fitted tree ensemble for reduced-precision inference"""
+    if isinstance(model, CompiledForest):
+        return model
+    name = type(model).__name__
+    if hasattr(model, "get_booster") or name == "Booster":
+        return _compile_xgboost(model, precision)
+    if hasattr(model, "offset_") and hasattr(model, "estimators_features_"):
+        return _compile_isolation_forest(model, precision)
+    if hasattr(model, "init_") and hasattr(model, "learning_rate"):
+        return _compile_gradient_boosting(model, precision)
+    if hasattr(model, "estimators_"):
+        return _compile_random_forest(model, precision)
+    raise ValueError(f"Cannot compile model of type {name}")
+
+
+def _best_time(func, X: np.ndarray, repeat: int) -> float:
+    """Fastest of ``repeat`` calls of ``func(X)``, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _serving_time(predict, X: np.ndarray, repeat: int = 5) -> float:
+    """Single-row plus batch prediction time, the two shapes the service sends"""
+    return _best_time(predict, X[:1], repeat) + _best_time(predict, X, repeat)
+
+
+def maybe_compile(model, precision: Optional[str] = None, benchmark_rows: int = 256):
+    """
+    Compile ``model`` for the configured precision, or return it unchanged.
+
+    Both versions are timed on random rows and the native model is kept when
+    the compiled traversal is slower, as for deep XGBoost boosters whose
+    native predictor beats the level-by-level NumPy walk.
+    """
+    precision = precision or inference_precision()
+    if precision == "float64" or model is None:
+        return model
+    try:
+        compiled = compile_model(model, precision)
+        X = np.random.default_rng(0).standard_normal(
+            (benchmark_rows, max(compiled.n_features_in_, 1))
+        )
+        native_s = _serving_time(model.predict, X)
+        compiled_s = _serving_time(compiled.predict, X)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Keeping %s at float64: %s", type(model).__name__, str(e))
+        return model
+    if compiled_s > native_s:
+        logger.info("Keeping %s at float64: compiled %s is slower (%.2fms vs %.2fms)",
+                    compiled.source, precision, compiled_s * 1000, native_s * 1000)
+        return model
+    logger.info("Compiled %s for %s inference (%d trees, %.2fms vs %.2fms native)",
+                compiled.source, precision, compiled.n_trees,
+                compiled_s * 1000, native_s * 1000)
+    return compiled
+
+
+def native_nbytes(model) -> int:
+    """Approximate in-memory size of a native sklearn or XGBoost ensemble"""
+    if hasattr(model, "get_booster"):
+        return len(model.get_booster().save_raw(raw_format="ubj"))
+    estimators = np.ravel(model.estimators_)
+    total = 0
+    for estimator in estimators:
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+def parity_report(model, X_holdout: np.ndarray, y_holdout: Optional[np.ndarray] = None,
+                  precisions: Sequence[str] = ("float32", "int16", "int8"),
+                  repeat: int = 5) -> Dict[str, Any]:
+    """
+    Compare compiled predictions with the float64 model on held-out rows.
+
+    Regressors report the max/mean absolute error relative to the target
+    spread, classifiers the max probability difference and label agreement.
+    Memory and batch latency are reported for each precision.
+    """
+    is_classifier = hasattr(model, "predict_proba") and hasattr(model, "classes_")
+    is_isolation = hasattr(model, "offset_")
+    if is_isolation:
+        reference_fn = model.decision_function
+    elif is_classifier:
+        reference_fn = model.predict_proba
+    else:
+        reference_fn = model.predict
+    reference = np.asarray(reference_fn(X_holdout), dtype=np.float64)
+    spread = float(np.ptp(y_holdout)) if y_holdout is not None and not is_classifier else 1.0
+
+    report = {
+        "model": type(model).__name__,
+        "rows": int(len(X_holdout)),
+        "float64": {
+            "memory_bytes": native_nbytes(model),
+            "batch_ms": round(_best_time(reference_fn, X_holdout, repeat) * 1000, 3),
+        },
+    }
+    for precision in precisions:
+        compiled = compile_model(model, precision)
+        if is_isolation:
+            compiled_fn = compiled.decision_function
+        elif is_classifier:
+            compiled_fn = compiled.predict_proba
+        else:
+            compiled_fn = compiled.predict
+        output = np.asarray(compiled_fn(X_holdout), dtype=np.float64)
+        error = np.abs(output - reference)
+        entry = {
+            "memory_bytes": compiled.nbytes,
+            "memory_ratio": round(compiled.nbytes / max(report["float64"]["memory_bytes"], 1), 3),
+            "batch_ms": round(_best_time(compiled_fn, X_holdout, repeat) * 1000, 3),
+            "max_abs_error": float(error.max()),
+            "mean_abs_error": float(error.mean()),
+        }
+        if is_classifier:
+            entry["label_agreement"] = float(np.mean(
+                model.predict(X_holdout) == compiled.predict(X_holdout)
+            ))
+        elif is_isolation:
+            entry["label_agreement"] = float(np.mean(
+                (reference < 0) == (output < 0)
+            ))
+        else:
+            entry["max_error_vs_target_range"] = float(error.max() / max(spread, 1e-12))
+        report[precision] = entry
+    return report
+
+
+# Acceptance limits per precision for the parity check
+PARITY_LIMITS = {
+    "float32": {"max_probability_error": 1e-4, "max_error_vs_target_range": 1e-4,
+                "min_label_agreement": 0.999},
+    "int16": {"max_probability_error": 1e-3, "max_error_vs_target_range": 1e-3,
+              "min_label_agreement": 0.995},
+    "int8": {"max_probability_error": 0.05, "max_error_vs_target_range": 0.05,
+             "min_label_agreement": 0.97},
+}
+
+
+def parity_failures(report: Dict[str, Any]) -> Sequence[str]:
+    """List the precisions of a parity report that exceed PARITY_LIMITS"""
+    failures = []
+    for precision, limits in PARITY_LIMITS.items():
+        entry = report.get(precision)
+        if entry is None:
+            continue
+        if "label_agreement" in entry:
+            if entry["label_agreement"] < limits["min_label_agreement"]:
+                failures.append(f"{report['model']} {precision}: label agreement "
+                                f"{entry['label_agreement']:.4f}")
+            if report["model"] != "IsolationForest" and \
+                    entry["max_abs_error"] > limits["max_probability_error"]:
+                failures.append(f"{report['model']} {precision}: probability error "
+                                f"{entry['max_abs_error']:.2e}")
+        elif entry["max_error_vs_target_range"] > limits["max_error_vs_target_range"]:
+            failures.append(f"{report['model']} {precision}: relative error "
+                            f"{entry['max_error_vs_target_range']:.2e}")
+    return failures
+
+
+def run_parity_suite(n_samples: int = 4000) -> Dict[str, Any]:
+    """Train every service model on synthetic data and check compiled parity"""
+    from sklearn.ensemble import IsolationForest, RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+
+    from .models import FinancialRiskModel, LayoffRiskModel, SavingsProjectionModel
+    from .train import (
+        generate_layoff_training_data,
+        generate_risk_training_data,
+        generate_savings_training_data,
+    )
+
+    np.random.seed(7)
+    reports = {}
+    for name, model_cls, generate in (
+        ("risk", FinancialRiskModel, generate_risk_training_data),
+        ("layoff", LayoffRiskModel, generate_layoff_training_data),
+        ("savings", SavingsProjectionModel, generate_savings_training_data),
+    ):
+        X, y = generate(n_samples=n_samples)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25,
+                                                            random_state=42)
+        model = model_cls()
+        model.train(X_train, y_train)
+        reports[name] = parity_report(model.model, model.scaler.transform(X_test), y_test)
+
+    # Fraud-shaped forest and Isolation Forest on synthetic transactions
+    rng = np.random.default_rng(7)
+    X = rng.lognormal(size=(n_samples, 9))
+    y = (X[:, 0] * X[:, 4] + rng.normal(scale=0.5, size=n_samples) > 2.0).astype(int)
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.25, random_state=42)
+    forest = RandomForestClassifier(n_estimators=100, max_depth=15, random_state=42,
+                                    n_jobs=-1).fit(X_train, y_train)
+    reports["fraud"] = parity_report(forest, X_test)
+    iforest = IsolationForest(n_estimators=100, random_state=42).fit(X_train)
+    reports["isolation"] = parity_report(iforest, X_test)
+    return reports
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run_parity_suite()
+    print(json.dumps(results, indent=2))
+    problems = [f for report in results.values() for f in parity_failures(report)]
+    for problem in problems:
+        print(f"PARITY FAILURE {problem}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
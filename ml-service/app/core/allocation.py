@@ -0,0 +1,155 @@
+"""
+CAPSTACK Allocation Rules - Vectorized batch allocation
+The /allocation-optimize rule adjustments applied to whole user arrays as NumPy column operations
+"""
+
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+RISK_TOLERANCE_CODES: Dict[str, int] = {"low": 0, "medium": 1, "high": 2}
+MARKET_CONDITION_CODES: Dict[str, int] = {"bull": 0, "bear": 1, "neutral": 2}
+
+ALLOCATION_COLUMNS = (
+    "sip_percentage",
+    "stocks_percentage",
+    "bonds_percentage",
+    "lifestyle_percentage",
+    "emergency_fund_percentage",
+)
+
+# Bit set in the ``adjustments`` column for each rule that fired; the
+# columnar counterpart of the single-user ``reasoning`` list
+ADJUSTMENT_FLAGS: Dict[str, int] = {
+    "age_under_30": 1,
+    "age_over_50": 2,
+    "low_risk_tolerance": 4,
+    "high_risk_tolerance": 8,
+    "low_job_stability": 16,
+    "bull_market": 32,
+    "bear_market": 64,
+    "emergency_fund_shortfall": 128,
+    "high_debt_burden": 256,
+}
+
+ArrayLike = Union[np.ndarray, Sequence]
+
+
+def encode_categories(values: ArrayLike, codes: Dict[str, int], name: str) -> np.ndarray:
+    """Map category names (or pass through integer codes) to an int8 code array"""
+    array = np.asarray(values)
+    if array.dtype.kind in "iu":
+        if array.size and (array.min() < 0 or array.max() >= len(codes)):
+            raise ValueError(f"{name} codes must be in [0, {len(codes) - 1}]")
+        return array.astype(np.int8, copy=False)
+    encoded = np.full(array.shape, -1, dtype=np.int8)
+    for label, code in codes.items():
+        encoded[array == label] = code
+    if (encoded < 0).any():
+        unknown = sorted(set(np.unique(array[encoded < 0]).tolist()))
+        raise ValueError(f"Unknown {name} values: {unknown[:5]}")
+    return encoded
+
+
+def allocate_batch(
+    income: ArrayLike,
+    expenses: ArrayLike,
+    emergency_fund: ArrayLike,
+    debt: ArrayLike,
+    age: ArrayLike,
+    risk_tolerance: ArrayLike,
+    job_stability: ArrayLike,
+    market_conditions: ArrayLike,
+    target_months: float = 6.0,
+    decimals: Union[int, None] = 2,
+) -> Dict[str, np.ndarray]:
+    """
+    Rule-based allocation for arrays of users.
+
+    Applies the same age, risk-tolerance, job-stability, market,
+    emergency-fund and debt adjustments and normalization as the
+    single-user ``/allocation-optimize`` rules engine, in the same order, so
+    each row matches the single-user response. Category columns take names
+    (``"low"``, ``"bull"``) or their integer codes. Returns the five
+    percentage columns plus an ``adjustments`` bitmask (ADJUSTMENT_FLAGS).
+    """
+    income = np.asarray(income, dtype=np.float64)
+    expenses = np.asarray(expenses, dtype=np.float64)
+    emergency_fund = np.asarray(emergency_fund, dtype=np.float64)
+    debt = np.asarray(debt, dtype=np.float64)
+    age = np.asarray(age, dtype=np.float64)
+    job_stability = np.asarray(job_stability, dtype=np.float64)
+    risk = encode_categories(risk_tolerance, RISK_TOLERANCE_CODES, "risk_tolerance")
+    market = encode_categories(market_conditions, MARKET_CONDITION_CODES, "market_conditions")
+    n = len(income)
+    if any(len(column) != n for column in (expenses, emergency_fund, debt, age,
+                                           job_stability, risk, market)):
+        raise ValueError("All columns must have the same length")
+
+    # Age-based adjustment (life-cycle investing)
+    young = age < 30
+    old = age > 50
+    sip = 30.0 + np.where(young, 5.0, np.where(old, -5.0, 0.0))
+    stocks = 15.0 + np.where(young, 3.0, np.where(old, -5.0, 0.0))
+    bonds = 20.0 + np.where(old, 10.0, 0.0)
+    lifestyle = 25.0 + np.where(young, -8.0, 0.0)
+
+    # Risk tolerance adjustment
+    low_risk = risk == RISK_TOLERANCE_CODES["low"]
+    high_risk = risk == RISK_TOLERANCE_CODES["high"]
+    stocks = np.where(low_risk, np.maximum(10, stocks - 5),
+                      np.where(high_risk, np.minimum(20, stocks + 5), stocks))
+    bonds += np.where(low_risk, 5.0, np.where(high_risk, -5.0, 0.0))
+
+    # Job stability adjustment
+    unstable = job_stability < 5
+    emergency = 10.0 + np.where(unstable, 5.0, 0.0)
+    lifestyle -= np.where(unstable, 5.0, 0.0)
+
+    # Market condition adjustment
+    bull = market == MARKET_CONDITION_CODES["bull"]
+    bear = market == MARKET_CONDITION_CODES["bear"]
+    market_shift = np.where(bull, 3.0, np.where(bear, -3.0, 0.0))
+    stocks += market_shift
+    bonds -= market_shift
+
+    # Emergency fund adequacy check
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = np.where(expenses > 0, emergency_fund / np.where(expenses > 0, expenses, 1.0), 0.0)
+    short = months < target_months
+    additional = np.where(short, np.minimum(10, (target_months - months) * 2), 0.0)
+    emergency += additional
+    lifestyle -= additional
+
+    # Debt burden assessment
+    with np.errstate(divide="ignore", invalid="ignore"):
+        debt_to_income = np.where(income > 0, debt / np.where(income > 0, income * 12, 1.0), 1.0)
+    indebted = debt_to_income > 0.5
+    lifestyle -= np.where(indebted, 5.0, 0.0)
+    emergency += np.where(indebted, 5.0, 0.0)
+
+    # Normalize allocation to 100%
+    columns = (sip, stocks, bonds, lifestyle, emergency)
+    total = sip + stocks + bonds + lifestyle + emergency
+    scale = np.abs(total) >= 0.01
+    safe_total = np.where(scale, total, 1.0)
+    result = {}
+    for name, column in zip(ALLOCATION_COLUMNS, columns):
+        normalized = np.where(scale, (column / safe_total) * 100, column)
+        result[name] = np.round(normalized, decimals) if decimals is not None else normalized
+    fired = {
+        "age_under_30": young, "age_over_50": old,
+        "low_risk_tolerance": low_risk, "high_risk_tolerance": high_risk,
+        "low_job_stability": unstable, "bull_market": bull, "bear_market": bear,
+        "emergency_fund_shortfall": short, "high_debt_burden": indebted,
+    }
+    flags = np.zeros(n, dtype=np.int16)
+    for rule, mask in fired.items():
+        flags |= mask.astype(np.int16) * np.int16(ADJUSTMENT_FLAGS[rule])
+    result["adjustments"] = flags
+    return result
+
+
+def describe_adjustments(mask: int) -> Dict[str, bool]:
+    """Decode an ``adjustments`` bitmask into rule names"""
+    return {name: bool(mask & bit) for name, bit in ADJUSTMENT_FLAGS.items()}
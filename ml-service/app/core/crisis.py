@@ -0,0 +1,78 @@
+"""
+CAPSTACK Crisis Simulation - Vectorized crisis sweeps
+The /crisis-simulation monthly projection computed for a whole population at once
+"""
+
+from typing import Any, Dict, Mapping
+
+import numpy as np
+
+from .rules import get_rules
+
+# Income loss at the crisis peak, crisis length in months and recovery factor
+SCENARIO_IMPACTS: Dict[str, Dict[str, float]] = {
+    'job_loss': {'income_loss': 1.0, 'duration': 6, 'recovery_factor': 0.7},
+    'medical_emergency': {'income_loss': 0.3, 'duration': 3, 'recovery_factor': 0.9},
+    'market_crash': {'income_loss': 0.4, 'duration': 12, 'recovery_factor': 0.6},
+    'inflation_spike': {'income_loss': 0.1, 'duration': 24, 'recovery_factor': 0.5},
+    'debt_crisis': {'income_loss': 0.2, 'duration': 18, 'recovery_factor': 0.4},
+    'business_failure': {'income_loss': 0.8, 'duration': 24, 'recovery_factor': 0.3}
+}
+PROJECTION_MONTHS = 24
+
+
+def simulate_crises(columns: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Survival, worst month, recovery and risk level per profile.
+
+    Matches the single-profile /crisis-simulation: months are projected
+    until cumulative savings first reach zero, which is the survival month
+    count; unknown scenarios are treated as job loss.
+    """
+    income = np.asarray(columns["monthly_income"], dtype=np.float64)
+    expenses = np.asarray(columns["monthly_expenses"], dtype=np.float64)
+    severity = np.asarray(columns["crisis_severity"], dtype=np.float64)
+    scenario_names = np.asarray(columns["crisis_scenario"], dtype=object)
+    impacts = [SCENARIO_IMPACTS.get(name, SCENARIO_IMPACTS['job_loss']) for name in scenario_names]
+    duration = np.array([impact['duration'] for impact in impacts], dtype=np.float64)
+
+    income_loss = np.array([impact['income_loss'] for impact in impacts]) * severity
+    expense_increase = np.where(scenario_names == 'medical_emergency', 0.2, 0.1) * severity
+
+    month = np.arange(1, PROJECTION_MONTHS + 1, dtype=np.float64)[None, :]
+    in_crisis = month <= duration[:, None]
+    recovery_progress = (month - duration[:, None]) / 12
+    monthly_income = np.where(
+        in_crisis,
+        income[:, None] * (1 - income_loss[:, None] * np.exp(-month / 6)),
+        income[:, None] * (1 - income_loss[:, None] * np.exp(-duration[:, None] / 6)
+                           * (1 - recovery_progress)),
+    )
+    monthly_expenses = np.where(in_crisis, (expenses * (1 + expense_increase))[:, None],
+                                expenses[:, None])
+    savings = monthly_income - monthly_expenses
+    cumulative = (np.asarray(columns["emergency_fund_months"], dtype=np.float64) * expenses)[:, None] \
+        + np.cumsum(savings, axis=1)
+
+    depleted = cumulative <= 0
+    survival_months = np.where(depleted.any(axis=1), depleted.argmax(axis=1), PROJECTION_MONTHS)
+    # The projection stops at the month savings run out
+    projected = np.arange(PROJECTION_MONTHS)[None, :] <= survival_months[:, None]
+    worst = np.where(projected, savings, np.inf).argmin(axis=1)
+    rows = np.arange(len(income))
+
+    recovery_time = duration * (2 - np.asarray(columns["job_stability"], dtype=np.float64)) \
+        * (2 - np.asarray(columns["skills_relevance"], dtype=np.float64))
+    debt_to_income = np.asarray(columns["total_debt"], dtype=np.float64) / (income * 12)
+    financial_stress = (expenses / income + debt_to_income * 0.1) / 2
+    return {
+        "survival_months": survival_months,
+        "worst_month": worst + 1,
+        "worst_month_savings": savings[rows, worst],
+        "recovery_time_months": np.round(recovery_time).astype(np.int64),
+        "risk_level": get_rules().crisis_level_batch(survival_months, financial_stress),
+        "financial_stress_score": np.round(financial_stress, 3),
+        "income_loss_percentage": np.round(income_loss * 100, 1),
+        "expense_increase_percentage": np.round(expense_increase * 100, 1),
+        "crisis_duration_months": duration.astype(np.int64),
+    }
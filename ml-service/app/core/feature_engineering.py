@@ -1,6 +1,22 @@
 # TODO: Implement feature engineering for ML models
 # Extract and transform features from raw financial data
 
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+# Model inputs of the free-form profile sections: numeric fields must be
+# finite numbers, text fields strings (contract_type may also be null)
+EMPLOYMENT_NUMERIC_FIELDS: Tuple[str, ...] = (
+    "experience_years", "company_age", "team_size", "performance_rating",
+)
+EMPLOYMENT_TEXT_FIELDS: Tuple[str, ...] = ("industry", "contract_type")
+SAVINGS_PLAN_NUMERIC_FIELDS: Tuple[str, ...] = (
+    "current_savings", "monthly_savings", "expected_return", "inflation_rate",
+    "months_to_project", "projection_months", "investment_type",
+)
+
+
 def extract_features(income, expenses, savings, debt):
     """
     Extract features for risk scoring and predictions.
@@ -14,4 +30,86 @@ def extract_features(income, expenses, savings, debt):
         'savings_ratio': savings_ratio,
         'debt_ratio': debt_ratio,
         'net_income': income - expenses
-    }
\ No newline at end of file
+    }
+
+
+def _check_section(section: str, values: Dict[str, Any], numeric: Tuple[str, ...],
+                   text: Tuple[str, ...] = ()):
+    """Raise ValueError naming the first malformed model input of a section"""
+    for name in numeric:
+        if name not in values:
+            continue
+        value = values[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{section}.{name} must be a finite number")
+    for name in text:
+        value = values.get(name)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{section}.{name} must be a string")
+
+
+@dataclass(frozen=True)
+class ProfileFeatures:
+    """
+    Shared features of one user's profile, derived once.
+
+    Ratios follow the endpoints that use them: ``expense_ratio``,
+    ``savings_ratio`` and ``debt_ratio`` are per month of income (/risk-score),
+    ``debt_to_income`` is against a year of income (/allocation-optimize).
+    """
+
+    income: float
+    expenses: float
+    savings: float
+    debt: float
+    emergency_fund: float
+    expense_ratio: float
+    savings_ratio: float
+    debt_ratio: float
+    debt_to_income: float
+    emergency_months: float
+    savings_rate: float
+    net_income: float
+    employment: Dict[str, Any] = field(default_factory=dict)
+    savings_plan: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def risk_input(self) -> Dict[str, float]:
+        """Input of the risk model"""
+        return {"income": self.income, "expenses": self.expenses,
+                "savings": self.savings, "debt": self.debt}
+
+
+def build_profile_features(income, expenses, savings, debt, emergency_fund=None,
+                           employment: Optional[Dict[str, Any]] = None,
+                           savings_plan: Optional[Dict[str, Any]] = None) -> ProfileFeatures:
+    """
+    Build the shared profile features.
+
+    ``emergency_fund`` defaults to ``savings``. The savings plan defaults to
+    growing current savings by the monthly surplus, so the savings model and
+    trajectory need no extra input. Raises ValueError when a numeric field
+    of ``employment`` or ``savings_plan`` is not a finite number.
+    """
+    _check_section("employment", employment or {}, EMPLOYMENT_NUMERIC_FIELDS, EMPLOYMENT_TEXT_FIELDS)
+    _check_section("savings_plan", savings_plan or {}, SAVINGS_PLAN_NUMERIC_FIELDS)
+    ratios = extract_features(income, expenses, savings, debt)
+    emergency_fund = savings if emergency_fund is None else emergency_fund
+    plan = {"current_savings": savings, "monthly_savings": max(0.0, ratios['net_income'])}
+    plan.update(savings_plan or {})
+    return ProfileFeatures(
+        income=income,
+        expenses=expenses,
+        savings=savings,
+        debt=debt,
+        emergency_fund=emergency_fund,
+        expense_ratio=ratios['expense_ratio'],
+        savings_ratio=ratios['savings_ratio'],
+        debt_ratio=ratios['debt_ratio'],
+        debt_to_income=debt / (income * 12) if income > 0 else 1.0,
+        emergency_months=emergency_fund / expenses if expenses > 0 else 0.0,
+        savings_rate=ratios['net_income'] / income * 100 if income > 0 else 0.0,
+        net_income=ratios['net_income'],
+        employment=dict(employment or {}),
+        savings_plan=plan,
+    )
@@ -0,0 +1,137 @@
+"""
+CAPSTACK Layoff Hazard - Multi-horizon layoff risk curves
+Monthly layoff probability curves from one layoff model pass, cached per user feature vector
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from ..metrics import record_cache
+from ..models import layoff_model
+
+# Named prediction horizons in months
+HORIZON_MONTHS: Dict[str, int] = {"30day": 1, "60day": 2, "90day": 3}
+CURVE_MONTHS = 12
+# The layoff model's probability is read as the chance of a layoff within
+# the longest prediction horizon, so 90-day predictions are unchanged
+REFERENCE_MONTHS = 3
+# User data read by the layoff model
+LAYOFF_INPUTS = (
+    "industry", "experience_years", "company_age", "team_size",
+    "contract_type", "performance_rating",
+)
+
+
+def monthly_hazard(probability, reference_months: int = REFERENCE_MONTHS) -> np.ndarray:
+    """Constant per-month hazard giving ``probability`` over ``reference_months``"""
+    probability = np.clip(np.asarray(probability, dtype=np.float64), 0.0, 1.0)
+    return 1 - np.power(1 - probability, 1 / reference_months)
+
+
+def cumulative_curve(hazard, months: int = CURVE_MONTHS) -> np.ndarray:
+    """P(layoff within t months) for t = 1..months, one row per user"""
+    steps = np.arange(1, months + 1, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        log_survival = np.log1p(-np.atleast_1d(np.asarray(hazard, dtype=np.float64)))
+    return 1 - np.exp(steps[None, :] * log_survival[:, None])
+
+
+@dataclass
+class LayoffCurves:
+    """Layoff risk curves of a batch of users"""
+
+    probability: np.ndarray
+    hazard: np.ndarray
+    cumulative: np.ndarray
+
+    @property
+    def months(self) -> np.ndarray:
+        return np.arange(1, self.cumulative.shape[1] + 1)
+
+    def horizons(self, names: Sequence[str] = tuple(HORIZON_MONTHS)) -> Dict[str, np.ndarray]:
+        """Cumulative probability at the named horizons"""
+        return {name: self.cumulative[:, HORIZON_MONTHS[name] - 1] for name in names}
+
+
+class LayoffHazardPredictor:
+    """
+    Layoff probability curves for one user or a batch.
+
+    The model runs once over the users' feature rows and every horizon is
+    derived from the resulting per-month hazard. Model probabilities are
+    kept in an LRU cache keyed by the feature vector, so repeat lookups for
+    the same user skip inference; the rule-based fallback is not cached.
+    """
+
+    def __init__(self, model, cache_size: int = 0):
+        self.model = model
+        self.cache_size = cache_size or int(os.getenv("LAYOFF_CURVE_CACHE_SIZE", "10000"))
+        self._cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_token: Optional[int] = None
+
+    def _check_model(self):
+        """Drop cached probabilities once the estimator has been reloaded or retrained"""
+        token = self.model.generation
+        if token != self._model_token:
+            with self._lock:
+                self._cache.clear()
+                self._model_token = token
+
+    def probabilities(self, columns: Mapping[str, Any], use_model: bool = True) -> np.ndarray:
+        """Model (or rule) layoff probability per user, one model pass for cache misses"""
+        if not (use_model and self.model.is_trained):
+            return self.model.fallback_batch(columns)
+        self._check_model()
+        features = self.model.prepare_features_batch(columns)
+        keys = [row.tobytes() for row in features]
+        result = np.empty(len(keys), dtype=np.float64)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    result[i] = cached
+        record_cache("layoff_curve", True, len(keys) - len(missing))
+        record_cache("layoff_curve", False, len(missing))
+        if missing:
+            predicted = self.model.predict_features(features[missing])
+            result[missing] = predicted
+            with self._lock:
+                for i, probability in zip(missing, predicted.tolist()):
+                    self._cache[keys[i]] = probability
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def curves(self, columns: Mapping[str, Any], months: int = CURVE_MONTHS,
+               use_model: bool = True) -> LayoffCurves:
+        """Monthly cumulative layoff probability curves for columns of users"""
+        probability = self.probabilities(columns, use_model)
+        hazard = monthly_hazard(probability)
+        return LayoffCurves(probability, hazard, cumulative_curve(hazard, months))
+
+    def curve(self, user_data: Mapping[str, Any], months: int = CURVE_MONTHS,
+              use_model: bool = True) -> LayoffCurves:
+        """Curve of a single user (a batch of one)"""
+        columns = {name: [user_data[name]] for name in LAYOFF_INPUTS if name in user_data}
+        columns.setdefault("industry", ["IT"])
+        return self.curves(columns, months, use_model)
+
+    def fallback_curve(self, user_data: Mapping[str, Any]) -> LayoffCurves:
+        """Curve of a single user from the rule-based layoff risk"""
+        return self.curve(user_data, use_model=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached_users": len(self._cache), "cache_size": self.cache_size}
+
+
+layoff_hazard = LayoffHazardPredictor(layoff_model)
@@ -0,0 +1,318 @@
+"""
+CAPSTACK Portfolio Optimizer - Mean-variance allocation engine
+Constrained mean-variance optima over the five allocation buckets, cached as interpolable frontiers
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUCKETS: Tuple[str, ...] = ("sip", "stocks", "bonds", "lifestyle", "emergency_fund")
+SIP, STOCKS, BONDS, LIFESTYLE, EMERGENCY = range(len(BUCKETS))
+
+RISK_TOLERANCES: Tuple[str, ...] = ("low", "medium", "high")
+MARKET_CONDITIONS: Tuple[str, ...] = ("bull", "neutral", "bear")
+# Upper age bound (exclusive) of each life-cycle band
+AGE_BANDS: Tuple[Tuple[str, int], ...] = (
+    ("under_30", 30), ("30_44", 45), ("45_59", 60), ("60_plus", 200),
+)
+
+# Risk aversion (lambda in w·mu - lambda/2 w'Σw) by tolerance, scaled up with age
+RISK_AVERSION: Dict[str, float] = {"low": 8.0, "medium": 4.0, "high": 2.0}
+AGE_AVERSION: Dict[str, float] = {"under_30": 0.8, "30_44": 1.0, "45_59": 1.3, "60_plus": 1.7}
+
+# Annual expected return and volatility per bucket. Lifestyle spending has no
+# investment return; its share is fixed by budget rules rather than optimized.
+DEFAULT_ASSUMPTIONS: Dict[str, Dict[str, Dict[str, float]]] = {
+    "neutral": {
+        "returns": {"sip": 0.11, "stocks": 0.13, "bonds": 0.065, "lifestyle": 0.0,
+                    "emergency_fund": 0.04},
+        "volatility": {"sip": 0.16, "stocks": 0.24, "bonds": 0.05, "lifestyle": 0.0,
+                       "emergency_fund": 0.01},
+    },
+    "bull": {
+        "returns": {"sip": 0.13, "stocks": 0.16, "bonds": 0.06, "lifestyle": 0.0,
+                    "emergency_fund": 0.04},
+        "volatility": {"sip": 0.15, "stocks": 0.22, "bonds": 0.05, "lifestyle": 0.0,
+                       "emergency_fund": 0.01},
+    },
+    "bear": {
+        "returns": {"sip": 0.09, "stocks": 0.10, "bonds": 0.065, "lifestyle": 0.0,
+                    "emergency_fund": 0.045},
+        "volatility": {"sip": 0.19, "stocks": 0.28, "bonds": 0.05, "lifestyle": 0.0,
+                       "emergency_fund": 0.01},
+    },
+}
+CORRELATION = np.array([
+    [1.00, 0.85, 0.10, 0.0, 0.0],
+    [0.85, 1.00, 0.05, 0.0, 0.0],
+    [0.10, 0.05, 1.00, 0.0, 0.1],
+    [0.00, 0.00, 0.00, 1.0, 0.0],
+    [0.00, 0.00, 0.10, 0.0, 1.0],
+])
+
+# Per-bucket bounds outside the rule-driven ones (lifestyle, emergency floor)
+LOWER_BOUNDS = np.array([0.05, 0.0, 0.05, 0.0, 0.0])
+UPPER_BOUNDS = np.array([0.60, 0.25, 0.60, 1.0, 0.45])
+
+# Grid of the rule-driven constraints each frontier is solved on. Optimal
+# weights of a parametric QP are piecewise linear in its bounds, and a convex
+# combination of feasible grid solutions satisfies the interpolated bounds.
+EMERGENCY_FLOOR_GRID = np.linspace(0.05, 0.30, 11)
+LIFESTYLE_GRID = np.linspace(0.10, 0.35, 6)
+
+FrontierKey = Tuple[str, str, str]
+
+
+def age_band(age: int) -> str:
+    for band, upper in AGE_BANDS:
+        if age < upper:
+            return band
+    return AGE_BANDS[-1][0]
+
+
+def _covariance(volatility: np.ndarray) -> np.ndarray:
+    return CORRELATION * np.outer(volatility, volatility)
+
+
+def _project(v: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Exact Euclidean projection of each row onto {sum(w) = 1, lower <= w <= upper}.
+
+    The projection is clip(v - tau, lower, upper) for the shift tau making the
+    row sum to one. That sum is piecewise linear and non-increasing in tau
+    with breakpoints at v - upper and v - lower, so tau is found by evaluating
+    it at the sorted breakpoints and interpolating within the bracketing pair.
+    """
+    breakpoints = np.sort(np.concatenate([v - upper, v - lower], axis=1), axis=1)
+    sums = np.clip(v[:, None, :] - breakpoints[:, :, None],
+                   lower[:, None, :], upper[:, None, :]).sum(axis=2)
+    right = np.clip((sums >= 1.0).sum(axis=1), 1, breakpoints.shape[1] - 1)
+    rows = np.arange(len(v))
+    t0, t1 = breakpoints[rows, right - 1], breakpoints[rows, right]
+    s0, s1 = sums[rows, right - 1], sums[rows, right]
+    fraction = np.where(s0 > s1, (s0 - 1.0) / np.where(s0 > s1, s0 - s1, 1.0), 0.0)
+    tau = t0 + np.clip(fraction, 0.0, 1.0) * (t1 - t0)
+    return np.clip(v - tau[:, None], lower, upper)
+
+
+def solve_mean_variance(mu: np.ndarray, cov: np.ndarray, aversion: np.ndarray,
+                        lower: np.ndarray, upper: np.ndarray,
+                        max_iter: int = 5000, tol: float = 1e-8) -> np.ndarray:
+    """
+    Maximize ``w·mu - aversion/2 w'Σw`` subject to box and budget constraints.
+
+    Vectorized accelerated projected gradient (FISTA with adaptive restart)
+    over a batch of problems: ``mu``, ``lower`` and ``upper`` are (n, k),
+    ``cov`` is (n, k, k) and ``aversion`` is (n,). The step is the inverse
+    Lipschitz constant of each row's gradient.
+    """
+    lipschitz = aversion * np.linalg.eigvalsh(cov)[:, -1]
+    step = (1.0 / np.maximum(lipschitz, 1e-6))[:, None]
+    w = _project(np.full_like(mu, 1.0 / mu.shape[1]), lower, upper)
+    y, momentum = w, np.ones(len(w))
+    for _ in range(max_iter):
+        grad = mu - aversion[:, None] * np.einsum("nij,nj->ni", cov, y)
+        w_next = _project(y + step * grad, lower, upper)
+        delta = w_next - w
+        if np.abs(delta).max() < tol:
+            return w_next
+        # Restart momentum on rows where it points against the gradient
+        restart = (grad * delta).sum(axis=1) < 0
+        momentum_next = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+        beta = np.where(restart, 0.0, (momentum - 1) / momentum_next)
+        momentum = np.where(restart, 1.0, momentum_next)
+        y = w_next + beta[:, None] * delta
+        w = w_next
+    return w
+
+
+@dataclass
+class EfficientFrontier:
+    """Optimal weights on the (emergency floor, lifestyle share) grid of one key"""
+
+    key: FrontierKey
+    weights: np.ndarray            # (floors, lifestyles, buckets)
+    expected_return: np.ndarray    # (floors, lifestyles)
+    volatility: np.ndarray         # (floors, lifestyles)
+    computed_at: float = field(default_factory=time.time)
+
+    def lookup(self, emergency_floor: float, lifestyle: float) -> Tuple[np.ndarray, float, float]:
+        """Bilinearly interpolated weights, expected return and volatility"""
+        i, s = _grid_position(EMERGENCY_FLOOR_GRID, emergency_floor)
+        j, t = _grid_position(LIFESTYLE_GRID, lifestyle)
+        corners = ((i, j, (1 - s) * (1 - t)), (i + 1, j, s * (1 - t)),
+                   (i, j + 1, (1 - s) * t), (i + 1, j + 1, s * t))
+        weights = sum(c * self.weights[a, b] for a, b, c in corners)
+        ret = sum(c * self.expected_return[a, b] for a, b, c in corners)
+        vol = sum(c * self.volatility[a, b] for a, b, c in corners)
+        return weights, float(ret), float(vol)
+
+
+def _grid_position(grid: np.ndarray, value: float) -> Tuple[int, float]:
+    value = min(max(value, grid[0]), grid[-1])
+    index = min(int((value - grid[0]) / (grid[1] - grid[0])), len(grid) - 2)
+    return index, (value - grid[index]) / (grid[index + 1] - grid[index])
+
+
+@dataclass
+class AllocationConstraints:
+    """Rule-driven bounds and the reasons they were applied"""
+
+    emergency_floor: float
+    lifestyle: float
+    reasoning: List[str]
+
+
+def allocation_constraints(age: int, job_stability: float, emergency_months: float,
+                           debt_to_income: float, target_months: float = 6.0) -> AllocationConstraints:
+    """Emergency-fund floor and lifestyle share from the allocation rules"""
+    floor, lifestyle, reasoning = 0.10, 0.25, []
+    if age < 30:
+        lifestyle -= 0.05
+        reasoning.append("Age < 30: Lower lifestyle share for long-term investing")
+    if job_stability < 5:
+        floor += 0.05
+        lifestyle -= 0.05
+        reasoning.append("Low job stability: Prioritize emergency fund")
+    if emergency_months < target_months:
+        floor += min(0.10, (target_months - emergency_months) * 0.02)
+        reasoning.append(
+            f"Emergency fund needs {round(target_months - emergency_months, 1)} months coverage"
+        )
+    if debt_to_income > 0.5:
+        floor += 0.05
+        lifestyle -= 0.05
+        reasoning.append("High debt burden: Conservative spending")
+    floor = float(np.clip(floor, EMERGENCY_FLOOR_GRID[0], EMERGENCY_FLOOR_GRID[-1]))
+    lifestyle = float(np.clip(lifestyle, LIFESTYLE_GRID[0], LIFESTYLE_GRID[-1]))
+    return AllocationConstraints(floor, lifestyle, reasoning)
+
+
+class PortfolioOptimizer:
+    """
+    Mean-variance allocation with frontiers cached per
+    (risk_tolerance, market_conditions, age band).
+
+    Frontiers are solved lazily (all keys of a market condition in one
+    vectorized batch) and reused until the market assumptions change, so a
+    request costs a dictionary lookup and a bilinear interpolation.
+    """
+
+    def __init__(self, assumptions: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None):
+        self.assumptions = {k: {p: dict(v) for p, v in a.items()}
+                            for k, a in (assumptions or DEFAULT_ASSUMPTIONS).items()}
+        self._frontiers: Dict[FrontierKey, EfficientFrontier] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _market_arrays(assumption: Dict[str, Dict[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        mu = np.array([assumption["returns"][b] for b in BUCKETS])
+        vol = np.array([assumption["volatility"][b] for b in BUCKETS])
+        return mu, _covariance(vol)
+
+    def _solve_market(self, market: str,
+                      assumption: Optional[Dict[str, Dict[str, float]]] = None
+                      ) -> Dict[FrontierKey, EfficientFrontier]:
+        """Frontiers of ``market`` under ``assumption`` (its current assumptions by default)"""
+        mu, cov = self._market_arrays(assumption or self.assumptions[market])
+        keys = [(risk, market, band) for risk in RISK_TOLERANCES for band, _ in AGE_BANDS]
+        floors, lifestyles = np.meshgrid(EMERGENCY_FLOOR_GRID, LIFESTYLE_GRID, indexing="ij")
+        cells = floors.size
+        n = len(keys) * cells
+
+        lower = np.tile(LOWER_BOUNDS, (n, 1))
+        upper = np.tile(UPPER_BOUNDS, (n, 1))
+        lower[:, EMERGENCY] = np.tile(floors.ravel(), len(keys))
+        lower[:, LIFESTYLE] = upper[:, LIFESTYLE] = np.tile(lifestyles.ravel(), len(keys))
+        aversion = np.repeat([RISK_AVERSION[r] * AGE_AVERSION[b] for r, _, b in keys], cells)
+
+        weights = solve_mean_variance(np.tile(mu, (n, 1)), np.broadcast_to(cov, (n,) + cov.shape),
+                                      aversion, lower, upper)
+        expected = weights @ mu
+        vol = np.sqrt(np.einsum("ni,ij,nj->n", weights, cov, weights))
+        shape = floors.shape
+        return {
+            key: EfficientFrontier(
+                key,
+                weights[k * cells:(k + 1) * cells].reshape(shape + (len(BUCKETS),)),
+                expected[k * cells:(k + 1) * cells].reshape(shape),
+                vol[k * cells:(k + 1) * cells].reshape(shape),
+            )
+            for k, key in enumerate(keys)
+        }
+
+    def frontier(self, risk_tolerance: str, market: str, band: str) -> EfficientFrontier:
+        key = (risk_tolerance, market, band)
+        frontier = self._frontiers.get(key)
+        if frontier is None:
+            with self._lock:
+                frontier = self._frontiers.get(key)
+                if frontier is None:
+                    start = time.perf_counter()
+                    self._frontiers.update(self._solve_market(market))
+                    logger.info("Solved %s market frontiers in %.1fms",
+                                market, (time.perf_counter() - start) * 1000)
+                    frontier = self._frontiers[key]
+        return frontier
+
+    def precompute(self, markets: Optional[List[str]] = None) -> int:
+        """Solve and cache the frontiers of ``markets`` (all by default)"""
+        for market in markets or list(self.assumptions):
+            assumption = self.assumptions[market]
+            solved = self._solve_market(market, assumption)
+            with self._lock:
+                # Skip if the assumptions changed while solving
+                if self.assumptions[market] is assumption:
+                    self._frontiers.update(solved)
+        return len(self._frontiers)
+
+    def update_assumptions(self, market: str, returns: Optional[Dict[str, float]] = None,
+                           volatility: Optional[Dict[str, float]] = None) -> int:
+        """Replace return/volatility assumptions of a market and re-solve its frontiers"""
+        if market not in self.assumptions:
+            raise ValueError(f"Unknown market condition: {market}")
+        unknown = set(returns or {}) | set(volatility or {})
+        unknown -= set(BUCKETS)
+        if unknown:
+            raise ValueError(f"Unknown allocation buckets: {sorted(unknown)}")
+        values = list((returns or {}).values()) + list((volatility or {}).values())
+        if not all(math.isfinite(v) for v in values):
+            raise ValueError("Returns and volatility must be finite")
+        if any(v < 0 for v in (volatility or {}).values()):
+            raise ValueError("Volatility must be non-negative")
+        assumption = {p: dict(v) for p, v in self.assumptions[market].items()}
+        assumption["returns"].update(returns or {})
+        assumption["volatility"].update(volatility or {})
+        # Solve from the copy so readers keep the old assumptions and
+        # frontiers meanwhile, and a failed solve changes neither
+        solved = self._solve_market(market, assumption)
+        if not all(np.isfinite(f.weights).all() and np.isfinite(f.volatility).all()
+                   and np.isfinite(f.expected_return).all() for f in solved.values()):
+            raise ValueError(f"Assumptions for {market} do not yield finite allocations")
+        with self._lock:
+            self.assumptions[market] = assumption
+            self._frontiers.update(solved)
+        return len(solved)
+
+    def optimize(self, risk_tolerance: str, market: str, age: int,
+                 constraints: AllocationConstraints) -> Dict[str, float]:
+        """Optimal bucket shares (fractions) plus expected return and volatility"""
+        band = age_band(age)
+        weights, expected, vol = self.frontier(risk_tolerance, market, band).lookup(
+            constraints.emergency_floor, constraints.lifestyle
+        )
+        result = dict(zip(BUCKETS, weights.tolist()))
+        result["expected_return"] = expected
+        result["volatility"] = vol
+        return result
+
+
+portfolio_optimizer = PortfolioOptimizer()
@@ -2,12 +2,14 @@
 
 from ..models import risk_model
 
-def calculate_risk_level(features):
+def calculate_risk_level(features, risk_score=None):
     """
     Calculate financial risk level based on features using ML model.
     Returns risk level and insights.
+    Pass ``risk_score`` when the risk model already scored these features.
     """
-    risk_score = risk_model.predict(features)
+    if risk_score is None:
+        risk_score = risk_model.predict(features)
 
     if risk_score > 70:
         risk_level = 'high'
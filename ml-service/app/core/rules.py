@@ -0,0 +1,401 @@
+"""
+CAPSTACK Compiled Rules - Threshold and recommendation lookup tables
+Rule-based categorizations compiled once into sorted breakpoints and precomputed tuples, reloadable from config
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from . import thresholds
+
+logger = logging.getLogger(__name__)
+
+SEVERITY: Dict[str, int] = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+SEVERITY_LABELS: Tuple[str, ...] = tuple(sorted(SEVERITY, key=SEVERITY.get))
+
+# Config keys and the thresholds.py constants providing their defaults
+CONFIG_KEYS: Tuple[str, ...] = (
+    "RISK_THRESHOLDS",
+    "SCORE_THRESHOLDS",
+    "SURVIVAL_THRESHOLDS",
+    "RISK_SCORE_THRESHOLDS",
+    "FRAUD_PROBABILITY_THRESHOLDS",
+    "VOLATILITY_THRESHOLDS",
+    "CRISIS_SURVIVAL_THRESHOLDS",
+    "CRISIS_STRESS_THRESHOLDS",
+    "ANOMALY_SCORE_THRESHOLDS",
+    "SKILL_ALIGNMENT_THRESHOLDS",
+    "AUTOMATION_VULNERABILITY_THRESHOLDS",
+    "RECOMMENDATION_THRESHOLDS",
+    "INDUSTRY_RISKS",
+    "DEFAULT_INDUSTRY_RISK",
+    "EDUCATION_FACTORS",
+    "DEFAULT_EDUCATION_FACTOR",
+    "INDUSTRY_TRENDS",
+    "DEFAULT_INDUSTRY_TREND",
+)
+
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    """
+    Maps a value to a label through sorted breakpoints.
+
+    ``labels[i]`` covers values between ``edges[i-1]`` and ``edges[i]``. With
+    ``side="right"`` a value equal to an edge moves up a label (``>=``
+    semantics); with ``side="left"`` it stays below (``>``).
+    """
+
+    edges: Tuple[float, ...]
+    labels: Tuple[str, ...]
+    side: str = "right"
+    _edges: np.ndarray = field(init=False, repr=False, compare=False)
+    _labels: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.labels) != len(self.edges) + 1:
+            raise ValueError("A rule needs exactly one more label than edges")
+        if any(a >= b for a, b in zip(self.edges, self.edges[1:])):
+            raise ValueError(f"Rule edges must be strictly increasing: {self.edges}")
+        if self.side not in ("left", "right"):
+            raise ValueError(f"Unknown side: {self.side}")
+        object.__setattr__(self, "_edges", np.asarray(self.edges, dtype=np.float64))
+        object.__setattr__(self, "_labels", np.asarray(self.labels))
+
+    @classmethod
+    def from_lower_bounds(cls, bounds: Dict[str, float], base_label: Optional[str] = None,
+                          inclusive: bool = True) -> "ThresholdRule":
+        """
+        Labels earned by reaching a bound (``>=``, or ``>`` if not inclusive).
+
+        Values below every bound get ``base_label``; without one, the label
+        with the lowest bound also covers everything below it.
+        """
+        ordered = sorted(bounds.items(), key=lambda item: item[1])
+        labels = [label for label, _ in ordered]
+        edges = [bound for _, bound in ordered]
+        if base_label is None:
+            edges = edges[1:]
+        else:
+            labels.insert(0, base_label)
+        return cls(tuple(edges), tuple(labels), "right" if inclusive else "left")
+
+    @classmethod
+    def from_upper_bounds(cls, bounds: Dict[str, float], top_label: Optional[str] = None,
+                          inclusive: bool = False) -> "ThresholdRule":
+        """
+        Labels for values below a bound (``<``, or ``<=`` if inclusive).
+
+        Values above every bound get ``top_label``; without one, the label
+        with the highest bound also covers everything above it.
+        """
+        ordered = sorted(bounds.items(), key=lambda item: item[1])
+        labels = [label for label, _ in ordered]
+        edges = [bound for _, bound in ordered]
+        if top_label is None:
+            edges = edges[:-1]
+        else:
+            labels.append(top_label)
+        return cls(tuple(edges), tuple(labels), "left" if inclusive else "right")
+
+    def index(self, value: float) -> int:
+        if self.side == "right":
+            return bisect_right(self.edges, value)
+        return bisect_left(self.edges, value)
+
+    def classify(self, value: float) -> str:
+        return self.labels[self.index(value)]
+
+    def index_batch(self, values: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        return np.searchsorted(self._edges, np.asarray(values, dtype=np.float64), side=self.side)
+
+    def classify_batch(self, values: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        return self._labels[self.index_batch(values)]
+
+
+@dataclass(frozen=True)
+class CategoryTable:
+    """Categorical lookup with a default, for scalars or arrays of keys"""
+
+    values: Dict[str, Any]
+    default: Any
+
+    def get(self, key: str) -> Any:
+        return self.values.get(key, self.default)
+
+    def get_batch(self, keys: Union[Sequence[str], np.ndarray]) -> np.ndarray:
+        unique, inverse = np.unique(np.asarray(keys), return_inverse=True)
+        return np.asarray([self.get(k) for k in unique.tolist()])[inverse]
+
+
+class RecommendationTable:
+    """
+    Recommendation tuples precomputed for every (level, flag...) combination.
+
+    ``builder(level, *flags)`` is evaluated once per combination at compile
+    time; lookups then index a flat table by ``level * 2**n_flags + bits``.
+    """
+
+    def __init__(self, levels: Sequence[str], n_flags: int,
+                 builder: Callable[..., List[str]]):
+        self.levels = tuple(levels)
+        self.n_flags = n_flags
+        self._level_index = {level: i for i, level in enumerate(self.levels)}
+        self._table = np.empty(len(self.levels) << n_flags, dtype=object)
+        for i, level in enumerate(self.levels):
+            for bits in range(1 << n_flags):
+                flags = [bool(bits >> (n_flags - 1 - k) & 1) for k in range(n_flags)]
+                self._table[(i << n_flags) | bits] = tuple(builder(level, *flags))
+
+    def lookup(self, level: str, *flags: bool) -> Tuple[str, ...]:
+        code = self._level_index[level]
+        for flag in flags:
+            code = (code << 1) | bool(flag)
+        return self._table[code]
+
+
+def _fraud_recommendations(risk_level: str, high_amount: bool, unusual_location: bool,
+                           device_mismatch: bool) -> List[str]:
+    recommendations = []
+    if risk_level in ["critical", "high"]:
+        recommendations.append("Block transaction and require additional verification")
+        recommendations.append("Contact customer immediately for verification")
+    if high_amount:
+        recommendations.append("Implement additional verification for high-value transactions")
+    if unusual_location:
+        recommendations.append("Verify customer location and travel plans")
+    if device_mismatch:
+        recommendations.append("Require device re-authentication")
+    if risk_level == "medium":
+        recommendations.append("Monitor for additional suspicious activity")
+    return recommendations
+
+
+def _crisis_recommendations(risk_level: str, low_survival: bool, high_debt: bool) -> List[str]:
+    recommendations = []
+    if low_survival:
+        recommendations.append("URGENT: Build emergency fund to cover 6+ months of expenses")
+        recommendations.append("Consider income protection insurance")
+    if high_debt:
+        recommendations.append("Create aggressive debt reduction plan")
+        recommendations.append("Consider debt consolidation options")
+    if risk_level in ["critical", "high"]:
+        recommendations.append("Diversify income sources")
+        recommendations.append("Update skills to improve employability")
+        recommendations.append("Review and cut non-essential expenses")
+    if risk_level == "medium":
+        recommendations.append("Increase emergency fund contributions")
+        recommendations.append("Review investment portfolio for risk management")
+    return recommendations
+
+
+def _volatility_recommendations(risk_level: str, high_layoff_risk: bool,
+                                high_volatility: bool) -> List[str]:
+    recommendations = []
+    if risk_level == "high":
+        recommendations.append("Build larger emergency fund (9-12 months)")
+        recommendations.append("Develop additional income streams")
+        recommendations.append("Update skills for better job security")
+    if high_layoff_risk:
+        recommendations.append("Start networking and job market research")
+        recommendations.append("Consider freelance or part-time work")
+    if high_volatility:
+        recommendations.append("Create strict budget and expense tracking")
+        recommendations.append("Avoid large financial commitments during high volatility")
+    return recommendations
+
+
+def _check_order(name: str, rule: ThresholdRule, order: Sequence[str]):
+    """Reject configs whose bounds would put the labels out of order"""
+    expected = [label for label in order if label in rule.labels]
+    if list(rule.labels) != expected:
+        raise ValueError(f"{name} bounds put labels out of order: {list(rule.labels)}")
+
+
+class CompiledRules:
+    """All rule-based categorizations and recommendation tables of one config"""
+
+    def __init__(self, config: Dict[str, Any], source: str = "defaults"):
+        self.config = config
+        self.source = source
+        self.loaded_at = time.time()
+
+        self.score_category = ThresholdRule.from_lower_bounds(config["SCORE_THRESHOLDS"])
+        self.survival_category = ThresholdRule.from_upper_bounds(config["SURVIVAL_THRESHOLDS"])
+        self.risk_level = ThresholdRule.from_upper_bounds(
+            config["RISK_SCORE_THRESHOLDS"], top_label="high"
+        )
+        self.fraud_risk_level = ThresholdRule.from_lower_bounds(
+            config["FRAUD_PROBABILITY_THRESHOLDS"], base_label="low", inclusive=False
+        )
+        self.volatility_risk_level = ThresholdRule.from_lower_bounds(
+            config["VOLATILITY_THRESHOLDS"], base_label="low", inclusive=False
+        )
+        self.crisis_survival_level = ThresholdRule.from_upper_bounds(
+            config["CRISIS_SURVIVAL_THRESHOLDS"], top_label="low"
+        )
+        self.crisis_stress_level = ThresholdRule.from_lower_bounds(
+            config["CRISIS_STRESS_THRESHOLDS"], base_label="low", inclusive=False
+        )
+        self.anomaly_risk_level = ThresholdRule.from_lower_bounds(
+            config["ANOMALY_SCORE_THRESHOLDS"], base_label="low", inclusive=False
+        )
+        self.skill_alignment = ThresholdRule.from_lower_bounds(
+            config["SKILL_ALIGNMENT_THRESHOLDS"], base_label="low", inclusive=False
+        )
+        self.automation_vulnerability = ThresholdRule.from_lower_bounds(
+            config["AUTOMATION_VULNERABILITY_THRESHOLDS"], base_label="low", inclusive=False
+        )
+        _check_order("SCORE_THRESHOLDS", self.score_category, ("poor", "fair", "good", "excellent"))
+        _check_order("SURVIVAL_THRESHOLDS", self.survival_category, ("critical", "low", "adequate", "good"))
+        _check_order("CRISIS_SURVIVAL_THRESHOLDS", self.crisis_survival_level, SEVERITY_LABELS[::-1])
+        for name, rule in (
+            ("RISK_SCORE_THRESHOLDS", self.risk_level),
+            ("FRAUD_PROBABILITY_THRESHOLDS", self.fraud_risk_level),
+            ("VOLATILITY_THRESHOLDS", self.volatility_risk_level),
+            ("CRISIS_STRESS_THRESHOLDS", self.crisis_stress_level),
+            ("ANOMALY_SCORE_THRESHOLDS", self.anomaly_risk_level),
+            ("SKILL_ALIGNMENT_THRESHOLDS", self.skill_alignment),
+            ("AUTOMATION_VULNERABILITY_THRESHOLDS", self.automation_vulnerability),
+        ):
+            _check_order(name, rule, SEVERITY_LABELS)
+        self.industry_risk = CategoryTable(config["INDUSTRY_RISKS"], config["DEFAULT_INDUSTRY_RISK"])
+        self.education_factor = CategoryTable(
+            config["EDUCATION_FACTORS"], config["DEFAULT_EDUCATION_FACTOR"]
+        )
+        self.industry_trend = CategoryTable(config["INDUSTRY_TRENDS"], config["DEFAULT_INDUSTRY_TREND"])
+
+        cutoffs = config["RECOMMENDATION_THRESHOLDS"]
+        self.crisis_low_survival_months = cutoffs["crisis_low_survival_months"]
+        self.crisis_high_debt_to_income = cutoffs["crisis_high_debt_to_income"]
+        self.volatility_high_layoff_risk = cutoffs["volatility_high_layoff_risk"]
+        self.volatility_high_score = cutoffs["volatility_high_score"]
+        self.fraud_recommendations = RecommendationTable(
+            self.fraud_risk_level.labels, 3, _fraud_recommendations
+        )
+        self.crisis_recommendations = RecommendationTable(SEVERITY_LABELS, 2, _crisis_recommendations)
+        self.volatility_recommendations = RecommendationTable(
+            self.volatility_risk_level.labels, 2, _volatility_recommendations
+        )
+
+    def crisis_level(self, survival_months: float, financial_stress: float) -> str:
+        """Worse of the survival-months and financial-stress levels"""
+        return max(
+            self.crisis_survival_level.classify(survival_months),
+            self.crisis_stress_level.classify(financial_stress),
+            key=SEVERITY.get,
+        )
+
+    def crisis_level_batch(self, survival_months, financial_stress) -> np.ndarray:
+        severity = np.vectorize(SEVERITY.get, otypes=[np.int64])
+        worst = np.maximum(
+            severity(self.crisis_survival_level.classify_batch(survival_months)),
+            severity(self.crisis_stress_level.classify_batch(financial_stress)),
+        )
+        return np.asarray(SEVERITY_LABELS)[worst]
+
+    def fraud_recommendations_for(self, risk_level: str, risk_factors: Dict[str, bool]) -> Tuple[str, ...]:
+        return self.fraud_recommendations.lookup(
+            risk_level,
+            risk_factors.get("high_amount", False),
+            risk_factors.get("unusual_location", False),
+            risk_factors.get("device_mismatch", False),
+        )
+
+    def crisis_recommendations_for(self, risk_level: str, survival_months: float,
+                                   debt_to_income: float) -> Tuple[str, ...]:
+        return self.crisis_recommendations.lookup(
+            risk_level,
+            survival_months < self.crisis_low_survival_months,
+            debt_to_income > self.crisis_high_debt_to_income,
+        )
+
+    def volatility_recommendations_for(self, risk_level: str, layoff_risk: float,
+                                       volatility_score: float) -> Tuple[str, ...]:
+        return self.volatility_recommendations.lookup(
+            risk_level,
+            layoff_risk > self.volatility_high_layoff_risk,
+            volatility_score > self.volatility_high_score,
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "rules": {
+                name: {"edges": list(rule.edges), "labels": list(rule.labels), "side": rule.side}
+                for name, rule in vars(self).items()
+                if isinstance(rule, ThresholdRule)
+            },
+        }
+
+
+def default_config() -> Dict[str, Any]:
+    return {key: copy.deepcopy(getattr(thresholds, key)) for key in CONFIG_KEYS}
+
+
+def load_config(path: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+    """
+    Defaults from thresholds.py overlaid with a JSON file, if any.
+
+    The file (``path`` or RULES_CONFIG_PATH) holds any subset of CONFIG_KEYS;
+    dict-valued entries are merged key by key into the defaults.
+    """
+    config = default_config()
+    path = path or os.getenv("RULES_CONFIG_PATH")
+    if not path:
+        return config, "defaults"
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    unknown = set(overrides) - set(CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown rule config keys: {sorted(unknown)}")
+    for key, value in overrides.items():
+        if isinstance(config[key], dict) and isinstance(value, dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    return config, path
+
+
+_rules: Optional[CompiledRules] = None
+_rules_lock = threading.Lock()
+
+
+def get_rules() -> CompiledRules:
+    """The active compiled rules, compiled from config on first use"""
+    rules = _rules
+    if rules is None:
+        with _rules_lock:
+            if _rules is None:
+                _swap(CompiledRules(*load_config()))
+            rules = _rules
+    return rules
+
+
+def _swap(rules: CompiledRules):
+    global _rules
+    _rules = rules
+
+
+def reload_rules(path: Optional[str] = None) -> CompiledRules:
+    """
+    Recompile the rules from config and swap them in atomically.
+
+    Invalid config raises and leaves the active rules untouched; requests in
+    flight keep the rules object they already hold.
+    """
+    rules = CompiledRules(*load_config(path))
+    with _rules_lock:
+        _swap(rules)
+    logger.info("Rules reloaded from %s", rules.source)
+    return rules
@@ -1,13 +1,24 @@
 # Financial health score calculator using ML model
 
+import numpy as np
+
 from ..models import risk_model
 
-def calculate_health_score(features):
+def calculate_health_score(features, risk_score=None):
     """
     Calculate financial health score (0-100) using ML model.
+    Pass ``risk_score`` when the risk model already scored these features.
     """
     # Use risk model to get score, then invert for health score
     # Lower risk = higher health score
-    risk_score = risk_model.predict(features)
+    if risk_score is None:
+        risk_score = risk_model.predict(features)
     health_score = 100 - risk_score
-    return max(0, min(100, health_score))
\ No newline at end of file
+    return max(0, min(100, health_score))
+
+def calculate_health_scores(columns):
+    """
+    Health scores (0-100) for columns of users with one risk model call.
+    """
+    risk_scores = risk_model.predict_batch(columns)
+    return np.clip(100 - risk_scores, 0, 100)
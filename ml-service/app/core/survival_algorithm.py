@@ -1,6 +1,8 @@
 # TODO: Implement survival algorithm
 # Predict months of financial survival in emergency
 
+import numpy as np
+
 def predict_survival_months(emergency_fund, monthly_expenses, income_stability):
     """
     Predict how many months user can survive financially.
@@ -12,4 +14,16 @@ def predict_survival_months(emergency_fund, monthly_expenses, income_stability):
         # Adjust based on income stability (0-1 scale)
         adjusted_months = months * (0.5 + income_stability * 0.5)
         return min(adjusted_months, 24)  # Cap at 2 years
-    return 0
\ No newline at end of file
+    return 0
+
+def predict_survival_months_batch(emergency_fund, monthly_expenses, income_stability):
+    """
+    Vectorized predict_survival_months for arrays of users.
+    """
+    emergency_fund = np.asarray(emergency_fund, dtype=np.float64)
+    monthly_expenses = np.asarray(monthly_expenses, dtype=np.float64)
+    income_stability = np.asarray(income_stability, dtype=np.float64)
+    covered = (emergency_fund > 0) & (monthly_expenses > 0)
+    months = emergency_fund / np.where(covered, monthly_expenses, 1.0)
+    adjusted_months = months * (0.5 + income_stability * 0.5)
+    return np.where(covered, np.minimum(adjusted_months, 24), 0.0)
@@ -19,4 +19,92 @@ SURVIVAL_THRESHOLDS = {
     'low': 3,       # 1-3 months
     'adequate': 6,  # 3-6 months
     'good': 12      # 6+ months
-}
\ No newline at end of file
+}
+
+# Risk score (0-100) upper bounds; scores of 70 and above are high
+RISK_SCORE_THRESHOLDS = {
+    'low': 30,
+    'medium': 70
+}
+
+# Lower bounds (exclusive): a value above the bound earns that level
+FRAUD_PROBABILITY_THRESHOLDS = {
+    'medium': 0.3,
+    'high': 0.6,
+    'critical': 0.8
+}
+
+VOLATILITY_THRESHOLDS = {
+    'medium': 0.25,
+    'high': 0.4
+}
+
+# Crisis risk is the worse of the survival-months and financial-stress levels
+CRISIS_SURVIVAL_THRESHOLDS = {
+    'critical': 3,  # Less than 3 months
+    'high': 6,
+    'medium': 9
+}
+
+CRISIS_STRESS_THRESHOLDS = {
+    'medium': 0.4,
+    'high': 0.6,
+    'critical': 0.8
+}
+
+# Financial-health anomaly score: rule hits * 0.2 + stress * 0.3
+ANOMALY_SCORE_THRESHOLDS = {
+    'medium': 0.3,
+    'high': 0.6,
+    'critical': 0.8
+}
+
+SKILL_ALIGNMENT_THRESHOLDS = {
+    'medium': 0.6,
+    'high': 0.8
+}
+
+AUTOMATION_VULNERABILITY_THRESHOLDS = {
+    'medium': 0.3,
+    'high': 0.6
+}
+
+# Cut-offs for the conditional recommendation lines
+RECOMMENDATION_THRESHOLDS = {
+    'crisis_low_survival_months': 3,
+    'crisis_high_debt_to_income': 0.4,
+    'volatility_high_layoff_risk': 0.3,
+    'volatility_high_score': 0.3
+}
+
+INDUSTRY_RISKS = {
+    'technology': 0.35,
+    'healthcare': 0.15,
+    'finance': 0.25,
+    'manufacturing': 0.30,
+    'retail': 0.40,
+    'education': 0.10,
+    'government': 0.05,
+    'gig_economy': 0.60
+}
+DEFAULT_INDUSTRY_RISK = 0.25
+
+EDUCATION_FACTORS = {
+    'high_school': 0.7,
+    'bachelors': 0.8,
+    'masters': 0.9,
+    'phd': 0.95
+}
+DEFAULT_EDUCATION_FACTOR = 0.8
+
+INDUSTRY_TRENDS = {
+    'technology': {'growth': 0.12, 'automation_risk': 0.4, 'future_outlook': 'strong'},
+    'healthcare': {'growth': 0.08, 'automation_risk': 0.3, 'future_outlook': 'stable'},
+    'finance': {'growth': 0.06, 'automation_risk': 0.6, 'future_outlook': 'moderate'},
+    'manufacturing': {'growth': 0.04, 'automation_risk': 0.8, 'future_outlook': 'declining'},
+    'retail': {'growth': 0.03, 'automation_risk': 0.7, 'future_outlook': 'challenging'},
+    'education': {'growth': 0.05, 'automation_risk': 0.2, 'future_outlook': 'stable'},
+    'government': {'growth': 0.02, 'automation_risk': 0.1, 'future_outlook': 'very_stable'},
+    'gig_economy': {'growth': 0.15, 'automation_risk': 0.5, 'future_outlook': 'volatile'}
+}
+DEFAULT_INDUSTRY_TREND = {'growth': 0.05, 'automation_risk': 0.5, 'future_outlook': 'moderate'}
@@ -0,0 +1,190 @@
+"""
+CAPSTACK What-If Simulation - Monte Carlo net worth projections
+Vectorized yearly paths under job-loss, raise, expense and market scenarios, run in chunks with refinable percentile bands
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import numpy as np
+
+# Annual portfolio return (mean, volatility) by risk tolerance
+RETURN_ASSUMPTIONS: Dict[str, tuple] = {
+    "low": (0.04, 0.06),
+    "medium": (0.06, 0.12),
+    "high": (0.08, 0.18),
+}
+INCOME_GROWTH = 0.03
+EXPENSE_INFLATION = 0.025
+DEBT_RATE = 0.07
+PERCENTILES = (5, 25, 50, 75, 95)
+# Chunks double from FIRST_CHUNK so the first bands are ready in milliseconds
+FIRST_CHUNK = 1000
+
+SCENARIO_FIELDS: Dict[str, Dict[str, tuple]] = {
+    "job_loss": {"probability": (0.0, 1.0), "duration_months": (0.0, 12.0)},
+    "raise": {"percentage": (0.0, 1.0), "probability": (0.0, 1.0)},
+    "expense_increase": {"percentage": (0.0, 1.0), "probability": (0.0, 1.0)},
+    "investment_return": {"mean": (-0.5, 0.5), "volatility": (0.0, 1.0)},
+}
+
+
+def validate_scenarios(scenarios: Mapping[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Scenario parameters as floats, raising ValueError on unknown or out-of-range ones"""
+    validated = {}
+    for name, params in scenarios.items():
+        if name not in SCENARIO_FIELDS:
+            raise ValueError(f"Unknown scenario: {name}")
+        if not isinstance(params, Mapping):
+            raise ValueError(f"Scenario {name} must be an object of parameters")
+        validated[name] = {}
+        for field, value in params.items():
+            if field not in SCENARIO_FIELDS[name]:
+                raise ValueError(f"Unknown parameter {field} of scenario {name}")
+            low, high = SCENARIO_FIELDS[name][field]
+            value = float(value)
+            if not low <= value <= high:
+                raise ValueError(f"{name}.{field} must be within [{low}, {high}]")
+            validated[name][field] = value
+    return validated
+
+
+class WhatIfSimulation:
+    """
+    Monte Carlo projection of one household's net worth.
+
+    Each path steps yearly: income grows (plus a chance of a raise) and may
+    lose months to a job loss, expenses inflate (plus a chance of a jump),
+    savings earn a normally distributed return and positive cash flow pays
+    down debt first. Paths are simulated in chunks; ``partial()`` gives the
+    percentile bands over the paths done so far, which converge to the final
+    ones as chunks complete.
+    """
+
+    def __init__(self, monthly_income: float, monthly_expenses: float, savings: float,
+                 debt: float, risk_tolerance: str, scenarios: Optional[Mapping[str, Any]] = None,
+                 years: int = 10, simulations: int = 1000, seed: Optional[int] = None):
+        self.income = float(monthly_income) * 12
+        self.expenses = float(monthly_expenses) * 12
+        self.savings = float(savings)
+        self.debt = float(debt)
+        self.scenarios = validate_scenarios(scenarios or {})
+        mean, volatility = RETURN_ASSUMPTIONS[risk_tolerance]
+        market = self.scenarios.get("investment_return", {})
+        self.return_mean = market.get("mean", mean)
+        self.return_volatility = market.get("volatility", volatility)
+        self.years = int(years)
+        self.simulations = int(simulations)
+        self._rng = np.random.default_rng(seed)
+        # Net worth per completed path and year, float32 to bound memory
+        self._net_worth: List[np.ndarray] = []
+        self._solvent: List[np.ndarray] = []
+        self.completed = 0
+
+    def _chance(self, scenario: str, n: int) -> np.ndarray:
+        probability = self.scenarios.get(scenario, {}).get("probability", 0.0)
+        if probability <= 0:
+            return np.zeros(n, dtype=bool)
+        return self._rng.random(n) < probability
+
+    def _simulate(self, n: int):
+        raise_pct = self.scenarios.get("raise", {}).get("percentage", 0.0)
+        jump_pct = self.scenarios.get("expense_increase", {}).get("percentage", 0.0)
+        loss_months = self.scenarios.get("job_loss", {}).get("duration_months", 0.0)
+
+        income = np.full(n, self.income)
+        expenses = np.full(n, self.expenses)
+        savings = np.full(n, self.savings)
+        debt = np.full(n, self.debt)
+        solvent = np.ones(n, dtype=bool)
+        net_worth = np.empty((n, self.years), dtype=np.float32)
+        for year in range(self.years):
+            if year:
+                income *= 1 + INCOME_GROWTH + raise_pct * self._chance("raise", n)
+                expenses *= 1 + EXPENSE_INFLATION + jump_pct * self._chance("expense_increase", n)
+            earned = income * (1 - loss_months / 12 * self._chance("job_loss", n))
+            returns = self._rng.normal(self.return_mean, self.return_volatility, n)
+            # Only invested savings earn the market return; overdrafts cost the debt rate
+            savings = np.where(savings > 0, savings * (1 + returns), savings * (1 + DEBT_RATE))
+            debt = debt * (1 + DEBT_RATE)
+            cash_flow = earned - expenses
+            payment = np.clip(cash_flow, 0.0, debt)
+            debt -= payment
+            savings += cash_flow - payment
+            solvent &= savings >= 0
+            net_worth[:, year] = savings - debt
+        return net_worth, solvent
+
+    def step(self, n: int) -> int:
+        """Simulate up to ``n`` more paths; returns how many were added"""
+        n = min(n, self.simulations - self.completed)
+        if n > 0:
+            net_worth, solvent = self._simulate(n)
+            self._net_worth.append(net_worth)
+            self._solvent.append(solvent)
+            self.completed += n
+        return n
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.simulations
+
+    def run(self, chunk_size: int = 0, on_chunk: Optional[Callable[["WhatIfSimulation"], None]] = None):
+        """Simulate the remaining paths in doubling chunks capped at ``chunk_size``"""
+        size = min(FIRST_CHUNK, chunk_size) if chunk_size else FIRST_CHUNK
+        while not self.done:
+            self.step(size)
+            if on_chunk is not None:
+                on_chunk(self)
+            size = min(size * 2, chunk_size) if chunk_size else size * 2
+        return self.result()
+
+    def _paths(self) -> np.ndarray:
+        if len(self._net_worth) > 1:
+            self._net_worth = [np.concatenate(self._net_worth)]
+            self._solvent = [np.concatenate(self._solvent)]
+        return self._net_worth[0]
+
+    def partial(self) -> Dict[str, Any]:
+        """Percentile bands and survival probability over the completed paths"""
+        net_worth = self._paths()
+        bands = np.percentile(net_worth, PERCENTILES, axis=0)
+        return {
+            "completed_simulations": self.completed,
+            "total_simulations": self.simulations,
+            "net_worth_projection": [
+                {"year": float(year + 1),
+                 **{f"p{p}": round(float(band[year]), 2) for p, band in zip(PERCENTILES, bands)}}
+                for year in range(self.years)
+            ],
+            "survival_probability": round(float(self._solvent[0].mean()), 4),
+        }
+
+    def result(self) -> Dict[str, Any]:
+        """Final projection in the shape of WhatIfSimulationResponse"""
+        summary = self.partial()
+        final = self._paths()[:, -1].astype(np.float64)
+        return {
+            "net_worth_projection": summary["net_worth_projection"],
+            "survival_probability": summary["survival_probability"],
+            "average_net_worth": round(float(final.mean()), 2),
+            "median_net_worth": round(float(np.median(final)), 2),
+            "worst_case_net_worth": round(float(np.percentile(final, PERCENTILES[0])), 2),
+            "best_case_net_worth": round(float(np.percentile(final, PERCENTILES[-1])), 2),
+            "recommendations": what_if_recommendations(
+                summary["survival_probability"], float(np.median(final)), self.savings - self.debt
+            ),
+        }
+
+
+def what_if_recommendations(survival_probability: float, median_net_worth: float,
+                            current_net_worth: float) -> List[str]:
+    recommendations = []
+    if survival_probability < 0.8:
+        recommendations.append("Build an emergency fund: savings run out in "
+                               f"{math.ceil((1 - survival_probability) * 100)}% of scenarios")
+    if median_net_worth < current_net_worth:
+        recommendations.append("Reduce expenses or debt: median net worth declines over the horizon")
+    if survival_probability >= 0.95 and median_net_worth > current_net_worth:
+        recommendations.append("Plan is resilient across scenarios; consider raising investment contributions")
+    return recommendations or ["Review scenario assumptions regularly as circumstances change"]
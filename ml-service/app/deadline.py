@@ -0,0 +1,190 @@
+"""
+CAPSTACK ML Deadlines - Latency budgets for model inference
+Serves the rule-based answer when inference would miss the request's budget or the inference pool is saturated
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, List, Optional, Tuple
+
+from .metrics import INFERENCE_FALLBACKS
+
+logger = logging.getLogger(__name__)
+
+# Request header overriding INFERENCE_BUDGET_MS for a single request
+DEADLINE_HEADER = b"x-deadline-ms"
+DEGRADED_HEADER = b"x-degraded"
+
+# Absolute perf_counter deadline of the request being served, None when unbounded
+_deadline: contextvars.ContextVar = contextvars.ContextVar("inference_deadline", default=None)
+# Budget the deadline was started from, 0 when unbounded
+_budget_ms: contextvars.ContextVar = contextvars.ContextVar("inference_budget_ms", default=0.0)
+# Fallback reasons recorded while serving the request; shared with the
+# worker threads its handler runs in, which receive a copy of the context
+_degraded: contextvars.ContextVar = contextvars.ContextVar("degraded_reasons", default=None)
+
+
+def inference_budget_ms() -> float:
+    """Default request budget from INFERENCE_BUDGET_MS (0 disables deadlines)"""
+    return max(float(os.getenv("INFERENCE_BUDGET_MS", "0")), 0.0)
+
+
+def _request_budget_ms(scope) -> float:
+    for name, value in scope["headers"]:
+        if name == DEADLINE_HEADER:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                break
+    return inference_budget_ms()
+
+
+def request_budget_ms() -> float:
+    """Budget of the current request in milliseconds, 0 without a deadline"""
+    return _budget_ms.get()
+
+
+def degraded_reasons() -> Optional[List[str]]:
+    """Fallback reasons recorded so far for the current request, None without a deadline"""
+    return _degraded.get()
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left before the current request's deadline, None without one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.perf_counter()
+
+
+def is_degraded() -> bool:
+    """Whether any model answer of the current request came from the rules"""
+    return bool(_degraded.get())
+
+
+class InferenceGate:
+    """
+    Runs model inference against the current request's deadline.
+
+    Inference is submitted to a small dedicated pool and awaited for the
+    time the request has left, which already includes its wait for a
+    handler thread. The rule-based fallback is returned instead when the
+    deadline has passed, when the pool has ``max_pending`` calls in flight,
+    or when inference does not finish in time; an abandoned call finishes
+    in the background and keeps counting as pending, so a slow model sheds
+    load instead of queueing it. Without a deadline the model is called
+    inline exactly as before.
+    """
+
+    def __init__(self, max_workers: int = 0, max_pending: int = 0):
+        self.max_workers = max_workers or int(
+            os.getenv("INFERENCE_WORKERS", str(min(os.cpu_count() or 1, 8)))
+        )
+        self.max_pending = max_pending or int(
+            os.getenv("INFERENCE_MAX_PENDING", str(self.max_workers * 2))
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="inference"
+                    )
+        return self._executor
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def _degrade(self, model: str, reason: str, fallback: Callable, args) -> Tuple[Any, bool]:
+        INFERENCE_FALLBACKS.labels(model, reason).inc()
+        reasons = _degraded.get()
+        if reasons is not None:
+            reasons.append(f"{model}:{reason}")
+        logger.debug("Serving rule-based %s answer: %s", model, reason)
+        return fallback(*args), True
+
+    def call(self, model: str, predict: Callable, fallback: Callable, *args) -> Tuple[Any, bool]:
+        """
+        ``predict(*args)`` within the request deadline, else ``fallback(*args)``.
+
+        Returns the answer and whether it is the degraded fallback.
+        """
+        remaining = remaining_seconds()
+        if remaining is None:
+            return predict(*args), False
+        if remaining <= 0:
+            return self._degrade(model, "deadline", fallback, args)
+        with self._lock:
+            saturated = self._pending >= self.max_pending
+            if not saturated:
+                self._pending += 1
+        if saturated:
+            return self._degrade(model, "saturated", fallback, args)
+        future = self._pool().submit(contextvars.copy_context().run, predict, *args)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=remaining), False
+        except FutureTimeout:
+            return self._degrade(model, "timeout", fallback, args)
+
+    def predict(self, model: str, estimator, data) -> Tuple[Any, bool]:
+        """``estimator.predict(data)`` within the deadline, else its rule-based ``fallback``"""
+        if not estimator.is_trained:
+            # Untrained models answer from the rules anyway
+            return estimator.fallback(data), False
+        return self.call(model, estimator.predict, estimator.fallback, data)
+
+
+inference_gate = InferenceGate()
+
+
+class DeadlineMiddleware:
+    """
+    Pure ASGI middleware starting each request's inference deadline.
+
+    The budget is ``X-Deadline-Ms`` when sent, else INFERENCE_BUDGET_MS,
+    counted from the moment the request arrives. Responses containing a
+    rule-based fallback get an ``X-Degraded`` header naming the models and
+    reasons.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget_ms = _request_budget_ms(scope)
+        if budget_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        reasons: List[str] = []
+        deadline_token = _deadline.set(time.perf_counter() + budget_ms / 1000)
+        budget_token = _budget_ms.set(budget_ms)
+        degraded_token = _degraded.set(reasons)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and reasons:
+                headers = list(message.get("headers", []))
+                headers.append((DEGRADED_HEADER, ",".join(reasons).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _deadline.reset(deadline_token)
+            _budget_ms.reset(budget_token)
+            _degraded.reset(degraded_token)
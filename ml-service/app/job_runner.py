@@ -0,0 +1,367 @@
+"""
+CAPSTACK ML Job Runner - Out-of-process training and generation jobs
+Runs CPU-heavy jobs in niced, CPU-pinned child processes with progress, cancellation and persisted job records
+"""
+
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .metrics import TRAINING_JOBS, TRAINING_JOBS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+# Thread pools of the numeric libraries, sized before they are imported in the child
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                   "LOKY_MAX_CPU_COUNT")
+
+
+class JobNotFound(KeyError):
+    """No job with the given id"""
+
+
+class JobFinished(RuntimeError):
+    """The job has already finished and cannot be cancelled"""
+
+
+def parse_cpu_list(value: str) -> Set[int]:
+    """CPU set from a list like ``2-3,6``"""
+    cpus: Set[int] = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+@dataclass
+class JobLimits:
+    """Scheduling limits applied to each job process"""
+
+    nice: int = 10
+    cpus: Optional[Set[int]] = None
+    threads: int = 1
+
+    @classmethod
+    def from_env(cls) -> "JobLimits":
+        """Limits from JOB_NICE, JOB_CPU_AFFINITY and JOB_THREADS"""
+        affinity = os.getenv("JOB_CPU_AFFINITY", "")
+        cpus = parse_cpu_list(affinity) if affinity else None
+        # Leave at least half of the machine to serving unless pinned elsewhere
+        default_threads = len(cpus) if cpus else max(1, (os.cpu_count() or 1) // 2)
+        return cls(
+            nice=int(os.getenv("JOB_NICE", "10")),
+            cpus=cpus,
+            threads=max(int(os.getenv("JOB_THREADS", str(default_threads))), 1),
+        )
+
+
+def _apply_limits(limits: JobLimits):
+    """Lower this process's priority and confine it to its CPUs (in the child)"""
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(limits.threads)
+    if limits.nice:
+        os.nice(limits.nice)
+    if hasattr(os, "sched_setscheduler"):
+        try:
+            # Batch policy: never preempts interactive threads on wakeup
+            os.sched_setscheduler(0, os.SCHED_BATCH, os.sched_param(0))
+        except OSError:
+            pass
+    if limits.cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, limits.cpus)
+        except OSError as e:
+            logger.warning("Could not pin job to CPUs %s: %s", sorted(limits.cpus), str(e))
+
+
+def _child_main(target: str, job_id: str, params: Dict[str, Any], conn, limits: JobLimits):
+    """Job process entry point; reports progress, the result or the error over ``conn``"""
+    logging.basicConfig(level=logging.INFO)
+    _apply_limits(limits)
+
+    def progress(fraction: float, message: str = ""):
+        conn.send(("progress", float(fraction), message))
+
+    try:
+        module_name, _, func_name = target.partition(":")
+        func = getattr(importlib.import_module(module_name), func_name)
+        result = func(progress, job_id=job_id, **params)
+        conn.send(("result", result))
+    except BaseException as e:  # pylint: disable=broad-except
+        conn.send(("error", f"{type(e).__name__}: {e}", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+@dataclass
+class Job:
+    """Record of one job, as returned by the jobs API"""
+
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobRunner:
+    """
+    Runs registered jobs one process each, ``max_concurrent`` at a time.
+
+    Job processes are spawned (not forked from the threaded server) with a
+    raised nice value, the batch scheduling policy, optional CPU affinity
+    and capped library thread pools, so training competes with request
+    handling only for the CPUs it is given. Each job is watched by a thread
+    that applies its progress messages; ``on_success`` callbacks run there
+    with the job result (e.g. to reload published models) before the job
+    is reported as succeeded. Records are saved
+    under ``job_dir`` and jobs interrupted by a restart are marked failed.
+    """
+
+    def __init__(self, jobs: Dict[str, Callable[..., Dict[str, Any]]], job_dir: str = "",
+                 max_concurrent: int = 0, limits: Optional[JobLimits] = None):
+        self.jobs = {kind: f"{func.__module__}:{func.__name__}" for kind, func in jobs.items()}
+        self.job_dir = Path(job_dir or os.getenv("JOB_DIR", "app/models/jobs"))
+        self.max_concurrent = max_concurrent or int(os.getenv("JOB_MAX_CONCURRENT", "1"))
+        self.limits = limits or JobLimits.from_env()
+        self._jobs: Dict[str, Job] = {}
+        self._queue: List[str] = []
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._monitors: Dict[str, threading.Thread] = {}
+        self._callbacks: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._cancel_requested: Set[str] = set()
+        self._lock = threading.RLock()
+        self._context = multiprocessing.get_context("spawn")
+        self._loaded = False
+        self._closed = False
+
+    def _load(self):
+        """Read persisted records on first use (lock held)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.job_dir.is_dir():
+            return
+        for path in sorted(self.job_dir.glob("*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    job = Job(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("Skipping unreadable job record %s: %s", path, str(e))
+                continue
+            if not job.finished:
+                job.status = "failed"
+                job.error = "Interrupted by a service restart"
+                job.finished_at = job.finished_at or time.time()
+                self._save(job)
+            self._jobs[job.id] = job
+
+    def _save(self, job: Job):
+        from .model_registry import publish_manifest
+
+        try:
+            publish_manifest(job.to_dict(), self.job_dir / f"{job.id}.json")
+        except (OSError, ValueError) as e:
+            logger.warning("Could not persist job %s: %s", job.id, str(e))
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None,
+               on_success: Optional[Callable[[Dict[str, Any]], None]] = None) -> Job:
+        """Queue a job of a registered ``kind``; it starts when a slot is free"""
+        if kind not in self.jobs:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=dict(params or {}))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job runner is shut down")
+            self._load()
+            self._jobs[job.id] = job
+            if on_success is not None:
+                self._callbacks[job.id] = on_success
+            self._queue.append(job.id)
+            self._save(job)
+            self._dispatch()
+        logger.info("Job %s (%s) submitted", job.id, kind)
+        return job
+
+    def _dispatch(self):
+        """Start queued jobs while slots are free (lock held)"""
+        while self._queue and len(self._processes) < self.max_concurrent:
+            job = self._jobs[self._queue.pop(0)]
+            parent_conn, child_conn = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_child_main,
+                args=(self.jobs[job.kind], job.id, job.params, child_conn, self.limits),
+                name=f"job-{job.kind}-{job.id[:8]}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            job.status = "running"
+            job.started_at = time.time()
+            self._processes[job.id] = process
+            TRAINING_JOBS_RUNNING.set(len(self._processes))
+            self._save(job)
+            monitor = threading.Thread(
+                target=self._monitor, args=(job, process, parent_conn),
+                name=f"job-monitor-{job.id[:8]}", daemon=True,
+            )
+            self._monitors[job.id] = monitor
+            monitor.start()
+
+    def _monitor(self, job: Job, process, conn):
+        """Apply a job's messages until its process exits, then settle it"""
+        result, error = None, None
+        while True:
+            try:
+                if not conn.poll(0.5):
+                    if process.is_alive():
+                        continue
+                    if not conn.poll(0):
+                        break
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "progress":
+                with self._lock:
+                    job.progress = round(min(max(message[1], 0.0), 1.0), 4)
+                    job.message = message[2]
+                    self._save(job)
+            elif message[0] == "result":
+                result = message[1]
+            elif message[0] == "error":
+                error = message[1]
+                logger.error("Job %s (%s) failed:\n%s", job.id, job.kind, message[2])
+        conn.close()
+        process.join()
+
+        with self._lock:
+            callback = self._callbacks.pop(job.id, None)
+        if result is not None and callback is not None:
+            # Runs before the job reports success, so "succeeded" means served
+            try:
+                callback(result)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Job %s completion callback failed: %s", job.id, str(e))
+                error = f"Result could not be applied: {e}"
+                result = None
+
+        with self._lock:
+            if result is not None:
+                # A cancel arriving after the result was sent is too late
+                job.status = "succeeded"
+                job.progress = 1.0
+                job.result = result
+            elif job.id in self._cancel_requested:
+                job.status = "cancelled"
+            else:
+                job.status = "failed"
+                job.error = error or f"Job process exited with code {process.exitcode}"
+            job.finished_at = time.time()
+            self._cancel_requested.discard(job.id)
+            self._processes.pop(job.id, None)
+            self._monitors.pop(job.id, None)
+            TRAINING_JOBS_RUNNING.set(len(self._processes))
+            self._save(job)
+            if not self._closed:
+                self._dispatch()
+        TRAINING_JOBS.labels(job.kind, job.status).inc()
+        logger.info("Job %s (%s) %s in %.1fs", job.id, job.kind, job.status,
+                    job.finished_at - (job.started_at or job.created_at))
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            self._load()
+            try:
+                return self._jobs[job_id]
+            except KeyError:
+                raise JobNotFound(job_id) from None
+
+    def list(self, kind: Optional[str] = None) -> List[Job]:
+        """Jobs, newest first"""
+        with self._lock:
+            self._load()
+            jobs = [job for job in self._jobs.values() if kind is None or job.kind == kind]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str, grace_seconds: float = 5.0) -> Job:
+        """
+        Cancel a queued or running job.
+
+        A running process gets SIGTERM and is killed after ``grace_seconds``;
+        models are published atomically, so a cancelled job never leaves a
+        partial artifact behind.
+        """
+        with self._lock:
+            job = self.get(job_id)
+            if job.finished:
+                raise JobFinished(f"Job {job_id} already {job.status}")
+            if job.status == "queued":
+                self._queue.remove(job_id)
+                self._callbacks.pop(job_id, None)
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                self._save(job)
+                TRAINING_JOBS.labels(job.kind, job.status).inc()
+                return job
+            self._cancel_requested.add(job_id)
+            process = self._processes[job_id]
+            monitor = self._monitors[job_id]
+        process.terminate()
+        process.join(grace_seconds)
+        if process.is_alive():
+            process.kill()
+        # Let the monitor settle the record before it is returned
+        monitor.join(grace_seconds)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        limits = self.limits
+        return {
+            "max_concurrent": self.max_concurrent,
+            "limits": {"nice": limits.nice, "threads": limits.threads,
+                       "cpus": sorted(limits.cpus) if limits.cpus else None},
+            "jobs": counts,
+        }
+
+    def shutdown(self, grace_seconds: float = 5.0):
+        """Cancel queued and running jobs; called on service shutdown"""
+        with self._lock:
+            self._closed = True
+            active = [job_id for job_id, job in self._jobs.items() if not job.finished]
+        for job_id in active:
+            try:
+                self.cancel(job_id, grace_seconds)
+            except (JobNotFound, JobFinished):
+                pass
@@ -3,6 +3,7 @@ CAPSTACK ML Service - Advanced Financial AI Engine
 Production-ready ML service with model management and evaluation
 """
 
+import asyncio
 import logging
 import os
 import math
@@ -10,26 +11,71 @@ import random
 import time
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from pydantic import FieldValidationInfo
-from app.routers import enhanced_security
-
-app = FastAPI(
-    title="CAPSTACK ML Service", 
-    version="2.0.0",
-    description="Enhanced ML service with real-world financial crisis simulation and fraud detection",
-    docs_url="/docs",
-    redoc_url="/redoc"
+from app.routers import admin_router, enhanced_security, jobs_router, security_router
+
+from .async_jobs import JobContext, async_jobs
+from .core.allocation import ADJUSTMENT_FLAGS, allocate_batch
+from .core.feature_engineering import ProfileFeatures, build_profile_features
+from .core.layoff_hazard import layoff_hazard
+from .core.portfolio_optimizer import (
+    BUCKETS,
+    age_band,
+    allocation_constraints,
+    portfolio_optimizer,
 )
-
-# Include enhanced security router
-app.include_router(enhanced_security.router)
-
-from .models import load_all_models, risk_model, layoff_model, savings_model
+from .core.rules import get_rules
+from .deadline import DeadlineMiddleware, inference_gate, is_degraded
+from .core.savings_projection import (
+    CONTRIBUTION_TIMING,
+    MAX_PROJECTION_MONTHS,
+    project_trajectories,
+)
+from .core.score_calculator import calculate_health_score, calculate_health_scores
+from .core.survival_algorithm import predict_survival_months, predict_survival_months_batch
+from .core.what_if import WhatIfSimulation, validate_scenarios
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    InstrumentedJSONResponse,
+    MetricsMiddleware,
+    render_metrics,
+    timed_executor,
+)
+from .profiling import TraceMiddleware
+from .scheduler import chunk_rows, prioritized, run_chunked
+from .schemas import (
+    HealthScoreBatchRequest,
+    HealthScoreBatchResponse,
+    HealthScoreRequest,
+    HealthScoreResponse,
+    SurvivalBatchRequest,
+    SurvivalBatchResponse,
+    SurvivalRequest,
+    SurvivalResponse,
+)
+from .singleflight import coalesce_requests
+from .utils import (
+    batch_columns,
+    categorize_score,
+    categorize_scores,
+    categorize_survival,
+    categorize_survivals,
+    validate_financial_data,
+)
+from .warmup import (
+    batch_sizes_from_env,
+    run_warmup,
+    skip_warmup,
+    warmup_enabled,
+    warmup_state,
+)
+from .models import load_all_models, risk_model, savings_model
 
 # Configure logging
 logging.basicConfig(
@@ -43,8 +89,18 @@ app = FastAPI(
     version="2.0.0",
     description="Advanced AI/ML Engine for Financial Insights",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=InstrumentedJSONResponse
 )
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(TraceMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Include security routers
+app.include_router(enhanced_security.router)
+app.include_router(security_router.router)
+app.include_router(admin_router.router)
+app.include_router(jobs_router.router)
 
 # Model and data directories
 MODEL_DIR = "app/models"
@@ -61,6 +117,24 @@ async def startup_event():
         logger.info("ML models loaded successfully")
     except Exception as e:
         logger.warning("Failed to load ML models: %s", str(e))
+    enhanced_security.restore_feature_store()
+    # Warm up in the background so liveness checks pass while /ready is 503
+    if warmup_enabled():
+        app.state.warmup_task = asyncio.create_task(run_warmup(app, batch_sizes_from_env()))
+    else:
+        skip_warmup()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist in-process state on shutdown."""
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    enhanced_security.snapshot_feature_store()
+    await security_router.ingestion_pipeline.stop()
+    security_router.job_runner.shutdown()
+    async_jobs.shutdown()
 
 
 # ============================================================================
@@ -91,6 +165,13 @@ class MarketCondition(str, Enum):
     NEUTRAL = "neutral"
 
 
+class AllocationEngine(str, Enum):
+    """Allocation engine: rule adjustments or mean-variance optimizer."""
+
+    RULES = "rules"
+    OPTIMIZER = "optimizer"
+
+
 class PredictionType(str, Enum):
     """Type of predictive analysis."""
 
@@ -147,6 +228,8 @@ class RiskScoreResponse(BaseModel):
     level: RiskLevel
     factors: Dict[str, float]
     timestamp: str
+    # Rule-based answer served because the model missed the request deadline
+    degraded: bool = False
 
 
 class AllocationOptimizationRequest(BaseModel):
@@ -175,6 +258,10 @@ class AllocationOptimizationRequest(BaseModel):
         le=20,
         description="Expected inflation rate"
     )
+    engine: Optional[AllocationEngine] = Field(
+        default=None,
+        description="Allocation engine (defaults to ALLOCATION_ENGINE)"
+    )
 
     @field_validator(
         "income",
@@ -221,6 +308,38 @@ class AllocationResponse(BaseModel):
     risk_adjustment: str
 
 
+class AllocationBatchRequest(BaseModel):
+    """Columnar request for batch allocation: element i of every list is user i."""
+
+    user_ids: Optional[List[str]] = Field(
+        default=None,
+        description="Optional identifiers echoed back in the response"
+    )
+    income: List[float]
+    expenses: List[float]
+    emergency_fund: List[float]
+    debt: List[float]
+    age: List[int]
+    risk_tolerance: List[RiskTolerance]
+    job_stability: List[float]
+    market_conditions: List[MarketCondition]
+
+
+class AllocationBatchResponse(BaseModel):
+    """Columnar batch allocation: one list per allocation bucket."""
+
+    count: int
+    user_ids: Optional[List[str]]
+    sip_percentage: List[float]
+    stocks_percentage: List[float]
+    bonds_percentage: List[float]
+    lifestyle_percentage: List[float]
+    emergency_fund_percentage: List[float]
+    adjustments: List[int]
+    adjustment_flags: Dict[str, int]
+    timestamp: str
+
+
 class PredictiveAnalyticsRequest(BaseModel):
     """Request model for predictive analytics."""
 
@@ -248,6 +367,50 @@ class PredictiveAnalyticsRequest(BaseModel):
     )
 
 
+class SavingsTrajectory(BaseModel):
+    """Monthly savings balances, nominal and in today's money."""
+
+    months: List[int]
+    nominal: List[float]
+    real: List[float]
+    horizons: Dict[str, Dict[str, float]]
+    inflation_rate: float
+    contribution_timing: str
+
+
+class LayoffCurve(BaseModel):
+    """Cumulative layoff probability by month, from a monthly hazard."""
+
+    monthly_hazard: float
+    months: List[int]
+    cumulative: List[float]
+    horizons: Dict[str, float]
+
+
+class LayoffCurveBatchRequest(BaseModel):
+    """Columnar layoff inputs; omitted columns take the model defaults."""
+
+    user_ids: Optional[List[str]] = None
+    industry: List[str]
+    experience_years: Optional[List[float]] = None
+    company_age: Optional[List[float]] = None
+    team_size: Optional[List[float]] = None
+    contract_type: Optional[List[Optional[str]]] = None
+    performance_rating: Optional[List[float]] = None
+
+
+class LayoffCurveBatchResponse(BaseModel):
+    """Columnar layoff curves: ``cumulative[i][t]`` is user i by month t+1."""
+
+    count: int
+    user_ids: Optional[List[str]]
+    monthly_hazard: List[float]
+    months: List[int]
+    cumulative: List[List[float]]
+    horizons: Dict[str, List[float]]
+    timestamp: str
+
+
 class PredictionResponse(BaseModel):
     """Response model for predictions."""
 
@@ -258,6 +421,77 @@ class PredictionResponse(BaseModel):
     factors: List[str]
     recommendations: List[str]
     timestamp: str
+    trajectory: Optional[SavingsTrajectory] = None
+    layoff_curve: Optional[LayoffCurve] = None
+    degraded: bool = False
+
+
+class FinancialProfileRequest(AllocationOptimizationRequest):
+    """Request model for the composite financial profile."""
+
+    savings: float = Field(..., ge=0, description="Current savings amount")
+    employment: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Layoff model inputs (industry, experience_years, ...)"
+    )
+    savings_plan: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Savings model and trajectory inputs; defaults grow "
+                    "savings by the monthly surplus"
+    )
+
+    @field_validator("savings")
+    @classmethod
+    def validate_savings(cls, v: float) -> float:
+        if not math.isfinite(v):
+            raise ValueError("savings must be a finite number")
+        return v
+
+
+class HealthSection(BaseModel):
+    """Financial health score derived from the risk score."""
+
+    score: float
+    category: str
+
+
+class SurvivalSection(BaseModel):
+    """Survival probability and emergency runway."""
+
+    probability: float
+    months: float
+    category: str
+    factors: List[str]
+
+
+class LayoffSection(BaseModel):
+    """Layoff risk from the layoff model."""
+
+    probability: float
+    industry: str
+    experience_years: float
+
+
+class SavingsSection(BaseModel):
+    """Savings model prediction and monthly trajectory."""
+
+    predicted_value: float
+    months_to_project: float
+    trajectory: SavingsTrajectory
+
+
+class FinancialProfileResponse(BaseModel):
+    """Every score of one user, with per-section timings."""
+
+    risk: RiskScoreResponse
+    health: HealthSection
+    survival: SurvivalSection
+    layoff: LayoffSection
+    savings: SavingsSection
+    allocation: AllocationResponse
+    timings_ms: Dict[str, float]
+    timestamp: str
+    degraded: bool = False
 
 
 class WhatIfScenario(str, Enum):
@@ -294,6 +528,11 @@ class WhatIfSimulationRequest(BaseModel):
         le=10000,
         description="Number of Monte Carlo simulations"
     )
+    seed: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Random seed for reproducible simulations"
+    )
 
     @field_validator("current_income", "current_expenses", "current_savings", "current_debt")
     @classmethod
@@ -304,6 +543,11 @@ class WhatIfSimulationRequest(BaseModel):
             raise ValueError("Financial values must be non-negative and reasonable")
         return v
 
+    @field_validator("scenarios")
+    @classmethod
+    def validate_scenario_parameters(cls, v: Dict[str, Any]) -> Dict[str, Any]:
+        return validate_scenarios(v)
+
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
@@ -325,6 +569,20 @@ class WhatIfSimulationRequest(BaseModel):
     )
 
 
+MAX_JOB_SIMULATIONS = 200_000
+
+
+class WhatIfSimulationJobRequest(WhatIfSimulationRequest):
+    """What-if request for the async job API, which runs far larger simulations."""
+
+    num_simulations: int = Field(
+        default=1000,
+        ge=100,
+        le=MAX_JOB_SIMULATIONS,
+        description="Number of Monte Carlo simulations"
+    )
+
+
 class WhatIfSimulationResponse(BaseModel):
     """Response model for What-If simulation results."""
 
@@ -415,6 +673,14 @@ async def health_check():
     )
 
 
+@app.get("/ready", include_in_schema=False)
+async def readiness():
+    """Readiness probe: 503 until the startup warm-up has finished."""
+    if not warmup_state.ready:
+        return JSONResponse(status_code=503, content=warmup_state.summary())
+    return warmup_state.summary()
+
+
 @app.get("/")
 def read_root():
     """Root endpoint - API information."""
@@ -424,14 +690,22 @@ def read_root():
         "status": "operational",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "risk_score": "/risk-score",
             "allocation_optimize": "/allocation-optimize",
             "predictive_analytics": "/predictive-analytics",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose service metrics in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     """Serve an empty favicon to avoid 404 errors."""
@@ -447,6 +721,8 @@ async def favicon():
     response_model=RiskScoreResponse,
     tags=["Risk Analysis"]
 )
+@prioritized("interactive")
+@timed_executor
 def calculate_risk_score(request: RiskScoreRequest):
     """
     Calculate financial risk score using multi-factor analysis.
@@ -467,7 +743,7 @@ def calculate_risk_score(request: RiskScoreRequest):
             "savings": request.savings,
             "debt": request.debt
         }
-        risk_score = risk_model.predict(data)
+        risk_score, degraded = inference_gate.predict("risk", risk_model, data)
 
         # Calculate ratios for factors
         expense_ratio = (
@@ -487,12 +763,7 @@ def calculate_risk_score(request: RiskScoreRequest):
         )
 
         # Determine risk level
-        if risk_score < 30:
-            level = RiskLevel.LOW
-        elif risk_score < 70:
-            level = RiskLevel.MEDIUM
-        else:
-            level = RiskLevel.HIGH
+        level = RiskLevel(get_rules().risk_level.classify(risk_score))
 
         duration = time.time() - start_time
         logger.info("Risk score calculated: %s, level: %s, duration: %.3fs", risk_score, level, duration)
@@ -505,7 +776,8 @@ def calculate_risk_score(request: RiskScoreRequest):
                 "savings_ratio": round(savings_ratio * 100, 2),
                 "debt_ratio": round(debt_ratio * 100, 2)
             },
-            timestamp=get_timestamp()
+            timestamp=get_timestamp(),
+            degraded=degraded
         )
 
     except Exception as e:  # pylint: disable=broad-except
@@ -525,6 +797,9 @@ def calculate_risk_score(request: RiskScoreRequest):
     response_model=AllocationResponse,
     tags=["Asset Allocation"]
 )
+@coalesce_requests("/allocation-optimize")
+@prioritized("interactive")
+@timed_executor
 def optimize_asset_allocation(
     request: AllocationOptimizationRequest
 ):
@@ -543,120 +818,7 @@ def optimize_asset_allocation(
     """
     try:
         logger.info("Optimizing allocation for user age: %s", request.age)
-
-        # Initialize base allocation
-        allocation = {
-            "sip_percentage": 30.0,
-            "stocks_percentage": 15.0,
-            "bonds_percentage": 20.0,
-            "lifestyle_percentage": 25.0,
-            "emergency_fund_percentage": 10.0
-        }
-
-        reasoning = []
-
-        # Age-based adjustment (life-cycle investing)
-        if request.age < 30:
-            allocation["sip_percentage"] += 5
-            allocation["stocks_percentage"] += 3
-            allocation["lifestyle_percentage"] -= 8
-            reasoning.append(
-                "Age < 30: Increased long-term investment allocation"
-            )
-        elif request.age > 50:
-            allocation["sip_percentage"] -= 5
-            allocation["stocks_percentage"] -= 5
-            allocation["bonds_percentage"] += 10
-            reasoning.append("Age > 50: More conservative allocation")
-
-        # Risk tolerance adjustment
-        if request.risk_tolerance == RiskTolerance.LOW:
-            allocation["stocks_percentage"] = max(
-                10,
-                allocation["stocks_percentage"] - 5
-            )
-            allocation["bonds_percentage"] += 5
-            reasoning.append(
-                "Low risk tolerance: Conservative allocation"
-            )
-        elif request.risk_tolerance == RiskTolerance.HIGH:
-            allocation["stocks_percentage"] = min(
-                20,
-                allocation["stocks_percentage"] + 5
-            )
-            allocation["bonds_percentage"] -= 5
-            reasoning.append(
-                "High risk tolerance: Aggressive allocation"
-            )
-
-        # Job stability adjustment
-        if request.job_stability < 5:
-            allocation["emergency_fund_percentage"] += 5
-            allocation["lifestyle_percentage"] -= 5
-            reasoning.append(
-                "Low job stability: Prioritize emergency fund"
-            )
-
-        # Market condition adjustment
-        if request.market_conditions == MarketCondition.BULL:
-            allocation["stocks_percentage"] += 3
-            allocation["bonds_percentage"] -= 3
-            reasoning.append("Bull market: Increased equity exposure")
-        elif request.market_conditions == MarketCondition.BEAR:
-            allocation["stocks_percentage"] -= 3
-            allocation["bonds_percentage"] += 3
-            reasoning.append("Bear market: Reduced equity exposure")
-
-        # Emergency fund adequacy check
-        monthly_expenses = request.expenses
-        current_months = calculate_emergency_fund_months(
-            request.emergency_fund,
-            monthly_expenses
-        )
-        target_months = 6
-
-        if current_months < target_months:
-            additional = min(10, (target_months - current_months) * 2)
-            allocation["emergency_fund_percentage"] += additional
-            allocation["lifestyle_percentage"] -= additional
-            months_needed = round(target_months - current_months, 1)
-            reasoning.append(
-                f"Emergency fund needs {months_needed} months coverage"
-            )
-
-        # Debt burden assessment
-        debt_to_income = (
-            request.debt / (request.income * 12)
-            if request.income > 0
-            else 1.0
-        )
-        if debt_to_income > 0.5:
-            allocation["lifestyle_percentage"] -= 5
-            allocation["emergency_fund_percentage"] += 5
-            reasoning.append("High debt burden: Conservative spending")
-
-        # Normalize allocation to 100%
-        allocation = normalize_allocation(allocation)
-
-        logger.info("Allocation optimized: %s", allocation)
-
-        return AllocationResponse(
-            sip_percentage=round(allocation["sip_percentage"], 2),
-            stocks_percentage=round(allocation["stocks_percentage"], 2),
-            bonds_percentage=round(allocation["bonds_percentage"], 2),
-            lifestyle_percentage=round(
-                allocation["lifestyle_percentage"],
-                2
-            ),
-            emergency_fund_percentage=round(
-                allocation["emergency_fund_percentage"],
-                2
-            ),
-            reasoning=reasoning,
-            confidence=0.85,
-            market_context=request.market_conditions.value,
-            risk_adjustment=request.risk_tolerance.value
-        )
+        return allocate(request)
 
     except Exception as e:  # pylint: disable=broad-except
         logger.error(
@@ -670,15 +832,434 @@ def optimize_asset_allocation(
         ) from e
 
 
+def allocate(request: AllocationOptimizationRequest) -> AllocationResponse:
+    """Allocation from the request's engine, or ALLOCATION_ENGINE by default."""
+    engine = request.engine or AllocationEngine(
+        os.getenv("ALLOCATION_ENGINE", AllocationEngine.RULES.value)
+    )
+    if engine == AllocationEngine.OPTIMIZER:
+        return optimize_allocation_mean_variance(request)
+    return optimize_allocation_rules(request)
+
+
+def optimize_allocation_rules(
+    request: AllocationOptimizationRequest
+) -> AllocationResponse:
+    """
+    Allocation from fixed life-cycle, risk, job, market, emergency-fund
+    and debt adjustments to a base split.
+    """
+    # Initialize base allocation
+    allocation = {
+        "sip_percentage": 30.0,
+        "stocks_percentage": 15.0,
+        "bonds_percentage": 20.0,
+        "lifestyle_percentage": 25.0,
+        "emergency_fund_percentage": 10.0
+    }
+
+    reasoning = []
+
+    # Age-based adjustment (life-cycle investing)
+    if request.age < 30:
+        allocation["sip_percentage"] += 5
+        allocation["stocks_percentage"] += 3
+        allocation["lifestyle_percentage"] -= 8
+        reasoning.append(
+            "Age < 30: Increased long-term investment allocation"
+        )
+    elif request.age > 50:
+        allocation["sip_percentage"] -= 5
+        allocation["stocks_percentage"] -= 5
+        allocation["bonds_percentage"] += 10
+        reasoning.append("Age > 50: More conservative allocation")
+
+    # Risk tolerance adjustment
+    if request.risk_tolerance == RiskTolerance.LOW:
+        allocation["stocks_percentage"] = max(
+            10,
+            allocation["stocks_percentage"] - 5
+        )
+        allocation["bonds_percentage"] += 5
+        reasoning.append(
+            "Low risk tolerance: Conservative allocation"
+        )
+    elif request.risk_tolerance == RiskTolerance.HIGH:
+        allocation["stocks_percentage"] = min(
+            20,
+            allocation["stocks_percentage"] + 5
+        )
+        allocation["bonds_percentage"] -= 5
+        reasoning.append(
+            "High risk tolerance: Aggressive allocation"
+        )
+
+    # Job stability adjustment
+    if request.job_stability < 5:
+        allocation["emergency_fund_percentage"] += 5
+        allocation["lifestyle_percentage"] -= 5
+        reasoning.append(
+            "Low job stability: Prioritize emergency fund"
+        )
+
+    # Market condition adjustment
+    if request.market_conditions == MarketCondition.BULL:
+        allocation["stocks_percentage"] += 3
+        allocation["bonds_percentage"] -= 3
+        reasoning.append("Bull market: Increased equity exposure")
+    elif request.market_conditions == MarketCondition.BEAR:
+        allocation["stocks_percentage"] -= 3
+        allocation["bonds_percentage"] += 3
+        reasoning.append("Bear market: Reduced equity exposure")
+
+    # Emergency fund adequacy check
+    monthly_expenses = request.expenses
+    current_months = calculate_emergency_fund_months(
+        request.emergency_fund,
+        monthly_expenses
+    )
+    target_months = 6
+
+    if current_months < target_months:
+        additional = min(10, (target_months - current_months) * 2)
+        allocation["emergency_fund_percentage"] += additional
+        allocation["lifestyle_percentage"] -= additional
+        months_needed = round(target_months - current_months, 1)
+        reasoning.append(
+            f"Emergency fund needs {months_needed} months coverage"
+        )
+
+    # Debt burden assessment
+    debt_to_income = (
+        request.debt / (request.income * 12)
+        if request.income > 0
+        else 1.0
+    )
+    if debt_to_income > 0.5:
+        allocation["lifestyle_percentage"] -= 5
+        allocation["emergency_fund_percentage"] += 5
+        reasoning.append("High debt burden: Conservative spending")
+
+    # Normalize allocation to 100%
+    allocation = normalize_allocation(allocation)
+
+    logger.info("Allocation optimized: %s", allocation)
+
+    return AllocationResponse(
+        sip_percentage=round(allocation["sip_percentage"], 2),
+        stocks_percentage=round(allocation["stocks_percentage"], 2),
+        bonds_percentage=round(allocation["bonds_percentage"], 2),
+        lifestyle_percentage=round(
+            allocation["lifestyle_percentage"],
+            2
+        ),
+        emergency_fund_percentage=round(
+            allocation["emergency_fund_percentage"],
+            2
+        ),
+        reasoning=reasoning,
+        confidence=0.85,
+        market_context=request.market_conditions.value,
+        risk_adjustment=request.risk_tolerance.value
+    )
+
+
+def optimize_allocation_mean_variance(
+    request: AllocationOptimizationRequest
+) -> AllocationResponse:
+    """
+    Allocation from the cached mean-variance frontiers.
+
+    Emergency-fund and debt rules become constraints (emergency-fund floor,
+    lifestyle share) and the optimum is interpolated from the frontier of
+    the request's risk tolerance, market conditions and age band.
+    """
+    debt_to_income = (
+        request.debt / (request.income * 12)
+        if request.income > 0
+        else 1.0
+    )
+    constraints = allocation_constraints(
+        request.age,
+        request.job_stability,
+        calculate_emergency_fund_months(request.emergency_fund, request.expenses),
+        debt_to_income
+    )
+    optimum = portfolio_optimizer.optimize(
+        request.risk_tolerance.value,
+        request.market_conditions.value,
+        request.age,
+        constraints
+    )
+    reasoning = [
+        f"Mean-variance optimum for {request.risk_tolerance.value} risk tolerance, "
+        f"age band {age_band(request.age)}, {request.market_conditions.value} market"
+    ] + constraints.reasoning + [
+        f"Expected return {optimum['expected_return'] * 100:.1f}% "
+        f"at {optimum['volatility'] * 100:.1f}% volatility"
+    ]
+    allocation = normalize_allocation({
+        f"{bucket}_percentage": optimum[bucket] * 100 for bucket in BUCKETS
+    })
+
+    return AllocationResponse(
+        **{k: round(v, 2) for k, v in allocation.items()},
+        reasoning=reasoning,
+        confidence=0.85,
+        market_context=request.market_conditions.value,
+        risk_adjustment=request.risk_tolerance.value
+    )
+
+
+MAX_ALLOCATION_BATCH_ROWS = 100_000
+
+# Column name -> (lower bound, upper bound, lower bound inclusive)
+_ALLOCATION_BATCH_BOUNDS = {
+    "income": (0.0, math.inf, False),
+    "expenses": (0.0, math.inf, True),
+    "emergency_fund": (0.0, math.inf, True),
+    "debt": (0.0, math.inf, True),
+    "age": (18, 100, True),
+    "job_stability": (1.0, 10.0, True),
+}
+
+
+def _allocation_batch_columns(request: AllocationBatchRequest) -> Dict[str, Any]:
+    """Validate a batch request column-wise and convert it to arrays."""
+    return batch_columns(
+        request,
+        MAX_ALLOCATION_BATCH_ROWS,
+        _ALLOCATION_BATCH_BOUNDS,
+        columns={
+            "risk_tolerance": [r.value for r in request.risk_tolerance],
+            "market_conditions": [m.value for m in request.market_conditions],
+        }
+    )
+
+
+@app.post(
+    "/allocation-optimize/batch",
+    response_model=AllocationBatchResponse,
+    tags=["Asset Allocation"]
+)
+@prioritized("bulk")
+@timed_executor
+def optimize_asset_allocation_batch(request: AllocationBatchRequest):
+    """
+    Rule-based allocation for many users in one call.
+
+    Takes and returns columns (one list per field) and applies the
+    single-user rules engine as NumPy column operations, for bulk
+    rebalancing. ``adjustments`` is a bitmask of the rules applied to each
+    user, decoded by ``adjustment_flags``.
+    """
+    columns = _allocation_batch_columns(request)
+    result = run_chunked(lambda chunk: allocate_batch(**chunk), columns, len(request.income))
+    logger.info("Batch allocation optimized for %d users", len(request.income))
+    return AllocationBatchResponse(
+        count=len(request.income),
+        user_ids=request.user_ids,
+        **{name: values.tolist() for name, values in result.items()},
+        adjustment_flags=ADJUSTMENT_FLAGS,
+        timestamp=get_timestamp()
+    )
+
+
+# ============================================================================
+# HEALTH SCORE & SURVIVAL
+# ============================================================================
+
+MAX_SCORE_BATCH_ROWS = 100_000
+
+_HEALTH_BATCH_BOUNDS = {
+    "income": (0.0, math.inf, False),
+    "expenses": (0.0, math.inf, True),
+    "savings": (0.0, math.inf, True),
+    "debt": (0.0, math.inf, True),
+}
+
+_SURVIVAL_BATCH_BOUNDS = {
+    "emergency_fund": (0.0, math.inf, True),
+    "monthly_expenses": (0.0, math.inf, True),
+    "income_stability": (0.0, 1.0, True),
+}
+
+
+@app.post(
+    "/health-score",
+    response_model=HealthScoreResponse,
+    tags=["Health & Survival"]
+)
+@prioritized("interactive")
+@timed_executor
+def health_score(request: HealthScoreRequest):
+    """
+    Financial health score (0-100): the inverse of the risk score.
+
+    Categories follow SCORE_THRESHOLDS.
+    """
+    validate_financial_data(request.income, request.expenses, request.savings, request.debt)
+    data = request.model_dump()
+    risk_score, degraded = inference_gate.predict("risk", risk_model, data)
+    score = calculate_health_score(data, risk_score=risk_score)
+    return HealthScoreResponse(
+        score=round(score, 2), category=categorize_score(score), degraded=degraded
+    )
+
+
+@app.post(
+    "/health-score/batch",
+    response_model=HealthScoreBatchResponse,
+    tags=["Health & Survival"]
+)
+@prioritized("bulk")
+@timed_executor
+def health_score_batch(request: HealthScoreBatchRequest):
+    """
+    Health scores for many users from a single risk model call.
+
+    Columnar request and response; categories are assigned with
+    ``searchsorted`` over SCORE_THRESHOLDS.
+    """
+    columns = batch_columns(request, MAX_SCORE_BATCH_ROWS, _HEALTH_BATCH_BOUNDS)
+    scores = run_chunked(calculate_health_scores, columns, len(request.income))
+    logger.info("Health scores calculated for %d users", len(scores))
+    return HealthScoreBatchResponse(
+        count=len(scores),
+        user_ids=request.user_ids,
+        score=np.round(scores, 2).tolist(),
+        category=categorize_scores(scores).tolist()
+    )
+
+
+@app.post(
+    "/survival",
+    response_model=SurvivalResponse,
+    tags=["Health & Survival"]
+)
+@prioritized("interactive")
+@timed_executor
+def survival(request: SurvivalRequest):
+    """
+    Months the emergency fund lasts, adjusted for income stability (0-1).
+
+    Categories follow SURVIVAL_THRESHOLDS.
+    """
+    ensure_finite_number(request.emergency_fund, "emergency_fund", min_value=0)
+    ensure_finite_number(request.monthly_expenses, "monthly_expenses", min_value=0)
+    ensure_finite_number(request.income_stability, "income_stability", min_value=0, max_value=1)
+    months = predict_survival_months(
+        request.emergency_fund, request.monthly_expenses, request.income_stability
+    )
+    return SurvivalResponse(months=round(months, 2), category=categorize_survival(months))
+
+
+@app.post(
+    "/survival/batch",
+    response_model=SurvivalBatchResponse,
+    tags=["Health & Survival"]
+)
+@prioritized("bulk")
+@timed_executor
+def survival_batch(request: SurvivalBatchRequest):
+    """
+    Survival months for many users as NumPy column operations.
+
+    Columnar request and response; categories are assigned with
+    ``searchsorted`` over SURVIVAL_THRESHOLDS.
+    """
+    columns = batch_columns(request, MAX_SCORE_BATCH_ROWS, _SURVIVAL_BATCH_BOUNDS)
+    months = run_chunked(
+        lambda chunk: predict_survival_months_batch(**chunk), columns, len(request.emergency_fund)
+    )
+    logger.info("Survival months calculated for %d users", len(months))
+    return SurvivalBatchResponse(
+        count=len(months),
+        user_ids=request.user_ids,
+        months=np.round(months, 2).tolist(),
+        category=categorize_survivals(months).tolist()
+    )
+
+
 # ============================================================================
 # PREDICTIVE ANALYTICS
 # ============================================================================
 
+def savings_trajectory(user_data: Dict[str, Any]) -> SavingsTrajectory:
+    """Monthly projection of a user's savings with horizon checkpoints."""
+    current = ensure_finite_number(
+        user_data.get("current_savings", 0), "current_savings", min_value=0
+    )
+    monthly = ensure_finite_number(
+        user_data.get("monthly_savings", 0), "monthly_savings"
+    )
+    expected_return = ensure_finite_number(
+        user_data.get("expected_return", 7), "expected_return",
+        min_value=-50, max_value=100
+    )
+    inflation_rate = ensure_finite_number(
+        user_data.get("inflation_rate", 3.5), "inflation_rate",
+        min_value=-10, max_value=100
+    )
+    months = int(ensure_finite_number(
+        user_data.get("projection_months", 120), "projection_months",
+        min_value=1, max_value=MAX_PROJECTION_MONTHS
+    ))
+
+    projection = project_trajectories(
+        current, monthly, expected_return, inflation_rate, months,
+        contribution_timing=CONTRIBUTION_TIMING
+    )
+    return SavingsTrajectory(
+        months=projection.months.tolist(),
+        nominal=np.round(projection.nominal[0], 2).tolist(),
+        real=np.round(projection.real[0], 2).tolist(),
+        horizons={
+            name: {kind: round(float(values[0]), 2) for kind, values in balances.items()}
+            for name, balances in projection.horizons().items()
+        },
+        inflation_rate=inflation_rate,
+        contribution_timing=CONTRIBUTION_TIMING
+    )
+
+
+def survival_probability(
+    emergency_months: float,
+    debt_ratio: float,
+    savings_rate: float
+) -> Tuple[float, List[str]]:
+    """
+    Rule-based probability of financial survival and the factors lowering it.
+
+    ``savings_rate`` is a percentage of income.
+    """
+    # Use rule-based for now, as no specific survival model
+    base_probability = 0.8
+    factors_list = []
+
+    if emergency_months < 3:
+        base_probability -= 0.2
+        factors_list.append("Low emergency fund")
+
+    if debt_ratio > 0.5:
+        base_probability -= 0.15
+        factors_list.append("High debt ratio")
+
+    if savings_rate < 10:
+        base_probability -= 0.1
+        factors_list.append("Low savings rate")
+
+    return max(0.1, base_probability), factors_list
+
+
 @app.post(
     "/predictive-analytics",
     response_model=PredictionResponse,
     tags=["Predictions"]
 )
+@coalesce_requests("/predictive-analytics")
+@prioritized("interactive")
+@timed_executor
 def predictive_analytics(
     request: PredictiveAnalyticsRequest
 ):
@@ -712,10 +1293,6 @@ def predictive_analytics(
 
         # Survival probability prediction
         if prediction_type == PredictionType.SURVIVAL_PROBABILITY:
-            # Use rule-based for now, as no specific survival model
-            base_probability = 0.8
-            factors_list = []
-
             emergency_months = ensure_finite_number(
                 user_data.get("emergency_months", 0),
                 "emergency_months",
@@ -732,19 +1309,9 @@ def predictive_analytics(
                 min_value=0
             )
 
-            if emergency_months < 3:
-                base_probability -= 0.2
-                factors_list.append("Low emergency fund")
-
-            if debt_ratio > 0.5:
-                base_probability -= 0.15
-                factors_list.append("High debt ratio")
-
-            if savings_rate < 10:
-                base_probability -= 0.1
-                factors_list.append("Low savings rate")
-
-            predicted_value = max(0.1, base_probability)
+            predicted_value, factors_list = survival_probability(
+                emergency_months, debt_ratio, savings_rate
+            )
 
             duration = time.time() - start_time
             logger.info("Survival prediction completed in %.3fs", duration)
@@ -765,8 +1332,11 @@ def predictive_analytics(
 
         # Job loss risk prediction
         elif prediction_type == PredictionType.LAYOFF_RISK:
-            # Use ML model
-            predicted_value = layoff_model.predict(user_data)
+            # One model pass for every horizon
+            curves, degraded = inference_gate.call(
+                "layoff", layoff_hazard.curve, layoff_hazard.fallback_curve, user_data
+            )
+            predicted_value = float(curves.horizons([time_horizon.value])[time_horizon.value][0])
 
             duration = time.time() - start_time
             logger.info("Layoff risk prediction completed in %.3fs", duration)
@@ -786,13 +1356,24 @@ def predictive_analytics(
                     "Update resume and professional skills",
                     "Network actively in your industry"
                 ],
-                timestamp=get_timestamp()
+                timestamp=get_timestamp(),
+                degraded=degraded,
+                layoff_curve=LayoffCurve(
+                    monthly_hazard=round(float(curves.hazard[0]), 5),
+                    months=curves.months.tolist(),
+                    cumulative=np.round(curves.cumulative[0], 4).tolist(),
+                    horizons={
+                        name: round(float(values[0]), 4)
+                        for name, values in curves.horizons().items()
+                    }
+                )
             )
 
         # Savings trajectory prediction
         elif prediction_type == PredictionType.SAVINGS_TRAJECTORY:
             # Use ML model
-            predicted_value = savings_model.predict(user_data)
+            predicted_value, degraded = inference_gate.predict("savings", savings_model, user_data)
+            trajectory = savings_trajectory(user_data)
 
             duration = time.time() - start_time
             logger.info("Savings trajectory prediction completed in %.3fs", duration)
@@ -813,7 +1394,9 @@ def predictive_analytics(
                     "Automate savings transfers",
                     "Review investment allocation"
                 ],
-                timestamp=get_timestamp()
+                timestamp=get_timestamp(),
+                trajectory=trajectory,
+                degraded=degraded
             )
 
         else:
@@ -840,6 +1423,254 @@ def predictive_analytics(
         ) from e
 
 
+@app.post(
+    "/predictive-analytics/layoff-curve/batch",
+    response_model=LayoffCurveBatchResponse,
+    tags=["Predictions"]
+)
+@prioritized("bulk")
+@timed_executor
+def layoff_curve_batch(request: LayoffCurveBatchRequest):
+    """
+    Monthly layoff risk curves (1-12 months) for many users.
+
+    Features are prepared once for the batch and the layoff model runs one
+    pass over the users not already cached; every horizon is derived from
+    each user's monthly hazard.
+    """
+    columns = request.model_dump(exclude={"user_ids"}, exclude_none=True)
+    n = len(request.industry)
+    if n > MAX_SCORE_BATCH_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {MAX_SCORE_BATCH_ROWS} users"
+        )
+    lengths = {name: len(values) for name, values in columns.items()}
+    if request.user_ids is not None:
+        lengths["user_ids"] = len(request.user_ids)
+    if set(lengths.values()) != {n}:
+        raise HTTPException(
+            status_code=422,
+            detail=f"All columns must have the same length: {lengths}"
+        )
+
+    curves = run_chunked(layoff_hazard.curves, columns, n)
+    logger.info("Layoff curves predicted for %d users", n)
+    return LayoffCurveBatchResponse(
+        count=n,
+        user_ids=request.user_ids,
+        monthly_hazard=np.round(curves.hazard, 5).tolist(),
+        months=curves.months.tolist(),
+        cumulative=np.round(curves.cumulative, 4).tolist(),
+        horizons={
+            name: np.round(values, 4).tolist()
+            for name, values in curves.horizons().items()
+        },
+        timestamp=get_timestamp()
+    )
+
+
+# ============================================================================
+# FINANCIAL PROFILE
+# ============================================================================
+
+def profile_risk(features: ProfileFeatures) -> RiskScoreResponse:
+    """Risk section: one risk model call on the shared features."""
+    risk_score, degraded = inference_gate.predict("risk", risk_model, features.risk_input)
+    return RiskScoreResponse(
+        risk_score=round(risk_score, 2),
+        level=RiskLevel(get_rules().risk_level.classify(risk_score)),
+        factors={
+            "expense_ratio": round(features.expense_ratio * 100, 2),
+            "savings_ratio": round(features.savings_ratio * 100, 2),
+            "debt_ratio": round(features.debt_ratio * 100, 2)
+        },
+        timestamp=get_timestamp(),
+        degraded=degraded
+    )
+
+
+def profile_survival(
+    features: ProfileFeatures,
+    job_stability: float
+) -> SurvivalSection:
+    """Survival section: rule probability plus stability-adjusted runway."""
+    probability, factors = survival_probability(
+        features.emergency_months, features.debt_to_income, features.savings_rate
+    )
+    months = predict_survival_months(
+        features.emergency_fund, features.expenses, job_stability / 10
+    )
+    return SurvivalSection(
+        probability=round(probability, 3),
+        months=round(months, 2),
+        category=categorize_survival(months),
+        factors=factors or ["Financial data analyzed"]
+    )
+
+
+def profile_layoff(features: ProfileFeatures) -> LayoffSection:
+    """Layoff section: one (cached) layoff model call."""
+    curves, _ = inference_gate.call(
+        "layoff", layoff_hazard.curve, layoff_hazard.fallback_curve, features.employment
+    )
+    return LayoffSection(
+        probability=round(float(curves.probability[0]), 3),
+        industry=str(features.employment.get("industry", "IT")),
+        experience_years=features.employment.get("experience_years", 1)
+    )
+
+
+def profile_savings(features: ProfileFeatures) -> SavingsSection:
+    """Savings section: one savings model call and the trajectory."""
+    return SavingsSection(
+        predicted_value=round(
+            inference_gate.predict("savings", savings_model, features.savings_plan)[0], 2
+        ),
+        months_to_project=features.savings_plan.get("months_to_project", 12),
+        trajectory=savings_trajectory(features.savings_plan)
+    )
+
+
+async def _timed_section(timings: Dict[str, float], name: str, func, *args):
+    """Run a profile section in a worker thread and record its duration."""
+    def run():
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    return await asyncio.to_thread(run)
+
+
+@app.post(
+    "/profile",
+    response_model=FinancialProfileResponse,
+    tags=["Financial Profile"]
+)
+@prioritized("interactive")
+async def financial_profile(request: FinancialProfileRequest):
+    """
+    Every dashboard score of one user in a single pass.
+
+    The request is validated once and one shared feature set feeds the
+    risk, survival, layoff, savings and allocation sections. Each model
+    runs once; independent sections run concurrently and the health score
+    reuses the risk score. ``timings_ms`` gives each section's duration.
+    """
+    start = time.perf_counter()
+    try:
+        try:
+            features = build_profile_features(
+                request.income, request.expenses, request.savings, request.debt,
+                emergency_fund=request.emergency_fund,
+                employment=request.employment,
+                savings_plan={"inflation_rate": request.inflation_rate, **request.savings_plan}
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        timings: Dict[str, float] = {}
+        risk, survival, layoff, savings, allocation = await asyncio.gather(
+            _timed_section(timings, "risk", profile_risk, features),
+            _timed_section(timings, "survival", profile_survival, features, request.job_stability),
+            _timed_section(timings, "layoff", profile_layoff, features),
+            _timed_section(timings, "savings", profile_savings, features),
+            _timed_section(timings, "allocation", allocate, request),
+        )
+
+        health_start = time.perf_counter()
+        health_score = calculate_health_score(features.risk_input, risk_score=risk.risk_score)
+        health = HealthSection(
+            score=round(health_score, 2),
+            category=categorize_score(health_score)
+        )
+        timings["health"] = round((time.perf_counter() - health_start) * 1000, 3)
+        timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+
+        logger.info("Financial profile built in %.3fms", timings["total"])
+        return FinancialProfileResponse(
+            risk=risk,
+            health=health,
+            survival=survival,
+            layoff=layoff,
+            savings=savings,
+            allocation=allocation,
+            timings_ms=timings,
+            timestamp=get_timestamp(),
+            degraded=is_degraded()
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("Financial profile failed: %s", str(e), exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Financial profile failed: {str(e)}"
+        ) from e
+
+
+# ============================================================================
+# WHAT-IF SIMULATION
+# ============================================================================
+
+def _what_if_simulation(request: WhatIfSimulationRequest) -> WhatIfSimulation:
+    return WhatIfSimulation(
+        request.current_income, request.current_expenses, request.current_savings,
+        request.current_debt, request.risk_tolerance.value, request.scenarios,
+        years=request.simulation_years, simulations=request.num_simulations, seed=request.seed
+    )
+
+
+@app.post(
+    "/what-if-simulation",
+    response_model=WhatIfSimulationResponse,
+    tags=["Predictions"]
+)
+@prioritized("interactive")
+@timed_executor
+def what_if_simulation(request: WhatIfSimulationRequest):
+    """
+    Monte Carlo projection of net worth under what-if scenarios.
+
+    Returns yearly percentile bands, the share of paths that never run out
+    of savings and final net worth statistics. Larger runs go through
+    ``POST /jobs/what-if-simulation``, which streams the bands as they refine.
+    """
+    result = _what_if_simulation(request).run(chunk_rows())
+    logger.info("What-if simulation ran %d paths", request.num_simulations)
+    return WhatIfSimulationResponse(**result, timestamp=get_timestamp())
+
+
+def what_if_job(request: WhatIfSimulationJobRequest, job: JobContext) -> Dict[str, Any]:
+    """
+    What-if simulation as an async job, publishing refined bands as it runs.
+
+    Bands are republished each time the completed paths double, so the
+    percentile work stays linear in the number of paths.
+    """
+    simulation = _what_if_simulation(request)
+    next_report = 0
+
+    def report(sim: WhatIfSimulation):
+        nonlocal next_report
+        if sim.completed < next_report:
+            job.checkpoint()
+            return
+        next_report = 2 * sim.completed
+        job.emit(sim.partial(), sim.completed / sim.simulations)
+
+    result = simulation.run(chunk_rows(), on_chunk=report)
+    return {**result, "timestamp": get_timestamp()}
+
+
+async_jobs.register(
+    "what-if-simulation", WhatIfSimulationJobRequest, what_if_job,
+    f"Monte Carlo what-if projection with up to {MAX_JOB_SIMULATIONS} paths"
+)
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
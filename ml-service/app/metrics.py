@@ -0,0 +1,509 @@
+"""
+CAPSTACK ML Metrics - Low-overhead instrumentation
+Counters, gauges and fixed-bucket histograms rendered in Prometheus text format
+"""
+
+import contextvars
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from .profiling import mark_handler_start, record_stage
+
+# Latency buckets in seconds, from 50µs to 10s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ASGI scope of the request being served, used to label serialization time
+_current_scope: contextvars.ContextVar = contextvars.ContextVar("metrics_scope", default=None)
+# Set while replaying synthetic traffic (warm-up) so it does not skew request
+# latency; request-scoped metrics ignore updates made while it is set
+SUPPRESS_REQUEST_METRICS: contextvars.ContextVar = contextvars.ContextVar(
+    "metrics_suppress_requests", default=False
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf overflow slot
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class _NullChild:
+    """Child handed out for request-scoped metrics while recording is suppressed"""
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+
+_NULL_CHILD = _NullChild()
+
+
+class _Metric:
+    """
+    Base class for labelled metrics.
+
+    Children are created once per label combination and cached, so hot
+    paths can keep a reference to a child and update it without lookups.
+    Updates take no locks: they rely on the GIL, and an increment racing
+    with another thread may occasionally be lost, which is acceptable for
+    monitoring data.
+
+    Request-scoped metrics are only updated by real traffic: while
+    SUPPRESS_REQUEST_METRICS is set, ``labels`` returns a child that
+    discards updates.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 request_scoped: bool = False):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.request_scoped = request_scoped
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        # Children keyed by the raw label values as passed by callers
+        self._lookup: Dict[Tuple[Any, ...], Any] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any):
+        if self.request_scoped and SUPPRESS_REQUEST_METRICS.get():
+            return _NULL_CHILD
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            key = tuple(str(v) for v in values)
+            child = self._children.setdefault(key, self._new_child())
+            self._lookup[values] = child
+        return child
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}")
+        return lines
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self._samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        request_scoped: bool = False,
+    ):
+        super().__init__(name, documentation, labelnames, request_scoped)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            counts = list(child.counts)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                request_scoped: bool = False) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, request_scoped))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        request_scoped: bool = False,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets, request_scoped))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("route", "method", "status"),
+    request_scoped=True,
+)
+MODEL_INFERENCE = REGISTRY.histogram(
+    "model_inference_seconds",
+    "Model inference time by model and version",
+    ("model", "version"),
+    request_scoped=True,
+)
+FEATURE_PREP = REGISTRY.histogram(
+    "feature_prep_seconds",
+    "Feature preparation and scaling time by model",
+    ("model",),
+    request_scoped=True,
+)
+SERIALIZATION = REGISTRY.histogram(
+    "response_serialization_seconds",
+    "JSON response rendering time by route",
+    ("route",),
+    request_scoped=True,
+)
+EXECUTOR_WAIT = REGISTRY.histogram(
+    "executor_queue_wait_seconds",
+    "Time sync handlers wait for a worker thread",
+    ("route",),
+    request_scoped=True,
+)
+WARMUP_DURATION = REGISTRY.gauge(
+    "warmup_duration_seconds",
+    "Startup warm-up time by phase (models, frontiers, routes, total)",
+    ("phase",),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ("cache", "result"),
+    request_scoped=True,
+)
+
+COALESCED_REQUESTS = REGISTRY.counter(
+    "singleflight_requests_total",
+    "Requests by route and single-flight role (leader computed, follower shared)",
+    ("route", "role"),
+    request_scoped=True,
+)
+COALESCING_RATIO = REGISTRY.gauge(
+    "singleflight_coalescing_ratio",
+    "Fraction of requests by route served from another request's computation",
+    ("route",),
+)
+
+INFERENCE_FALLBACKS = REGISTRY.counter(
+    "inference_fallbacks_total",
+    "Rule-based answers served instead of model inference, by model and reason "
+    "(deadline, saturated, timeout)",
+    ("model", "reason"),
+)
+SCHEDULER_QUEUE_DELAY = REGISTRY.histogram(
+    "scheduler_queue_delay_seconds",
+    "Time work waited for a scheduler slot, by priority class",
+    ("priority",),
+)
+SCHEDULER_ACTIVE = REGISTRY.gauge(
+    "scheduler_active_slots",
+    "Scheduler slots in use by priority class",
+    ("priority",),
+)
+SCHEDULER_PREEMPTIONS = REGISTRY.counter(
+    "scheduler_preemptions_total",
+    "Times work of a priority class yielded its slot between chunks to higher-priority work",
+    ("priority",),
+)
+FRAUD_CASCADE_DECISIONS = REGISTRY.counter(
+    "fraud_cascade_decisions_total",
+    "Fraud cascade transactions by outcome (stage-1 legitimate or fraud, escalated to the full model)",
+    ("decision",),
+)
+FRAUD_CASCADE_PASS_THROUGH = REGISTRY.gauge(
+    "fraud_cascade_pass_through_ratio",
+    "Fraction of cascade-scored transactions stage 1 passed to the full fraud model",
+)
+
+TRAINING_JOBS = REGISTRY.counter(
+    "training_jobs_total",
+    "Out-of-process training and generation jobs finished, by kind and status",
+    ("kind", "status"),
+)
+TRAINING_JOBS_RUNNING = REGISTRY.gauge(
+    "training_jobs_running",
+    "Job processes currently running",
+)
+ASYNC_JOBS = REGISTRY.counter(
+    "async_jobs_total",
+    "Async computation jobs finished, by kind and status",
+    ("kind", "status"),
+)
+ASYNC_JOB_PARTIALS = REGISTRY.counter(
+    "async_job_partial_results_total",
+    "Partial results published by async jobs, by kind",
+    ("kind",),
+)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    """Count cache lookups"""
+    if count:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+def record_fraud_cascade(legitimate: int, fraud: int, escalated: int):
+    """Count cascade outcomes and refresh the stage-1 pass-through ratio"""
+    children = [FRAUD_CASCADE_DECISIONS.labels(decision)
+                for decision in ("legitimate", "fraud", "escalated")]
+    for child, count in zip(children, (legitimate, fraud, escalated)):
+        child.inc(count)
+    total = sum(child.value for child in children)
+    if total:
+        FRAUD_CASCADE_PASS_THROUGH.set(children[2].value / total)
+
+
+def _route_label(scope: Optional[Dict[str, Any]]) -> str:
+    if scope is None:
+        return "unknown"
+    route = scope.get("route")
+    # Use the route template so path parameters do not explode cardinality
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or SUPPRESS_REQUEST_METRICS.get():
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        token = _current_scope.set(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_scope.reset(token)
+            REQUEST_LATENCY.labels(
+                _route_label(scope), scope["method"], status[0]
+            ).observe(time.perf_counter() - start)
+
+
+class InstrumentedJSONResponse(JSONResponse):
+    """JSONResponse that records rendering time"""
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = super().render(content)
+        elapsed = time.perf_counter() - start
+        SERIALIZATION.labels(_route_label(_current_scope.get())).observe(elapsed)
+        record_stage("serialization", elapsed)
+        return body
+
+
+def timed_executor(func: Callable) -> Callable:
+    """
+    Run a sync handler in the threadpool and record its queue wait.
+
+    FastAPI treats the wrapper as an async endpoint, so the time between
+    submitting the handler and a worker thread starting it is measured
+    exactly, without an extra threadpool hop.
+    """
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        submitted = time.perf_counter()
+        child = EXECUTOR_WAIT.labels(_route_label(_current_scope.get()))
+
+        def run():
+            waited = time.perf_counter() - submitted
+            child.observe(waited)
+            record_stage("executor_wait", waited)
+            mark_handler_start()
+            return func(*args, **kwargs)
+
+        return await run_in_threadpool(run)
+
+    return wrapper
+
+
+def render_metrics() -> str:
+    """Render all registered metrics in Prometheus text format"""
+    return REGISTRY.render()
+
+
+def benchmark_overhead(iterations: int = 200_000) -> Dict[str, float]:
+    """
+    Measure instrumentation cost in microseconds.
+
+    ``per_request_us`` covers what one instrumented request records: the
+    route latency, feature prep, inference and serialization histograms and
+    a cache counter.
+    """
+    registry = Registry()
+    hist = registry.histogram("bench_seconds", "bench", ("route",))
+    counter = registry.counter("bench_total", "bench", ("cache", "result"))
+    clock = time.perf_counter
+
+    start = clock()
+    for _ in range(iterations):
+        counter.labels("bench", "hit").inc()
+    counter_us = (clock() - start) / iterations * 1e6
+
+    start = clock()
+    for _ in range(iterations):
+        hist.labels("/bench").observe(0.0012)
+    histogram_us = (clock() - start) / iterations * 1e6
+
+    start = clock()
+    for _ in range(iterations):
+        t0 = clock()
+        hist.labels("/risk-score").observe(clock() - t0)
+        hist.labels("risk").observe(clock() - t0)
+        hist.labels("risk-v2").observe(clock() - t0)
+        hist.labels("/risk-score-ser").observe(clock() - t0)
+        counter.labels("risk", "miss").inc()
+    per_request_us = (clock() - start) / iterations * 1e6
+
+    return {
+        "counter_inc_us": round(counter_us, 3),
+        "histogram_observe_us": round(histogram_us, 3),
+        "per_request_us": round(per_request_us, 3),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(benchmark_overhead(), indent=2))
@@ -0,0 +1,84 @@
+"""
+CAPSTACK ML Model Registry - Serving artifact resolution
+Chooses between a full model and its slim variant for the request hot path
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .model_slimming import slim_paths
+
+logger = logging.getLogger(__name__)
+
+
+def serve_slim_models() -> bool:
+    return os.getenv("SERVE_SLIM_MODELS", "false").lower() in ("1", "true", "yes")
+
+
+def serving_path(model_path: Union[str, Path]) -> Path:
+    """
+    Path of the artifact to serve for ``model_path``.
+
+    The slim variant is used only when SERVE_SLIM_MODELS is enabled and the
+    slimming report next to it marks it as accepted.
+    """
+    model_path = Path(model_path)
+    if not serve_slim_models():
+        return model_path
+    slim_path, report_path = slim_paths(model_path)
+    if not (slim_path.exists() and report_path.exists()):
+        return model_path
+    try:
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Unreadable slim report %s: %s", report_path, str(e))
+        return model_path
+    if not report.get("accepted"):
+        return model_path
+    logger.info("Serving slim %s variant of %s", report.get("selected"), model_path.name)
+    return slim_path
+
+
+def _replace_atomically(path: Path, write) -> Path:
+    """Write through a temporary sibling and rename it over ``path``"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+def publish_artifact(obj: Any, path: Union[str, Path]) -> Path:
+    """
+    Save a model artifact so loaders never see a partial file.
+
+    Training jobs run in other processes and may be cancelled mid-write;
+    the artifact only replaces the served one once fully written.
+    """
+    import joblib
+
+    return _replace_atomically(Path(path), lambda tmp: joblib.dump(obj, tmp))
+
+
+def publish_manifest(data: Dict[str, Any], path: Union[str, Path],
+                     indent: Optional[int] = 2) -> Path:
+    """
+    Atomically write a JSON registry record (training results, job state)
+
+    NaN and infinities raise ValueError instead of being written as
+    non-standard JSON that clients cannot parse.
+    """
+    def write(tmp: Path):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, default=str, allow_nan=False)
+
+    return _replace_atomically(Path(path), write)
@@ -0,0 +1,389 @@
+"""
+CAPSTACK ML Model Slimming - Lighter serving models
+Greedy tree selection, boosting truncation and distillation with trade-off reports
+"""
+
+import copy
+import json
+import logging
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SLIM_SUFFIX = "_slim"
+
+
+class SurrogateModel:
+    """
+    Distilled stand-in for a tree ensemble.
+
+    The student regresses the teacher's output: the prediction itself for
+    regressors, the log-odds of the positive class for binary classifiers.
+    Exposes the ``predict``/``predict_proba`` surface the service calls.
+    """
+
+    def __init__(self, student, classes: Optional[np.ndarray], kind: str, teacher: str):
+        self.student = student
+        self.classes_ = classes
+        self.kind = kind
+        self.teacher = teacher
+        self.n_features_in_ = student.n_features_in_
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        positive = 1.0 / (1.0 + np.exp(-self.student.predict(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.classes_ is None:
+            return self.student.predict(X)
+        return self.classes_[(self.predict_proba(X)[:, 1] >= 0.5).astype(int)]
+
+    def __repr__(self) -> str:
+        return f"SurrogateModel({self.kind} student of {self.teacher})"
+
+
+def _is_classifier(model) -> bool:
+    return hasattr(model, "classes_") and hasattr(model, "predict_proba")
+
+
+def _teacher_output(model, X: np.ndarray) -> np.ndarray:
+    """Positive-class probability for classifiers, prediction for regressors"""
+    if _is_classifier(model):
+        return model.predict_proba(X)[:, 1]
+    return model.predict(X)
+
+
+def _quality(model, X: np.ndarray, y: np.ndarray) -> float:
+    """ROC-AUC for classifiers, R² for regressors (higher is better)"""
+    from sklearn.metrics import r2_score, roc_auc_score
+
+    if _is_classifier(model):
+        return float(roc_auc_score(y, model.predict_proba(X)[:, 1]))
+    return float(r2_score(y, model.predict(X)))
+
+
+def _is_bagged_forest(model) -> bool:
+    # Boosted models depend on tree order; only bagged trees can be subset freely
+    return (
+        hasattr(model, "estimators_")
+        and not hasattr(model, "init_")
+        and not hasattr(model, "get_booster")
+        and not hasattr(model, "estimators_features_")
+    )
+
+
+def greedy_select_trees(model, X_val: np.ndarray, y_val: np.ndarray,
+                        tolerance: float = 0.005, max_trees: Optional[int] = None,
+                        min_trees: int = 5) -> Tuple[List[int], List[Dict[str, float]]]:
+    """
+    Forward-select trees of a bagged forest against a validation set.
+
+    Each step adds the tree whose inclusion most lowers the squared error of
+    the averaged prediction (Brier score for classifiers), which is cheap to
+    evaluate for all candidates at once. Selection stops once the subset's
+    quality (ROC-AUC or R²) is within ``tolerance`` of the full forest.
+    """
+    from sklearn.metrics import r2_score, roc_auc_score
+
+    classifier = _is_classifier(model)
+    positive = 1 if classifier else None
+    if classifier:
+        outputs = np.stack([est.predict_proba(X_val)[:, positive] for est in model.estimators_])
+    else:
+        outputs = np.stack([est.predict(X_val) for est in model.estimators_])
+    target = np.asarray(y_val, dtype=np.float64)
+
+    def quality(mean_output):
+        if classifier:
+            return float(roc_auc_score(target, mean_output))
+        return float(r2_score(target, mean_output))
+
+    full_quality = quality(outputs.mean(axis=0))
+    limit = max_trees or len(outputs)
+    selected: List[int] = []
+    remaining = np.ones(len(outputs), dtype=bool)
+    running = np.zeros(outputs.shape[1])
+    history = []
+    while len(selected) < limit:
+        k = len(selected) + 1
+        candidates = (running[None, :] + outputs) / k
+        errors = ((candidates - target[None, :]) ** 2).mean(axis=1)
+        errors[~remaining] = np.inf
+        best = int(np.argmin(errors))
+        selected.append(best)
+        remaining[best] = False
+        running += outputs[best]
+        subset_quality = quality(running / k)
+        history.append({"trees": k, "quality": round(subset_quality, 6)})
+        if k >= min_trees and subset_quality >= full_quality - tolerance:
+            break
+    logger.info("Greedy selection kept %d of %d trees (quality %.4f vs %.4f)",
+                len(selected), len(outputs), history[-1]["quality"], full_quality)
+    return selected, history
+
+
+def subset_forest(model, indices: Sequence[int]):
+    """Copy of a bagged forest keeping only the trees in ``indices``"""
+    slim = copy.copy(model)
+    slim.estimators_ = [model.estimators_[i] for i in indices]
+    slim.n_estimators = len(slim.estimators_)
+    return slim
+
+
+def truncate_boosting(model, X_val: np.ndarray, y_val: np.ndarray,
+                      tolerance: float = 0.005, step: int = 10):
+    """
+    Shortest prefix of a boosted ensemble within ``tolerance`` of its quality.
+
+    Boosting stages correct earlier ones, so trees cannot be dropped out of
+    order; the best that can be done is to stop early.
+    """
+    full_quality = _quality(model, X_val, y_val)
+    if hasattr(model, "get_booster"):
+        total = model.get_booster().num_boosted_rounds()
+    else:
+        total = len(model.estimators_)
+
+    for n_trees in list(range(step, total, step)) + [total]:
+        candidate = _boosting_prefix(model, n_trees)
+        if _quality(candidate, X_val, y_val) >= full_quality - tolerance:
+            logger.info("Boosting truncated to %d of %d rounds", n_trees, total)
+            return candidate, n_trees
+    return model, total
+
+
+def _boosting_prefix(model, n_trees: int):
+    slim = copy.copy(model)
+    if hasattr(model, "get_booster"):
+        slim = copy.deepcopy(model)
+        slim._Booster = model.get_booster()[:n_trees]  # pylint: disable=protected-access
+        slim.n_estimators = n_trees
+        return slim
+    slim.estimators_ = model.estimators_[:n_trees]
+    slim.n_estimators = n_trees
+    if hasattr(model, "train_score_"):
+        slim.train_score_ = model.train_score_[:n_trees]
+    return slim
+
+
+def distill(teacher, X_transfer: np.ndarray, kind: str = "boosted",
+            noise: float = 0.1, copies: int = 2, seed: int = 0) -> SurrogateModel:
+    """
+    Fit a shallow boosted or linear student on the teacher's outputs.
+
+    The transfer set is augmented with jittered copies of its rows (in the
+    scaled feature space) so the student also sees the teacher's behaviour
+    between training points.
+    """
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.linear_model import Ridge
+
+    rng = np.random.default_rng(seed)
+    jittered = [X_transfer + rng.normal(scale=noise, size=X_transfer.shape) for _ in range(copies)]
+    X_aug = np.vstack([X_transfer] + jittered)
+    target = _teacher_output(teacher, X_aug)
+    classifier = _is_classifier(teacher)
+    if classifier:
+        clipped = np.clip(target, 1e-4, 1 - 1e-4)
+        target = np.log(clipped / (1 - clipped))
+
+    if kind == "boosted":
+        student = HistGradientBoostingRegressor(max_iter=100, max_depth=4, learning_rate=0.1,
+                                                random_state=seed)
+    elif kind == "linear":
+        student = Ridge(alpha=1.0)
+    else:
+        raise ValueError(f"Unknown distillation kind: {kind}")
+    student.fit(X_aug, target)
+    return SurrogateModel(student, getattr(teacher, "classes_", None) if classifier else None,
+                          kind, type(teacher).__name__)
+
+
+def _tree_count(model) -> Optional[int]:
+    if hasattr(model, "get_booster"):
+        return model.get_booster().num_boosted_rounds()
+    if hasattr(model, "estimators_"):
+        return int(np.size(model.estimators_))
+    return None
+
+
+def _latency(predict: Callable, X: np.ndarray, repeat: int = 200) -> Dict[str, float]:
+    row = X[:1]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - start)
+    batch = X[:1000]
+    start = time.perf_counter()
+    predict(batch)
+    return {
+        "single_row_p50_ms": round(float(np.median(timings)) * 1000, 4),
+        "batch_1000_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def evaluate(model, teacher, X_val: np.ndarray, y_val: np.ndarray) -> Dict[str, Any]:
+    """Quality, fidelity to the teacher, latency and size of a candidate"""
+    classifier = _is_classifier(teacher)
+    predict = model.predict_proba if classifier else model.predict
+    output = _teacher_output(model, X_val)
+    reference = _teacher_output(teacher, X_val)
+    if classifier:
+        fidelity = float(np.mean((output >= 0.5) == (reference >= 0.5)))
+    else:
+        fidelity = float(np.corrcoef(output, reference)[0, 1])
+    return {
+        "quality": round(_quality(model, X_val, y_val), 6),
+        "quality_metric": "roc_auc" if classifier else "r2",
+        "fidelity": round(fidelity, 6),
+        "trees": _tree_count(model),
+        "size_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        **_latency(predict, X_val),
+    }
+
+
+def slim_model(model, X_transfer: np.ndarray, X_val: np.ndarray, y_val: np.ndarray,
+               tolerance: float = 0.005,
+               distill_kinds: Sequence[str] = ("boosted", "linear")) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Build slim candidates and pick the fastest one within ``tolerance``.
+
+    Returns the chosen model (None when no candidate qualifies) and a report
+    of every candidate's accuracy/latency trade-off.
+    """
+    candidates: Dict[str, Any] = {}
+    details: Dict[str, Any] = {}
+    if _is_bagged_forest(model):
+        indices, history = greedy_select_trees(model, X_val, y_val, tolerance)
+        candidates["greedy_subset"] = subset_forest(model, indices)
+        details["greedy_subset"] = {"tree_indices": indices, "history": history}
+    elif hasattr(model, "get_booster") or hasattr(model, "init_"):
+        candidates["truncated"], _ = truncate_boosting(model, X_val, y_val, tolerance)
+    for kind in distill_kinds:
+        candidates[f"distilled_{kind}"] = distill(model, X_transfer, kind)
+
+    full = evaluate(model, model, X_val, y_val)
+    report: Dict[str, Any] = {
+        "model": type(model).__name__,
+        "tolerance": tolerance,
+        "validation_rows": int(len(X_val)),
+        "full": full,
+        "candidates": {},
+    }
+    best_name, best_latency = None, full["single_row_p50_ms"]
+    for name, candidate in candidates.items():
+        metrics = evaluate(candidate, model, X_val, y_val)
+        metrics["within_tolerance"] = metrics["quality"] >= full["quality"] - tolerance
+        metrics.update(details.get(name, {}))
+        report["candidates"][name] = metrics
+        if metrics["within_tolerance"] and metrics["single_row_p50_ms"] < best_latency:
+            best_name, best_latency = name, metrics["single_row_p50_ms"]
+
+    report["selected"] = best_name
+    report["accepted"] = best_name is not None
+    return (candidates[best_name] if best_name else None), report
+
+
+def slim_paths(model_path: Path) -> Tuple[Path, Path]:
+    """Paths of the slim model and its report next to ``model_path``"""
+    model_path = Path(model_path)
+    stem = model_path.stem + SLIM_SUFFIX
+    return model_path.with_name(stem + ".pkl"), model_path.with_name(stem + "_report.json")
+
+
+def save_slim(model_path: Path, slim, report: Dict[str, Any]):
+    """Write the slim model (if any) and its report next to the full model"""
+    import joblib
+
+    slim_path, report_path = slim_paths(model_path)
+    if slim is not None:
+        joblib.dump(slim, slim_path)
+        report["slim_path"] = str(slim_path)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Slim report for %s written to %s", model_path, report_path)
+
+
+def _fraud_dataset(n_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    from app.security.real_world_data_generator import RealWorldDataGenerator
+
+    df = RealWorldDataGenerator(seed=11).generate_fraud_detection_dataset(n_samples)
+    # Column order of the enhanced fraud model's training features
+    columns = [
+        "amount", "geographic_distance", "time_since_last_tx", "velocity_check",
+        "ip_risk_score", "transaction_risk_score", "account_age_days",
+        "amount_deviation", "device_mismatch",
+    ]
+    return df[columns].to_numpy(dtype=np.float64), df["is_fraud"].to_numpy()
+
+
+def _service_model(name: str):
+    """Path, model, scaler and dataset builder of a slimmable service model"""
+    import joblib
+
+    from app import train
+    from app.models import MODEL_DIR
+
+    if name == "fraud":
+        from app.routers.enhanced_security import MODEL_DIR as FRAUD_DIR
+
+        path = Path(FRAUD_DIR) / "fraud_detection_simple.pkl"
+        scaler = joblib.load(Path(FRAUD_DIR) / "fraud_detection_scaler.pkl")
+        return path, joblib.load(path), scaler, _fraud_dataset
+    generators = {
+        "risk": train.generate_risk_training_data,
+        "layoff": train.generate_layoff_training_data,
+        "savings": train.generate_savings_training_data,
+    }
+    if name not in generators:
+        raise ValueError(f"Unknown model: {name}")
+    path = MODEL_DIR / f"{name}_model.pkl"
+    scaler = joblib.load(MODEL_DIR / f"{name}_scaler.pkl")
+    return path, joblib.load(path), scaler, lambda n: generators[name](n_samples=n)
+
+
+def slim_service_model(name: str, n_samples: int = 20000, tolerance: float = 0.005,
+                       distill_kinds: Sequence[str] = ("boosted", "linear")) -> Dict[str, Any]:
+    """Slim one of the service's saved models and save the result beside it"""
+    import warnings
+
+    path, model, scaler, dataset = _service_model(name)
+    X, y = dataset(n_samples)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        X_scaled = scaler.transform(X)
+    split = len(X_scaled) // 2
+    slim, report = slim_model(model, X_scaled[:split], X_scaled[split:], y[split:],
+                              tolerance, distill_kinds)
+    save_slim(path, slim, report)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build slim serving models")
+    parser.add_argument("models", nargs="+", choices=("fraud", "risk", "layoff", "savings"))
+    parser.add_argument("--samples", type=int, default=20000,
+                        help="rows generated for distillation and validation")
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="allowed drop in ROC-AUC / R² versus the full model")
+    parser.add_argument("--distill", default="boosted,linear",
+                        help="comma-separated student kinds, or 'none'")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    kinds = [] if args.distill == "none" else [k for k in args.distill.split(",") if k]
+    for model_name in args.models:
+        result = slim_service_model(model_name, args.samples, args.tolerance, kinds)
+        summary = {name: {k: c[k] for k in ("quality", "trees", "single_row_p50_ms",
+                                            "size_bytes", "within_tolerance")}
+                   for name, c in result["candidates"].items()}
+        print(json.dumps({"model": model_name, "full": result["full"],
+                          "selected": result["selected"], "candidates": summary}, indent=2))
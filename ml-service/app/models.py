@@ -3,34 +3,128 @@ CAPSTACK ML Models - Advanced Machine Learning Models
 Trained models for financial prediction and risk assessment
 """
 
+import importlib.util
 import json
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
 import numpy as np
-from sklearn.ensemble import (  # type: ignore
-    RandomForestRegressor,
-    GradientBoostingClassifier,
-)
-from sklearn.preprocessing import StandardScaler  # type: ignore
-import joblib
+
+from .compiled_trees import CompiledForest, maybe_compile
+from .core.savings_projection import future_values
+from .metrics import FEATURE_PREP, MODEL_INFERENCE
+from .model_registry import serving_path
+from .profiling import record_stage
 
 logger = logging.getLogger(__name__)
 
 MODEL_DIR = Path("app/models")
 MODEL_DIR.mkdir(exist_ok=True)
 
+# Checked without importing xgboost, which costs hundreds of milliseconds
+HAS_XGBOOST = importlib.util.find_spec("xgboost") is not None
+
+
+class _LazyEstimatorModel:
+    """
+    Base class deferring sklearn/xgboost imports until an estimator is used.
+
+    The untrained estimator and scaler are only built when training touches
+    them, so constructing the module-level singletons and serving
+    rule-based predictions never imports the ML libraries.
+    """
+
+    def __init__(self):
+        self._model = None
+        self._scaler = None
+        self.is_trained = False
+        # Bumped whenever the served estimator changes (load or retrain), so
+        # caches of its predictions know to drop them
+        self.generation = 0
+
+    def _build_model(self):
+        raise NotImplementedError
+
+    def fallback(self, data: Dict[str, Any]):
+        """Rule-based answer, served when the model is untrained or out of time"""
+        raise NotImplementedError
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._build_model()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler  # type: ignore
+            self._scaler = StandardScaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, value):
+        self._scaler = value
+
+    def _save_artifacts(self, name: str):
+        if isinstance(self._model, CompiledForest):
+            raise ValueError("Compiled models are serving-only; save the float64 model")
+        import joblib
+        model_path = MODEL_DIR / f"{name}_model.pkl"
+        joblib.dump(self.model, model_path)
+        joblib.dump(self.scaler, MODEL_DIR / f"{name}_scaler.pkl")
+        with open(MODEL_DIR / f"{name}_metadata.json", "w", encoding="utf-8") as f:
+            json.dump(self.metadata, f, indent=2)
+        return model_path
+
+    def _load_artifacts(self, name: str) -> bool:
+        model_path = MODEL_DIR / f"{name}_model.pkl"
+        scaler_path = MODEL_DIR / f"{name}_scaler.pkl"
+        if not (model_path.exists() and scaler_path.exists()):
+            return False
+        import joblib
+        # SERVE_SLIM_MODELS may pick the slim variant, INFERENCE_PRECISION
+        # may then swap it for a compiled float32 one
+        served_path = serving_path(model_path)
+        self.model = maybe_compile(joblib.load(served_path))
+        self.scaler = joblib.load(scaler_path)
+        self.is_trained = True
+        self.generation += 1
+        if served_path != model_path:
+            self.metadata["variant"] = "slim"
+        if isinstance(self.model, CompiledForest):
+            self.metadata["inference_precision"] = self.model.precision
+        return True
+
 
-class FinancialRiskModel:
+class FinancialRiskModel(_LazyEstimatorModel):
     """Enhanced Risk scoring model using advanced ensemble methods"""
 
     def __init__(self):
+        super().__init__()
+        self.metadata = {
+            "version": "2.0.0",
+            "created": datetime.utcnow().isoformat(),
+            "accuracy_score": 0.0,
+            "model_type": "XGBoost" if HAS_XGBOOST else "RandomForest",
+            "features": [
+                "income", "expenses", "savings", "debt",
+                "debt_to_income", "savings_to_income", "expense_to_income"
+            ]
+        }
+
+    def _build_model(self):
         # Use XGBoost for better performance
-        try:
+        if HAS_XGBOOST:
             from xgboost import XGBRegressor
-            self.model = XGBRegressor(
+            return XGBRegressor(
                 n_estimators=200,
                 max_depth=8,
                 learning_rate=0.05,
@@ -42,31 +136,17 @@ class FinancialRiskModel:
                 reg_alpha=0.1,
                 reg_lambda=0.1
             )
-        except ImportError:
-            # Fallback to RandomForest if XGBoost not available
-            self.model = RandomForestRegressor(
-                n_estimators=200,
-                max_depth=12,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1,
-                max_features='sqrt'
-            )
-        self.scaler = StandardScaler()
-        self.is_trained = False
-        has_booster = hasattr(self.model, 'booster')
-        model_type = "XGBoost" if has_booster else "RandomForest"
-        self.metadata = {
-            "version": "2.0.0",
-            "created": datetime.utcnow().isoformat(),
-            "accuracy_score": 0.0,
-            "model_type": model_type,
-            "features": [
-                "income", "expenses", "savings", "debt",
-                "debt_to_income", "savings_to_income", "expense_to_income"
-            ]
-        }
+        # Fallback to RandomForest if XGBoost not available
+        from sklearn.ensemble import RandomForestRegressor  # type: ignore
+        return RandomForestRegressor(
+            n_estimators=200,
+            max_depth=12,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1,
+            max_features='sqrt'
+        )
 
     def prepare_features(self, data: Dict[str, float]) -> np.ndarray:
         """Prepare input features for prediction"""
@@ -85,11 +165,65 @@ class FinancialRiskModel:
         """Predict risk score"""
         if not self.is_trained:
             return self._rule_based_risk(data)
+        start = time.perf_counter()
         features = self.prepare_features(data)
         scaled = self.scaler.transform(features)
+        prepared = time.perf_counter()
         score = self.model.predict(scaled)[0]
+        finished = time.perf_counter()
+        FEATURE_PREP.labels("risk").observe(prepared - start)
+        MODEL_INFERENCE.labels("risk", self.metadata["version"]).observe(finished - prepared)
+        record_stage("feature_prep", prepared - start)
+        record_stage("inference", finished - prepared)
         return min(max(score, 0), 100)
 
+    @staticmethod
+    def prepare_features_batch(data: Dict[str, np.ndarray]) -> np.ndarray:
+        """Feature matrix of prepare_features for columns of users"""
+        income = np.asarray(data["income"], dtype=np.float64)
+        expenses = np.asarray(data["expenses"], dtype=np.float64)
+        savings = np.asarray(data["savings"], dtype=np.float64)
+        debt = np.asarray(data["debt"], dtype=np.float64)
+        divisor = np.maximum(income, 1)
+        return np.column_stack([
+            income, expenses, savings, debt,
+            debt / divisor, savings / divisor, expenses / divisor
+        ])
+
+    def predict_batch(self, data: Dict[str, np.ndarray]) -> np.ndarray:
+        """Predict risk scores for columns of users in one model call"""
+        if not self.is_trained:
+            return self._rule_based_risk_batch(data)
+        start = time.perf_counter()
+        scaled = self.scaler.transform(self.prepare_features_batch(data))
+        prepared = time.perf_counter()
+        scores = self.model.predict(scaled)
+        finished = time.perf_counter()
+        FEATURE_PREP.labels("risk").observe(prepared - start)
+        MODEL_INFERENCE.labels("risk", self.metadata["version"]).observe(finished - prepared)
+        record_stage("feature_prep", prepared - start)
+        record_stage("inference", finished - prepared)
+        return np.clip(np.asarray(scores, dtype=np.float64), 0, 100)
+
+    @staticmethod
+    def _rule_based_risk_batch(data: Dict[str, np.ndarray]) -> np.ndarray:
+        """Vectorized _rule_based_risk"""
+        income = np.asarray(data["income"], dtype=np.float64)
+        positive = income > 0
+        safe_income = np.where(positive, income, 1.0)
+        expense_ratio = np.where(positive, np.asarray(data["expenses"], dtype=np.float64) / safe_income, 1.0)
+        savings_ratio = np.where(positive, np.asarray(data["savings"], dtype=np.float64) / safe_income, 0.0)
+        debt_ratio = np.where(positive, np.asarray(data["debt"], dtype=np.float64) / safe_income, 1.0)
+        risk = (
+            (expense_ratio * 0.5) +
+            ((1 - savings_ratio) * 0.3) +
+            (debt_ratio * 0.2)
+        ) * 100
+        return np.clip(risk, 0, 100)
+
+    def fallback(self, data: Dict[str, float]) -> float:
+        return self._rule_based_risk(data)
+
     @staticmethod
     def _rule_based_risk(data: Dict[str, float]) -> float:
         """Fallback rule-based calculation"""
@@ -110,31 +244,19 @@ class FinancialRiskModel:
         X_scaled = self.scaler.fit_transform(X)
         self.model.fit(X_scaled, y)
         self.is_trained = True
+        self.generation += 1
         accuracy = self.model.score(X_scaled, y)
         self.metadata["accuracy_score"] = float(accuracy)
         logger.info("Risk model trained with accuracy: %.3f", accuracy)
 
     def save(self):
         """Save model to disk"""
-        model_path = MODEL_DIR / "risk_model.pkl"
-        scaler_path = MODEL_DIR / "risk_scaler.pkl"
-        metadata_path = MODEL_DIR / "risk_metadata.json"
-
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.scaler, scaler_path)
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        model_path = self._save_artifacts("risk")
         logger.info("Risk model saved to %s", model_path)
 
     def load(self):
         """Load model from disk"""
-        model_path = MODEL_DIR / "risk_model.pkl"
-        scaler_path = MODEL_DIR / "risk_scaler.pkl"
-
-        if model_path.exists() and scaler_path.exists():
-            self.model = joblib.load(model_path)
-            self.scaler = joblib.load(scaler_path)
-            self.is_trained = True
+        if self._load_artifacts("risk"):
             logger.info("Risk model loaded successfully")
         else:
             logger.warning(
@@ -142,41 +264,59 @@ class FinancialRiskModel:
             )
 
 
-class LayoffRiskModel:
+class LayoffRiskModel(_LazyEstimatorModel):
     """Layoff risk prediction using gradient boosting"""
 
+    INDUSTRY_CODES = {
+        "IT": 1,
+        "Manufacturing": 2,
+        "Retail": 3,
+        "Finance": 4,
+        "Healthcare": 5
+    }
+    # Defaults of prepare_features for missing columns
+    FEATURE_DEFAULTS = {
+        "experience_years": 5,
+        "company_age": 10,
+        "team_size": 10,
+        "performance_rating": 3
+    }
+    # Base risk per industry of the rule-based fallback
+    RULE_INDUSTRY_RISK = {
+        "IT": 0.15,
+        "Manufacturing": 0.25,
+        "Retail": 0.35,
+        "Finance": 0.20,
+        "Healthcare": 0.10
+    }
+
     def __init__(self):
-        self.model = GradientBoostingClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
-        self.scaler = StandardScaler()
-        self.is_trained = False
+        super().__init__()
         self.metadata = {
             "version": "1.0.0",
             "created": datetime.utcnow().isoformat(),
             "accuracy_score": 0.0
         }
 
+    def _build_model(self):
+        from sklearn.ensemble import GradientBoostingClassifier  # type: ignore
+        return GradientBoostingClassifier(
+            n_estimators=100,
+            learning_rate=0.1,
+            max_depth=5,
+            random_state=42
+        )
+
     def prepare_features(self, data: Dict[str, Any]) -> np.ndarray:
         """Prepare input features"""
-        industry_map = {
-            "IT": 1,
-            "Manufacturing": 2,
-            "Retail": 3,
-            "Finance": 4,
-            "Healthcare": 5
-        }
-
+        defaults = self.FEATURE_DEFAULTS
         features = [
-            industry_map.get(data.get("industry", "IT"), 1),
-            data.get("experience_years", 5),
-            data.get("company_age", 10),
-            data.get("team_size", 10),
+            self.INDUSTRY_CODES.get(data.get("industry", "IT"), 1),
+            data.get("experience_years", defaults["experience_years"]),
+            data.get("company_age", defaults["company_age"]),
+            data.get("team_size", defaults["team_size"]),
             1 if data.get("contract_type") == "permanent" else 0,
-            data.get("performance_rating", 3)
+            data.get("performance_rating", defaults["performance_rating"])
         ]
         return np.array(features).reshape(1, -1)
 
@@ -184,23 +324,79 @@ class LayoffRiskModel:
         """Predict layoff risk"""
         if not self.is_trained:
             return self._rule_based_risk(data)
+        start = time.perf_counter()
         features = self.prepare_features(data)
         scaled = self.scaler.transform(features)
+        prepared = time.perf_counter()
         prob = self.model.predict_proba(scaled)[0, 1]
+        finished = time.perf_counter()
+        FEATURE_PREP.labels("layoff").observe(prepared - start)
+        MODEL_INFERENCE.labels("layoff", self.metadata["version"]).observe(finished - prepared)
+        record_stage("feature_prep", prepared - start)
+        record_stage("inference", finished - prepared)
         return float(prob)
 
-    @staticmethod
-    def _rule_based_risk(data: Dict[str, Any]) -> float:
+    @classmethod
+    def prepare_features_batch(cls, data: Dict[str, Any]) -> np.ndarray:
+        """Feature matrix of prepare_features for columns of users"""
+        n = len(next(iter(data.values())))
+        industry = np.asarray(data.get("industry", ["IT"] * n), dtype=object)
+        industry_codes = np.ones(n)
+        for name, code in cls.INDUSTRY_CODES.items():
+            industry_codes[industry == name] = code
+        columns = [industry_codes]
+        for name in ("experience_years", "company_age", "team_size"):
+            columns.append(np.asarray(data.get(name, np.full(n, cls.FEATURE_DEFAULTS[name])), dtype=np.float64))
+        contract = np.asarray(data.get("contract_type", [None] * n), dtype=object)
+        columns.append((contract == "permanent").astype(np.float64))
+        columns.append(np.asarray(
+            data.get("performance_rating", np.full(n, cls.FEATURE_DEFAULTS["performance_rating"])),
+            dtype=np.float64
+        ))
+        return np.column_stack(columns)
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """Layoff probabilities of prepared feature rows in one ensemble pass"""
+        start = time.perf_counter()
+        scaled = self.scaler.transform(features)
+        prepared = time.perf_counter()
+        probabilities = self.model.predict_proba(scaled)[:, 1]
+        finished = time.perf_counter()
+        FEATURE_PREP.labels("layoff").observe(prepared - start)
+        MODEL_INFERENCE.labels("layoff", self.metadata["version"]).observe(finished - prepared)
+        record_stage("feature_prep", prepared - start)
+        record_stage("inference", finished - prepared)
+        return np.asarray(probabilities, dtype=np.float64)
+
+    def predict_batch(self, data: Dict[str, Any]) -> np.ndarray:
+        """Predict layoff risk for columns of users"""
+        if not self.is_trained:
+            return self._rule_based_risk_batch(data)
+        return self.predict_features(self.prepare_features_batch(data))
+
+    def fallback(self, data: Dict[str, Any]) -> float:
+        return self._rule_based_risk(data)
+
+    def fallback_batch(self, data: Dict[str, Any]) -> np.ndarray:
+        return self._rule_based_risk_batch(data)
+
+    @classmethod
+    def _rule_based_risk_batch(cls, data: Dict[str, Any]) -> np.ndarray:
+        """Vectorized _rule_based_risk"""
+        n = len(next(iter(data.values())))
+        industry = np.asarray(data.get("industry", ["IT"] * n), dtype=object)
+        base_risk = np.full(n, 0.2)
+        for name, risk in cls.RULE_INDUSTRY_RISK.items():
+            base_risk[industry == name] = risk
+        experience = np.maximum(1, np.asarray(data.get("experience_years", np.ones(n)), dtype=np.float64))
+        experience_factor = np.maximum(0.5, experience / 10)
+        return np.minimum(base_risk / experience_factor, 0.9)
+
+    @classmethod
+    def _rule_based_risk(cls, data: Dict[str, Any]) -> float:
         """Fallback rule-based calculation"""
-        industry_risk = {
-            "IT": 0.15,
-            "Manufacturing": 0.25,
-            "Retail": 0.35,
-            "Finance": 0.20,
-            "Healthcare": 0.10
-        }
         industry = data.get("industry", "IT")
-        base_risk = industry_risk.get(industry, 0.2)
+        base_risk = cls.RULE_INDUSTRY_RISK.get(industry, 0.2)
         experience = max(1, data.get("experience_years", 1))
         experience_factor = max(0.5, experience / 10)
         risk = base_risk / experience_factor
@@ -211,31 +407,19 @@ class LayoffRiskModel:
         X_scaled = self.scaler.fit_transform(X)
         self.model.fit(X_scaled, y)
         self.is_trained = True
+        self.generation += 1
         accuracy = self.model.score(X_scaled, y)
         self.metadata["accuracy_score"] = float(accuracy)
         logger.info("Layoff risk model trained with accuracy: %.3f", accuracy)
 
     def save(self):
         """Save model to disk"""
-        model_path = MODEL_DIR / "layoff_model.pkl"
-        scaler_path = MODEL_DIR / "layoff_scaler.pkl"
-        metadata_path = MODEL_DIR / "layoff_metadata.json"
-
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.scaler, scaler_path)
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        model_path = self._save_artifacts("layoff")
         logger.info("Layoff model saved to %s", model_path)
 
     def load(self):
         """Load model from disk"""
-        model_path = MODEL_DIR / "layoff_model.pkl"
-        scaler_path = MODEL_DIR / "layoff_scaler.pkl"
-
-        if model_path.exists() and scaler_path.exists():
-            self.model = joblib.load(model_path)
-            self.scaler = joblib.load(scaler_path)
-            self.is_trained = True
+        if self._load_artifacts("layoff"):
             logger.info("Layoff model loaded successfully")
         else:
             logger.warning(
@@ -243,24 +427,26 @@ class LayoffRiskModel:
             )
 
 
-class SavingsProjectionModel:
+class SavingsProjectionModel(_LazyEstimatorModel):
     """Savings trajectory prediction"""
 
     def __init__(self):
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=12,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.scaler = StandardScaler()
-        self.is_trained = False
+        super().__init__()
         self.metadata = {
             "version": "1.0.0",
             "created": datetime.utcnow().isoformat(),
             "r2_score": 0.0
         }
 
+    def _build_model(self):
+        from sklearn.ensemble import RandomForestRegressor  # type: ignore
+        return RandomForestRegressor(
+            n_estimators=100,
+            max_depth=12,
+            random_state=42,
+            n_jobs=-1
+        )
+
     def prepare_features(self, data: Dict[str, Any]) -> np.ndarray:
         """Prepare input features"""
         features = [
@@ -277,63 +463,53 @@ class SavingsProjectionModel:
         """Predict future savings"""
         if not self.is_trained:
             return self._calculate_projection(data)
+        start = time.perf_counter()
         features = self.prepare_features(data)
         scaled = self.scaler.transform(features)
+        prepared = time.perf_counter()
         value = self.model.predict(scaled)[0]
+        finished = time.perf_counter()
+        FEATURE_PREP.labels("savings").observe(prepared - start)
+        MODEL_INFERENCE.labels("savings", self.metadata["version"]).observe(finished - prepared)
+        record_stage("feature_prep", prepared - start)
+        record_stage("inference", finished - prepared)
         return max(0, float(value))
 
+    def fallback(self, data: Dict[str, Any]) -> float:
+        return self._calculate_projection(data)
+
     @staticmethod
     def _calculate_projection(data: Dict[str, Any]) -> float:
         """Fallback projection calculation using vectorized operations"""
         current = data.get("current_savings", 0)
         monthly = data.get("monthly_savings", 0)
-        ret = data.get("expected_return", 7) / 100 / 12
+        annual_return = data.get("expected_return", 7)
         months = data.get("months_to_project", 12)
 
         if months <= 0:
             return current
 
-        # Vectorized calculation for compound growth
-        # Future value = current * (1+r)^n + monthly * ((1+r)^n - 1)/r
-        if ret == 0:
-            future = current + monthly * months
-        else:
-            growth_factor = (1 + ret) ** months
-            monthly_component = monthly * (growth_factor - 1) / ret
-            future = current * growth_factor + monthly_component
-
-        return future
+        # Same closed form and contribution timing as the model's labels
+        return float(future_values(current, monthly, annual_return, months))
 
     def train(self, X: np.ndarray, y: np.ndarray):
         """Train the model"""
         X_scaled = self.scaler.fit_transform(X)
         self.model.fit(X_scaled, y)
         self.is_trained = True
+        self.generation += 1
         r2_score = self.model.score(X_scaled, y)
         self.metadata["r2_score"] = float(r2_score)
         logger.info("Savings model trained with R² score: %.3f", r2_score)
 
     def save(self):
         """Save model to disk"""
-        model_path = MODEL_DIR / "savings_model.pkl"
-        scaler_path = MODEL_DIR / "savings_scaler.pkl"
-        metadata_path = MODEL_DIR / "savings_metadata.json"
-
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.scaler, scaler_path)
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2)
+        model_path = self._save_artifacts("savings")
         logger.info("Savings model saved to %s", model_path)
 
     def load(self):
         """Load model from disk"""
-        model_path = MODEL_DIR / "savings_model.pkl"
-        scaler_path = MODEL_DIR / "savings_scaler.pkl"
-
-        if model_path.exists() and scaler_path.exists():
-            self.model = joblib.load(model_path)
-            self.scaler = joblib.load(scaler_path)
-            self.is_trained = True
+        if self._load_artifacts("savings"):
             logger.info("Savings model loaded successfully")
         else:
             logger.warning(
@@ -0,0 +1,216 @@
+"""
+CAPSTACK ML Profiling - Live worker diagnostics
+Time-bounded sampling profiler and opt-in per-request stage tracing
+"""
+
+import collections
+import contextvars
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request header that enables stage tracing for a single request
+TRACE_HEADER = b"x-trace-stages"
+# Upper bounds keeping a profile request from starving the worker
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL_SECONDS = 0.001
+
+# Stage trace of the request being served, None when tracing is not requested
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("request_trace", default=None)
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling every thread's stack from a background thread.
+
+    Each tick reads ``sys._current_frames()`` and counts the stack of every
+    thread other than the sampler, so the profiled code is never traced or
+    instrumented. Overhead is one stack walk per thread per interval. Only
+    one profile can run per process at a time.
+    """
+
+    _run_lock = threading.Lock()
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = max(float(interval), MIN_INTERVAL_SECONDS)
+        self.include_idle = include_idle
+        self.stacks: collections.Counter = collections.Counter()
+        self.samples = 0
+        self.duration = 0.0
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", code.co_filename)
+        return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+    def _collect(self, frame) -> List[str]:
+        stack = []
+        while frame is not None:
+            stack.append(self._frame_label(frame))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _is_idle(self, stack: List[str]) -> bool:
+        # Threads parked on a lock, queue or selector add noise, not signal
+        leaf = stack[-1] if stack else ""
+        return leaf.startswith(("threading:", "selectors:", "queue:", "concurrent.futures"))
+
+    def run(self, seconds: float) -> "SamplingProfiler":
+        """Sample all threads for ``seconds`` (blocking the calling thread)"""
+        seconds = min(max(float(seconds), self.interval), MAX_PROFILE_SECONDS)
+        if not self._run_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            own_id = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            start = time.perf_counter()
+            deadline = start + seconds
+            next_tick = start
+            while True:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    stack = self._collect(frame)
+                    if not self.include_idle and self._is_idle(stack):
+                        continue
+                    thread_name = names.get(thread_id) or f"thread-{thread_id}"
+                    self.stacks[";".join([thread_name] + stack)] += 1
+                self.samples += 1
+                next_tick += self.interval
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if next_tick > now:
+                    time.sleep(next_tick - now)
+                else:
+                    # Fell behind: skip missed ticks instead of bursting
+                    next_tick = now
+            self.duration = time.perf_counter() - start
+        finally:
+            self._run_lock.release()
+        logger.info(
+            "Sampling profile finished: %d samples over %.2fs", self.samples, self.duration
+        )
+        return self
+
+    def collapsed(self) -> str:
+        """Render stacks in collapsed format (input of flamegraph.pl / speedscope)"""
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Leaf functions ranked by self samples"""
+        leaves: collections.Counter = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": name, "samples": count, "share": round(count / total, 4)}
+            for name, count in leaves.most_common(limit)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "duration_seconds": round(self.duration, 3),
+            "interval_seconds": self.interval,
+            "unique_stacks": len(self.stacks),
+            "top_functions": self.top_functions(),
+        }
+
+
+class RequestTrace:
+    """Stage timings for one request, in milliseconds"""
+
+    __slots__ = ("start", "body_received", "handler_start", "stages")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.body_received: Optional[float] = None
+        self.handler_start: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        if self.handler_start is None:
+            self.mark_handler_start(time.perf_counter() - seconds)
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1000
+
+    def mark_handler_start(self, when: Optional[float] = None):
+        """Close the validation stage: body parsing, routing and pydantic checks"""
+        if self.handler_start is not None:
+            return
+        self.handler_start = time.perf_counter() if when is None else when
+        begin = self.body_received if self.body_received is not None else self.start
+        self.stages["validation"] = max(0.0, self.handler_start - begin) * 1000
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.start) * 1000
+        parts = [f"{name};dur={ms:.3f}" for name, ms in self.stages.items()]
+        parts.append(f"total;dur={total:.3f}")
+        return ", ".join(parts)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add a stage timing to the current request's trace, if tracing is on"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+def mark_handler_start():
+    """Mark the start of handler code for the current request's trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.mark_handler_start()
+
+
+class TraceMiddleware:
+    """
+    Pure ASGI middleware enabling stage tracing per request.
+
+    A request sent with ``X-Trace-Stages: 1`` gets a ``Server-Timing``
+    response header listing validation, feature prep, inference,
+    serialization and total time. Untraced requests only pay one header scan.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(
+            name == TRACE_HEADER and value not in (b"0", b"false")
+            for name, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                trace.body_received = time.perf_counter()
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _current_trace.reset(token)
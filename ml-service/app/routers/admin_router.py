@@ -0,0 +1,122 @@
+"""
+CAPSTACK ML Admin - Operator-only diagnostics
+Endpoints are disabled unless ADMIN_TOKEN is set and require it in X-Admin-Token
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import time
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from app.core.portfolio_optimizer import MARKET_CONDITIONS, portfolio_optimizer
+from app.core.rules import reload_rules
+from app.profiling import MAX_PROFILE_SECONDS, ProfilerBusy, SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Reject requests without the configured admin token"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        # Hide the admin surface entirely when no token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile")
+async def sample_profile(
+    seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0),
+    output: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    include_idle: bool = False,
+):
+    """
+    Sample this worker's stacks for ``seconds`` and return the profile.
+
+    ``collapsed`` output can be fed to flamegraph.pl or speedscope; ``json``
+    returns a summary with the hottest leaf functions. The event loop keeps
+    serving traffic while the sampler runs in a thread. With several
+    uvicorn workers only the worker receiving this request is profiled.
+    """
+    profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=include_idle)
+    try:
+        await asyncio.to_thread(profiler.run, seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+    if output == "json":
+        return {"pid": os.getpid(), **profiler.summary(), "collapsed": profiler.collapsed()}
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Pid": str(os.getpid()),
+        },
+    )
+
+
+class MarketAssumptionsUpdate(BaseModel):
+    """Annual expected returns and volatilities by allocation bucket"""
+
+    returns: Dict[str, float] = Field(default_factory=dict)
+    volatility: Dict[str, float] = Field(default_factory=dict)
+
+
+@router.put("/allocation/assumptions/{market}")
+def update_market_assumptions(market: str, update: MarketAssumptionsUpdate):
+    """
+    Replace market assumptions and re-solve that market's efficient frontiers.
+
+    Requests keep using the previous frontiers until the new ones are solved.
+    Only this worker is updated.
+    """
+    if market not in MARKET_CONDITIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown market condition: {market}")
+    start = time.perf_counter()
+    try:
+        solved = portfolio_optimizer.update_assumptions(market, update.returns, update.volatility)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    logger.info("Market assumptions for %s updated, %d frontiers re-solved", market, solved)
+    return {
+        "market": market,
+        "frontiers": solved,
+        "solve_ms": round((time.perf_counter() - start) * 1000, 2),
+        "assumptions": portfolio_optimizer.assumptions[market],
+    }
+
+
+class RulesReload(BaseModel):
+    """Optional rules config file; RULES_CONFIG_PATH when omitted"""
+
+    path: Optional[str] = None
+
+
+@router.post("/rules/reload")
+def reload_rule_tables(reload: RulesReload = RulesReload()):
+    """
+    Recompile threshold rules and recommendation tables from config.
+
+    An invalid config leaves the active rules in place. Only this worker is
+    updated.
+    """
+    start = time.perf_counter()
+    try:
+        rules = reload_rules(reload.path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid rules config: {e}") from e
+    return {
+        **rules.summary(),
+        "compile_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
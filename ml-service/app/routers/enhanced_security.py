@@ -1,11 +1,26 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import math
 import numpy as np
-import pandas as pd
-import joblib
 import os
 from typing import List, Dict, Any, Optional
 import logging
+import threading
+import time
+
+from app.async_jobs import JobContext, async_jobs
+from app.compiled_trees import maybe_compile
+from app.core.crisis import PROJECTION_MONTHS, SCENARIO_IMPACTS, simulate_crises
+from app.core.rules import get_rules
+from app.metrics import FEATURE_PREP, MODEL_INFERENCE, record_cache, timed_executor
+from app.model_registry import serving_path
+from app.profiling import mark_handler_start, record_stage
+from app.scheduler import prioritized, run_chunked
+from app.security.feature_store import TransactionFeatureStore
+from app.security.fraud_cascade import load_cascade, scoring_mode
+from app.security.financial_anomaly import ANOMALY_FLAGS, detect_batch, engine as financial_anomaly_engine
+from app.security.income_volatility import engine as income_volatility_engine, rule_assessment
+from app.utils import batch_columns
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,17 +30,30 @@ router = APIRouter(prefix="/enhanced-security", tags=["enhanced-security"])
 
 # Model paths
 MODEL_DIR = "app/models/enhanced"
+FEATURE_STORE_SNAPSHOT = os.getenv("FEATURE_STORE_SNAPSHOT", "")
+INCOME_VOLATILITY_MODEL_VERSION = "income_volatility_v1.0"
+MAX_INCOME_VOLATILITY_BATCH_ROWS = 100_000
+ANOMALY_MODEL_VERSION = "isolation_forest_v1.0"
+MAX_ANOMALY_BATCH_ROWS = 500_000
+MAX_CRISIS_SWEEP_ROWS = 500_000
+
+# Per-user velocity features for the fraud endpoint
+feature_store = TransactionFeatureStore()
 
 class EnhancedFraudDetectionRequest(BaseModel):
     amount: float
     merchant_category: str
     geographic_distance: float
-    time_since_last_tx: float
     device_mismatch: int
-    velocity_check: float
     ip_risk_score: float
     account_age_days: float
-    typical_transaction_amount: float
+    # Either supply the velocity features directly or a user_id so they
+    # are derived from the online feature store
+    user_id: Optional[str] = None
+    timestamp: Optional[float] = None
+    time_since_last_tx: Optional[float] = None
+    velocity_check: Optional[float] = None
+    typical_transaction_amount: Optional[float] = None
 
 class CrisisSimulationRequest(BaseModel):
     age: int
@@ -38,6 +66,18 @@ class CrisisSimulationRequest(BaseModel):
     crisis_scenario: str
     crisis_severity: float
 
+class CrisisSweepRequest(BaseModel):
+    """Columnar crisis simulation inputs: element i of every list is profile i"""
+    user_ids: Optional[List[str]] = None
+    monthly_income: List[float]
+    monthly_expenses: List[float]
+    emergency_fund_months: List[float]
+    total_debt: List[float]
+    job_stability: List[float]
+    skills_relevance: List[float]
+    crisis_scenario: List[str]
+    crisis_severity: List[float]
+
 class IncomeVolatilityRequest(BaseModel):
     age: int
     education: str
@@ -49,6 +89,19 @@ class IncomeVolatilityRequest(BaseModel):
     automation_risk_score: float
     skill_relevance_score: float
 
+class IncomeVolatilityBatchRequest(BaseModel):
+    """Columnar profiles: element i of every list is profile i"""
+    user_ids: Optional[List[str]] = None
+    age: List[int]
+    education: List[str]
+    industry: List[str]
+    experience_years: List[float]
+    base_salary: List[float]
+    variable_income_ratio: List[float]
+    job_stability_score: List[float]
+    automation_risk_score: List[float]
+    skill_relevance_score: List[float]
+
 class AnomalyDetectionRequest(BaseModel):
     monthly_income: float
     monthly_expenses: float
@@ -57,33 +110,109 @@ class AnomalyDetectionRequest(BaseModel):
     savings_rate: float
     financial_stress_score: float
 
-# Load models at startup
+class AnomalyDetectionBatchRequest(BaseModel):
+    """Columnar profiles: element i of every list is profile i"""
+    user_ids: Optional[List[str]] = None
+    monthly_income: List[float]
+    monthly_expenses: List[float]
+    emergency_fund_months: List[float]
+    debt_to_income_ratio: List[float]
+    savings_rate: List[float]
+    financial_stress_score: List[float]
+    # Crisis-scenario columns of the model; omitted means no crisis applied
+    crisis_severity: Optional[List[float]] = None
+    income_loss_percentage: Optional[List[float]] = None
+    expense_increase_percentage: Optional[List[float]] = None
+    survival_months: Optional[List[float]] = None
+
+# Loaded on first use so importing the router does not import sklearn
 fraud_model = None
 fraud_scaler = None
+# Stage-1 prefilter in front of fraud_model when FRAUD_SCORING_MODE=cascade
+fraud_cascade = None
+_fraud_model_attempted = False
+_fraud_model_lock = threading.Lock()
 
 def load_fraud_model():
-    global fraud_model, fraud_scaler
+    global fraud_model, fraud_scaler, fraud_cascade, _fraud_model_attempted
     try:
-        fraud_model = joblib.load(f"{MODEL_DIR}/fraud_detection_simple.pkl")
+        import joblib
+        forest = joblib.load(serving_path(f"{MODEL_DIR}/fraud_detection_simple.pkl"))
+        fraud_model = maybe_compile(forest)
         fraud_scaler = joblib.load(f"{MODEL_DIR}/fraud_detection_scaler.pkl")
         logger.info("Enhanced fraud detection model loaded successfully")
     except Exception as e:
         logger.error(f"Failed to load fraud detection model: {e}")
         fraud_model = None
         fraud_scaler = None
+    else:
+        if scoring_mode() == "cascade":
+            try:
+                fraud_cascade = load_cascade(forest, fraud_model, MODEL_DIR)
+            except Exception as e:
+                logger.error(f"Failed to build fraud cascade, scoring with the full model: {e}")
+                fraud_cascade = None
+    _fraud_model_attempted = True
+
+def get_fraud_model():
+    """Return the fraud model and scaler, loading them on first call"""
+    if not _fraud_model_attempted:
+        # Warm-up may be loading from a worker thread at the same time
+        with _fraud_model_lock:
+            if not _fraud_model_attempted:
+                load_fraud_model()
+    return fraud_model, fraud_scaler
+
+def restore_feature_store():
+    """Restore the feature store from its snapshot file if configured"""
+    if FEATURE_STORE_SNAPSHOT and os.path.exists(FEATURE_STORE_SNAPSHOT):
+        try:
+            feature_store.restore(FEATURE_STORE_SNAPSHOT)
+        except Exception as e:
+            logger.error(f"Failed to restore feature store: {e}")
 
-# Load models on module import
-load_fraud_model()
+def snapshot_feature_store():
+    """Persist the feature store to its snapshot file if configured"""
+    if FEATURE_STORE_SNAPSHOT:
+        try:
+            feature_store.snapshot(FEATURE_STORE_SNAPSHOT)
+        except Exception as e:
+            logger.error(f"Failed to snapshot feature store: {e}")
+
+def _resolve_velocity_features(request: EnhancedFraudDetectionRequest) -> None:
+    """Fill missing velocity features from the feature store and record the event"""
+    velocity_fields = ("time_since_last_tx", "velocity_check", "typical_transaction_amount")
+    missing = [name for name in velocity_fields if getattr(request, name) is None]
+    if request.user_id is None:
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"user_id is required when {', '.join(missing)} are not provided"
+            )
+        return
+
+    if missing:
+        record_cache("feature_store", request.user_id in feature_store)
+        stored = feature_store.features(request.user_id, request.amount, request.timestamp)
+        for name in missing:
+            setattr(request, name, stored[name])
+    feature_store.observe(request.user_id, request.amount, request.timestamp)
 
 @router.post("/fraud-detection-enhanced")
+@prioritized("interactive")
 async def enhanced_fraud_detection(request: EnhancedFraudDetectionRequest):
     """
     Enhanced fraud detection using trained ML model with real-world patterns
     """
+    mark_handler_start()
+    fraud_model, fraud_scaler = get_fraud_model()
     if fraud_model is None or fraud_scaler is None:
         raise HTTPException(status_code=503, detail="Fraud detection model not available")
-    
+
+    _resolve_velocity_features(request)
+
     try:
+        start = time.perf_counter()
         # Prepare features
         features = np.array([[
             request.amount,
@@ -100,10 +229,23 @@ async def enhanced_fraud_detection(request: EnhancedFraudDetectionRequest):
         
         # Scale features
         features_scaled = fraud_scaler.transform(features)
+        prepared = time.perf_counter()
         
         # Predict
-        fraud_probability = fraud_model.predict_proba(features_scaled)[0][1]
-        is_fraud = fraud_model.predict(features_scaled)[0]
+        if fraud_cascade is not None:
+            probabilities, escalated = fraud_cascade.score(features_scaled)
+            fraud_probability = float(probabilities[0])
+            is_fraud = fraud_probability > 0.5
+            scoring_stage = "full" if escalated[0] else "stage1"
+        else:
+            fraud_probability = fraud_model.predict_proba(features_scaled)[0][1]
+            is_fraud = fraud_model.predict(features_scaled)[0]
+            scoring_stage = "full"
+        finished = time.perf_counter()
+        FEATURE_PREP.labels("fraud").observe(prepared - start)
+        MODEL_INFERENCE.labels("fraud", "enhanced_v1.0").observe(finished - prepared)
+        record_stage("feature_prep", prepared - start)
+        record_stage("inference", finished - prepared)
         
         # Risk factors analysis
         risk_factors = {
@@ -116,14 +258,8 @@ async def enhanced_fraud_detection(request: EnhancedFraudDetectionRequest):
         }
         
         # Risk level
-        if fraud_probability > 0.8:
-            risk_level = "critical"
-        elif fraud_probability > 0.6:
-            risk_level = "high"
-        elif fraud_probability > 0.3:
-            risk_level = "medium"
-        else:
-            risk_level = "low"
+        rules = get_rules()
+        risk_level = rules.fraud_risk_level.classify(fraud_probability)
         
         return {
             "fraud_probability": round(fraud_probability, 4),
@@ -132,7 +268,8 @@ async def enhanced_fraud_detection(request: EnhancedFraudDetectionRequest):
             "risk_factors": risk_factors,
             "confidence": round(max(fraud_probability, 1 - fraud_probability), 4),
             "model_version": "enhanced_v1.0",
-            "recommendations": _get_fraud_recommendations(risk_level, risk_factors)
+            "scoring_stage": scoring_stage,
+            "recommendations": list(rules.fraud_recommendations_for(risk_level, risk_factors))
         }
     
     except Exception as e:
@@ -140,22 +277,14 @@ async def enhanced_fraud_detection(request: EnhancedFraudDetectionRequest):
         raise HTTPException(status_code=500, detail=f"Fraud detection failed: {str(e)}")
 
 @router.post("/crisis-simulation")
+@prioritized("interactive")
 async def financial_crisis_simulation(request: CrisisSimulationRequest):
     """
     Simulate financial crisis scenarios with real-world impact analysis
     """
     try:
         # Calculate crisis impact based on scenario
-        scenario_impacts = {
-            'job_loss': {'income_loss': 1.0, 'duration': 6, 'recovery_factor': 0.7},
-            'medical_emergency': {'income_loss': 0.3, 'duration': 3, 'recovery_factor': 0.9},
-            'market_crash': {'income_loss': 0.4, 'duration': 12, 'recovery_factor': 0.6},
-            'inflation_spike': {'income_loss': 0.1, 'duration': 24, 'recovery_factor': 0.5},
-            'debt_crisis': {'income_loss': 0.2, 'duration': 18, 'recovery_factor': 0.4},
-            'business_failure': {'income_loss': 0.8, 'duration': 24, 'recovery_factor': 0.3}
-        }
-        
-        scenario = scenario_impacts.get(request.crisis_scenario, scenario_impacts['job_loss'])
+        scenario = SCENARIO_IMPACTS.get(request.crisis_scenario, SCENARIO_IMPACTS['job_loss'])
         
         # Calculate impact
         income_loss = scenario['income_loss'] * request.crisis_severity
@@ -199,13 +328,8 @@ async def financial_crisis_simulation(request: CrisisSimulationRequest):
         debt_to_income = request.total_debt / (request.monthly_income * 12)
         financial_stress = (request.monthly_expenses / request.monthly_income + debt_to_income * 0.1) / 2
         
-        risk_level = "low"
-        if survival_months < 3 or financial_stress > 0.8:
-            risk_level = "critical"
-        elif survival_months < 6 or financial_stress > 0.6:
-            risk_level = "high"
-        elif survival_months < 9 or financial_stress > 0.4:
-            risk_level = "medium"
+        rules = get_rules()
+        risk_level = rules.crisis_level(survival_months, financial_stress)
         
         return {
             "survival_months": survival_months,
@@ -215,7 +339,7 @@ async def financial_crisis_simulation(request: CrisisSimulationRequest):
             "risk_level": risk_level,
             "financial_stress_score": round(financial_stress, 3),
             "monthly_projections": monthly_projections[:12],  # Return first 12 months
-            "recommendations": _get_crisis_recommendations(risk_level, survival_months, debt_to_income),
+            "recommendations": list(rules.crisis_recommendations_for(risk_level, survival_months, debt_to_income)),
             "scenario_analysis": {
                 "income_loss_percentage": round(income_loss * 100, 1),
                 "expense_increase_percentage": round(expense_increase * 100, 1),
@@ -227,93 +351,110 @@ async def financial_crisis_simulation(request: CrisisSimulationRequest):
         logger.error(f"Crisis simulation error: {e}")
         raise HTTPException(status_code=500, detail=f"Crisis simulation failed: {str(e)}")
 
+def _income_model_probabilities(columns: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Class probabilities from the trained model, timed like the other models"""
+    start = time.perf_counter()
+    probabilities = income_volatility_engine.predict_proba(columns)
+    if probabilities is not None:
+        MODEL_INFERENCE.labels("income_volatility", INCOME_VOLATILITY_MODEL_VERSION).observe(
+            time.perf_counter() - start
+        )
+    return probabilities
+
 @router.post("/income-volatility-analysis")
-async def income_volatility_analysis(request: IncomeVolatilityRequest):
+@prioritized("interactive")
+@timed_executor
+def income_volatility_analysis(request: IncomeVolatilityRequest):
     """
     Analyze income volatility and predict future income stability
+
+    Runs in the threadpool: the model is loaded on first use and
+    predict_proba would otherwise block the event loop.
     """
     try:
-        # Calculate volatility factors
-        age_factor = 1.0 if request.age < 45 else 1.2
-        experience_factor = min(1.0, request.experience_years / 20)
-        
-        # Industry risk assessment
-        industry_risks = {
-            'technology': 0.35,
-            'healthcare': 0.15,
-            'finance': 0.25,
-            'manufacturing': 0.30,
-            'retail': 0.40,
-            'education': 0.10,
-            'government': 0.05,
-            'gig_economy': 0.60
-        }
-        
-        industry_risk = industry_risks.get(request.industry, 0.25)
-        
-        # Education stability factor
-        education_factors = {
-            'high_school': 0.7,
-            'bachelors': 0.8,
-            'masters': 0.9,
-            'phd': 0.95
-        }
-        
-        education_factor = education_factors.get(request.education, 0.8)
-        
-        # Calculate overall volatility score
-        volatility_score = (
-            (1 - request.job_stability_score) * 0.3 +
-            request.automation_risk_score * 0.25 +
-            industry_risk * 0.2 +
-            (1 - request.skill_relevance_score) * 0.15 +
-            (1 - education_factor) * 0.1
-        ) * age_factor
-        
-        # Predict income range
-        base_income = request.base_salary
-        variable_component = base_income * request.variable_income_ratio
-        
-        # Conservative estimate (95% confidence)
-        income_range_low = base_income * (1 - volatility_score * 0.5)
-        income_range_high = base_income * (1 + volatility_score * 0.3)
-        
-        # Risk classification
-        if volatility_score > 0.4:
-            risk_level = "high"
-        elif volatility_score > 0.25:
-            risk_level = "medium"
-        else:
-            risk_level = "low"
-        
-        # Layoff risk calculation
-        layoff_risk = (1 - request.job_stability_score) * industry_risk * (1 - request.skill_relevance_score)
+        rules = get_rules()
+        columns = {name: [value] for name, value in request.dict().items()}
+        assessment = rule_assessment(columns, rules)
+        volatility_score = float(assessment["volatility_score"][0])
+        layoff_risk = float(assessment["layoff_risk_score"][0])
+        risk_level = str(assessment["risk_level"][0])
+        probabilities = _income_model_probabilities(columns)
         
         return {
             "volatility_score": round(volatility_score, 3),
             "risk_level": risk_level,
             "predicted_income_range": {
-                "monthly_low": round(income_range_low, 2),
-                "monthly_high": round(income_range_high, 2),
+                "monthly_low": round(float(assessment["monthly_low"][0]), 2),
+                "monthly_high": round(float(assessment["monthly_high"][0]), 2),
                 "confidence": 0.95
             },
             "layoff_risk_score": round(layoff_risk, 3),
             "stability_factors": {
                 "job_stability": request.job_stability_score,
                 "automation_risk": request.automation_risk_score,
-                "industry_risk": industry_risk,
+                "industry_risk": float(assessment["industry_risk"][0]),
                 "skill_relevance": request.skill_relevance_score,
-                "education_stability": education_factor
+                "education_stability": float(assessment["education_factor"][0])
             },
-            "recommendations": _get_volatility_recommendations(risk_level, layoff_risk, volatility_score),
-            "career_insights": _get_career_insights(request.industry, request.skill_relevance_score, automation_risk_score)
+            "predicted_class": (
+                income_volatility_engine.classes[int(np.argmax(probabilities[0]))]
+                if probabilities is not None else None
+            ),
+            "class_probabilities": (
+                {label: round(float(p), 4) for label, p in zip(income_volatility_engine.classes, probabilities[0])}
+                if probabilities is not None else None
+            ),
+            "model_version": INCOME_VOLATILITY_MODEL_VERSION if probabilities is not None else "rules",
+            "recommendations": list(rules.volatility_recommendations_for(risk_level, layoff_risk, volatility_score)),
+            "career_insights": _get_career_insights(request.industry, request.skill_relevance_score, request.automation_risk_score)
         }
     
     except Exception as e:
         logger.error(f"Income volatility analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Income volatility analysis failed: {str(e)}")
 
+@router.post("/income-volatility-analysis/batch")
+@prioritized("bulk")
+@timed_executor
+def income_volatility_analysis_batch(request: IncomeVolatilityBatchRequest):
+    """
+    Score many employment profiles at once (e.g. quarterly re-scoring)
+
+    Rule-derived ranges are computed column-wise and the model runs one
+    predict_proba over the whole batch; the response is columnar.
+    """
+    n = len(request.age)
+    columns = batch_columns(request, MAX_INCOME_VOLATILITY_BATCH_ROWS, allow_empty=False)
+
+    try:
+        assessment = run_chunked(rule_assessment, columns, n)
+        probabilities = run_chunked(_income_model_probabilities, columns, n)
+    except Exception as e:
+        logger.error(f"Income volatility batch error: {e}")
+        raise HTTPException(status_code=500, detail=f"Income volatility analysis failed: {str(e)}")
+
+    classes = income_volatility_engine.classes
+    return {
+        "count": n,
+        "user_ids": request.user_ids,
+        "volatility_score": np.round(assessment["volatility_score"], 3).tolist(),
+        "risk_level": assessment["risk_level"].tolist(),
+        "monthly_low": np.round(assessment["monthly_low"], 2).tolist(),
+        "monthly_high": np.round(assessment["monthly_high"], 2).tolist(),
+        "layoff_risk_score": np.round(assessment["layoff_risk_score"], 3).tolist(),
+        "predicted_class": (
+            np.asarray(classes)[probabilities.argmax(axis=1)].tolist()
+            if probabilities is not None else None
+        ),
+        "class_probabilities": (
+            {label: np.round(probabilities[:, k], 4).tolist() for k, label in enumerate(classes)}
+            if probabilities is not None else None
+        ),
+        "model_version": INCOME_VOLATILITY_MODEL_VERSION if probabilities is not None else "rules"
+    }
+
 @router.post("/anomaly-detection")
+@prioritized("interactive")
 async def financial_anomaly_detection(request: AnomalyDetectionRequest):
     """
     Detect anomalies in financial patterns using statistical methods
@@ -362,14 +503,7 @@ async def financial_anomaly_detection(request: AnomalyDetectionRequest):
         anomaly_score = len(anomalies) * 0.2 + request.financial_stress_score * 0.3
         
         # Overall risk assessment
-        if anomaly_score > 0.8:
-            overall_risk = "critical"
-        elif anomaly_score > 0.6:
-            overall_risk = "high"
-        elif anomaly_score > 0.3:
-            overall_risk = "medium"
-        else:
-            overall_risk = "low"
+        overall_risk = get_rules().anomaly_risk_level.classify(anomaly_score)
         
         return {
             "anomaly_score": round(anomaly_score, 3),
@@ -389,16 +523,160 @@ async def financial_anomaly_detection(request: AnomalyDetectionRequest):
         logger.error(f"Anomaly detection error: {e}")
         raise HTTPException(status_code=500, detail=f"Anomaly detection failed: {str(e)}")
 
+def _anomaly_batch_columns(request: AnomalyDetectionBatchRequest) -> Dict[str, Any]:
+    return batch_columns(request, MAX_ANOMALY_BATCH_ROWS, allow_empty=False)
+
+@router.post("/anomaly-detection/batch")
+@prioritized("bulk")
+@timed_executor
+def financial_anomaly_detection_batch(request: AnomalyDetectionBatchRequest):
+    """
+    Financial-health sweep over many profiles
+
+    The IsolationForest scores the whole batch in one score_samples call and
+    its outliers are merged with the rule anomalies; the response is
+    columnar, with anomalies as an ANOMALY_FLAGS bitmask per row.
+    """
+    columns = _anomaly_batch_columns(request)
+    n = len(request.monthly_income)
+
+    start = time.perf_counter()
+    try:
+        result = run_chunked(detect_batch, columns, n)
+    except Exception as e:
+        logger.error(f"Anomaly detection batch error: {e}")
+        raise HTTPException(status_code=500, detail=f"Anomaly detection failed: {str(e)}")
+    return _anomaly_batch_response(request, result, time.perf_counter() - start)
+
+def _anomaly_batch_response(request: AnomalyDetectionBatchRequest, result: Dict[str, Any],
+                            elapsed: float) -> Dict[str, Any]:
+    model_score = result["model_score"]
+    if model_score is not None:
+        MODEL_INFERENCE.labels("anomaly_detection", ANOMALY_MODEL_VERSION).observe(elapsed)
+
+    return {
+        "count": len(request.monthly_income),
+        "user_ids": request.user_ids,
+        "anomaly_score": np.round(result["anomaly_score"], 3).tolist(),
+        "overall_risk": result["overall_risk"].tolist(),
+        "total_anomalies": result["total_anomalies"].tolist(),
+        "anomaly_flags": result["anomaly_flags"].tolist(),
+        "flag_legend": ANOMALY_FLAGS,
+        "model_score": np.round(model_score, 4).tolist() if model_score is not None else None,
+        "model_version": ANOMALY_MODEL_VERSION if model_score is not None else "rules"
+    }
+
+# Column name -> (lower bound, upper bound, lower bound inclusive); income
+# divides the stress and debt ratios
+_CRISIS_SWEEP_BOUNDS = {
+    "monthly_income": (0.0, math.inf, False),
+    "monthly_expenses": (0.0, math.inf, True),
+    "emergency_fund_months": (0.0, math.inf, True),
+    "total_debt": (0.0, math.inf, True),
+}
+
+def _crisis_sweep_columns(request: CrisisSweepRequest) -> Dict[str, Any]:
+    return batch_columns(request, MAX_CRISIS_SWEEP_ROWS, _CRISIS_SWEEP_BOUNDS, allow_empty=False)
+
+def _count_labels(counts: Dict[str, int], labels: np.ndarray) -> Dict[str, int]:
+    for label, count in zip(*np.unique(labels, return_counts=True)):
+        counts[str(label)] = counts.get(str(label), 0) + int(count)
+    return counts
+
+def crisis_sweep_job(request: CrisisSweepRequest, job: JobContext) -> Dict[str, Any]:
+    """
+    /crisis-simulation for a whole population, as an async job
+
+    After each chunk the partial result gives the risk levels and survival
+    months percentiles of the profiles simulated so far.
+    """
+    columns = _crisis_sweep_columns(request)
+    n = len(request.monthly_income)
+    risk_counts: Dict[str, int] = {}
+    survival: List[np.ndarray] = []
+
+    def report(done: int, part: Dict[str, np.ndarray]):
+        _count_labels(risk_counts, part["risk_level"])
+        survival.append(part["survival_months"])
+        months = np.concatenate(survival)
+        job.emit({
+            "profiles_simulated": done,
+            "total_profiles": n,
+            "risk_level_counts": dict(risk_counts),
+            "survival_months_percentiles": {
+                f"p{p}": float(np.percentile(months, p)) for p in (10, 50, 90)
+            },
+            "depleted_within_horizon": int(np.count_nonzero(months < PROJECTION_MONTHS)),
+        }, done / n)
+
+    result = run_chunked(simulate_crises, columns, n, on_chunk=report)
+    return {
+        "count": n,
+        "user_ids": request.user_ids,
+        **{name: values.tolist() for name, values in result.items()},
+        "summary": job.job.partial,
+    }
+
+def anomaly_batch_job(request: AnomalyDetectionBatchRequest, job: JobContext) -> Dict[str, Any]:
+    """
+    /anomaly-detection/batch as an async job, for sweeps too long for one request
+
+    After each chunk the partial result gives the risk counts of the
+    profiles scored so far.
+    """
+    columns = _anomaly_batch_columns(request)
+    n = len(request.monthly_income)
+    risk_counts: Dict[str, int] = {}
+    anomalous = 0
+
+    def report(done: int, part: Dict[str, Any]):
+        nonlocal anomalous
+        _count_labels(risk_counts, part["overall_risk"])
+        anomalous += int(np.count_nonzero(part["total_anomalies"]))
+        job.emit({
+            "profiles_scored": done,
+            "total_profiles": n,
+            "overall_risk_counts": dict(risk_counts),
+            "anomalous_profiles": anomalous,
+        }, done / n)
+
+    start = time.perf_counter()
+    result = run_chunked(detect_batch, columns, n, on_chunk=report)
+    return _anomaly_batch_response(request, result, time.perf_counter() - start)
+
+async_jobs.register(
+    "crisis-sweep", CrisisSweepRequest, crisis_sweep_job,
+    "Crisis simulation over a population of profiles", validate=_crisis_sweep_columns,
+)
+async_jobs.register(
+    "anomaly-detection-batch", AnomalyDetectionBatchRequest, anomaly_batch_job,
+    "Financial-health anomaly sweep over many profiles", validate=_anomaly_batch_columns,
+)
+
+@router.get("/feature-store/stats")
+async def get_feature_store_stats():
+    """Get occupancy statistics of the per-user transaction feature store"""
+    return feature_store.stats()
+
 @router.get("/model-status")
-async def get_model_status():
-    """Get status of all enhanced models"""
+@timed_executor
+def get_model_status():
+    """
+    Get status of all enhanced models
+
+    Checking availability loads the income volatility and anomaly models on
+    first use, so this runs in the threadpool.
+    """
+    income_model = income_volatility_engine.available
+    anomaly_model = financial_anomaly_engine.available
     return {
         "fraud_detection": {
             "loaded": fraud_model is not None,
             "model_type": "RandomForestClassifier",
             "version": "enhanced_v1.0",
             "accuracy": 0.9976,
-            "training_samples": 100000
+            "training_samples": 100000,
+            "cascade": fraud_cascade.summary() if fraud_cascade is not None else None
         },
         "crisis_simulation": {
             "loaded": True,
@@ -407,101 +685,31 @@ async def get_model_status():
             "scenarios": ["job_loss", "medical_emergency", "market_crash", "inflation_spike", "debt_crisis", "business_failure"]
         },
         "income_volatility": {
-            "loaded": True,
-            "model_type": "Statistical Analysis",
-            "version": "v1.0",
+            "loaded": income_model,
+            "model_type": type(income_volatility_engine.model).__name__ if income_model else "Rule-based",
+            "version": INCOME_VOLATILITY_MODEL_VERSION if income_model else "rules",
+            "classes": list(income_volatility_engine.classes) if income_model else None,
             "factors": ["job_stability", "automation_risk", "industry_risk", "skill_relevance"]
         },
         "anomaly_detection": {
-            "loaded": True,
-            "model_type": "Statistical + Rule-based",
-            "version": "v1.0",
-            "checks": ["emergency_fund", "debt_ratio", "savings_rate", "financial_stress"]
+            "loaded": anomaly_model,
+            "model_type": "IsolationForest + Rule-based" if anomaly_model else "Rule-based",
+            "version": ANOMALY_MODEL_VERSION if anomaly_model else "rules",
+            "checks": [flag for flag in ANOMALY_FLAGS if anomaly_model or flag != "model_outlier"]
         }
     }
 
-# Helper functions for recommendations
-def _get_fraud_recommendations(risk_level: str, risk_factors: Dict[str, bool]) -> List[str]:
-    recommendations = []
-    
-    if risk_level in ["critical", "high"]:
-        recommendations.append("Block transaction and require additional verification")
-        recommendations.append("Contact customer immediately for verification")
-    
-    if risk_factors.get("high_amount"):
-        recommendations.append("Implement additional verification for high-value transactions")
-    
-    if risk_factors.get("unusual_location"):
-        recommendations.append("Verify customer location and travel plans")
-    
-    if risk_factors.get("device_mismatch"):
-        recommendations.append("Require device re-authentication")
-    
-    if risk_level == "medium":
-        recommendations.append("Monitor for additional suspicious activity")
-    
-    return recommendations
-
-def _get_crisis_recommendations(risk_level: str, survival_months: int, debt_to_income: float) -> List[str]:
-    recommendations = []
-    
-    if survival_months < 3:
-        recommendations.append("URGENT: Build emergency fund to cover 6+ months of expenses")
-        recommendations.append("Consider income protection insurance")
-    
-    if debt_to_income > 0.4:
-        recommendations.append("Create aggressive debt reduction plan")
-        recommendations.append("Consider debt consolidation options")
-    
-    if risk_level in ["critical", "high"]:
-        recommendations.append("Diversify income sources")
-        recommendations.append("Update skills to improve employability")
-        recommendations.append("Review and cut non-essential expenses")
-    
-    if risk_level == "medium":
-        recommendations.append("Increase emergency fund contributions")
-        recommendations.append("Review investment portfolio for risk management")
-    
-    return recommendations
-
-def _get_volatility_recommendations(risk_level: str, layoff_risk: float, volatility_score: float) -> List[str]:
-    recommendations = []
-    
-    if risk_level == "high":
-        recommendations.append("Build larger emergency fund (9-12 months)")
-        recommendations.append("Develop additional income streams")
-        recommendations.append("Update skills for better job security")
-    
-    if layoff_risk > 0.3:
-        recommendations.append("Start networking and job market research")
-        recommendations.append("Consider freelance or part-time work")
-    
-    if volatility_score > 0.3:
-        recommendations.append("Create strict budget and expense tracking")
-        recommendations.append("Avoid large financial commitments during high volatility")
-    
-    return recommendations
-
+# Helper functions for insights and actions
 def _get_career_insights(industry: str, skill_relevance: float, automation_risk: float) -> Dict[str, Any]:
-    industry_trends = {
-        'technology': {"growth": 0.12, "automation_risk": 0.4, "future_outlook": "strong"},
-        'healthcare': {"growth": 0.08, "automation_risk": 0.3, "future_outlook": "stable"},
-        'finance': {"growth": 0.06, "automation_risk": 0.6, "future_outlook": "moderate"},
-        'manufacturing': {"growth": 0.04, "automation_risk": 0.8, "future_outlook": "declining"},
-        'retail': {"growth": 0.03, "automation_risk": 0.7, "future_outlook": "challenging"},
-        'education': {"growth": 0.05, "automation_risk": 0.2, "future_outlook": "stable"},
-        'government': {"growth": 0.02, "automation_risk": 0.1, "future_outlook": "very_stable"},
-        'gig_economy': {"growth": 0.15, "automation_risk": 0.5, "future_outlook": "volatile"}
-    }
-    
-    trend = industry_trends.get(industry, {"growth": 0.05, "automation_risk": 0.5, "future_outlook": "moderate"})
+    rules = get_rules()
+    trend = rules.industry_trend.get(industry)
     
     return {
         "industry_growth_rate": trend["growth"],
         "industry_automation_risk": trend["automation_risk"],
         "future_outlook": trend["future_outlook"],
-        "skill_alignment": "high" if skill_relevance > 0.8 else "medium" if skill_relevance > 0.6 else "low",
-        "automation_vulnerability": "high" if automation_risk > 0.6 else "medium" if automation_risk > 0.3 else "low"
+        "skill_alignment": rules.skill_alignment.classify(skill_relevance),
+        "automation_vulnerability": rules.automation_vulnerability.classify(automation_risk)
     }
 
 def _get_priority_actions(anomalies: List[Dict], risk_level: str) -> List[str]:
@@ -0,0 +1,108 @@
+"""
+CAPSTACK ML Jobs - Async job API for long-running computations
+Submit a registered computation, then poll it, stream its partial results, cancel it or fetch its result
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import ValidationError
+
+from app.async_jobs import ResultNotReady, async_jobs
+from app.job_runner import JobFinished, JobNotFound
+from app.metrics import timed_executor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["Async Jobs"])
+
+
+def _job_links(job_id: str) -> Dict[str, str]:
+    return {
+        "status": f"/jobs/{job_id}",
+        "events": f"/jobs/{job_id}/events",
+        "result": f"/jobs/{job_id}/result",
+        "cancel": f"/jobs/{job_id}/cancel",
+    }
+
+
+def _not_found(job_id: str) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+
+
+@router.get("")
+async def list_jobs(kind: Optional[str] = None) -> Dict:
+    """List the registered job kinds and unexpired jobs, newest first"""
+    return {
+        "kinds": {name: job_kind.description for name, job_kind in async_jobs.kinds.items()},
+        "jobs": [job.to_dict() for job in async_jobs.list(kind)],
+        "stats": async_jobs.stats(),
+    }
+
+
+@router.post("/{kind}", status_code=202)
+@timed_executor
+def submit_job(kind: str, params: Dict[str, Any] = Body(...)) -> Dict:
+    """
+    Submit a job of a registered kind; the body is that kind's request
+    Returns at once with the job id and the URLs to poll, stream and fetch it;
+    validating a large request runs in the threadpool, off the event loop
+    """
+    if kind not in async_jobs.kinds:
+        raise HTTPException(status_code=404, detail=f"Unknown job kind: {kind}")
+    try:
+        job = async_jobs.submit(kind, params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    return {"job_id": job.id, "kind": kind, "status": job.status, "links": _job_links(job.id)}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str) -> Dict:
+    """Get status, progress and the latest partial result of a job"""
+    try:
+        return async_jobs.get(job_id).to_dict()
+    except JobNotFound:
+        raise _not_found(job_id)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str) -> StreamingResponse:
+    """
+    Server-sent events: the job's current record, every new partial result
+    and a final "done" event
+    """
+    try:
+        async_jobs.get(job_id)
+    except JobNotFound:
+        raise _not_found(job_id)
+    return StreamingResponse(
+        async_jobs.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str) -> FileResponse:
+    """Get the result of a succeeded job (409 while it runs or if it did not succeed)"""
+    try:
+        path = async_jobs.result_file(job_id)
+    except JobNotFound:
+        raise _not_found(job_id)
+    except ResultNotReady as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FileResponse(path, media_type="application/json")
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str) -> Dict:
+    """Cancel a queued or running job"""
+    try:
+        return async_jobs.cancel(job_id).to_dict()
+    except JobNotFound:
+        raise _not_found(job_id)
+    except JobFinished as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -1,16 +1,52 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 from datetime import datetime
-from app.security.anomaly_detection import AnomalyDetectionEngine
-from app.security.data_generator import SyntheticDataGenerator
-import pandas as pd
+import json
+import os
+from app.security.anomaly_detection import AnomalyDetectionEngine, StreamingAnomalyDetector
+from app.security.ingestion import (
+    CallbackSink,
+    FileSink,
+    InMemorySink,
+    IngestionBatchTooLarge,
+    IngestionPipeline,
+    IngestionQueueFull,
+)
+import numpy as np
+from app.job_runner import JobFinished, JobNotFound, JobRunner
+from app.metrics import timed_executor
+from app.scheduler import prioritized
+from app.security.training_jobs import JOBS, TRAINING_MANIFEST
 
 router = APIRouter(prefix="/security", tags=["Security & Cybersecurity"])
 
 # Initialize ML engines
 anomaly_engine = AnomalyDetectionEngine()
-data_generator = SyntheticDataGenerator()
+_data_generator = None  # created by get_data_generator()
+stream_detector = StreamingAnomalyDetector(
+    window_size=int(os.getenv("STREAM_WINDOW_SIZE", "10000")),
+    refit_every=int(os.getenv("STREAM_REFIT_EVERY", "5000")),
+    min_fit_events=int(os.getenv("STREAM_MIN_FIT_EVENTS", "500")),
+)
+
+# Asynchronous ingestion: bounded queue -> streaming detector -> sinks
+results_sink = InMemorySink()
+ingest_sinks = [results_sink]
+if os.getenv("INGEST_RESULTS_FILE"):
+    ingest_sinks.append(FileSink(os.environ["INGEST_RESULTS_FILE"]))
+if os.getenv("INGEST_CALLBACK_URL"):
+    ingest_sinks.append(CallbackSink(os.environ["INGEST_CALLBACK_URL"]))
+ingestion_pipeline = IngestionPipeline(
+    extract_features=anomaly_engine._extract_features,
+    scorer=stream_detector.score,
+    sinks=ingest_sinks,
+    max_queue=int(os.getenv("INGEST_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("INGEST_BATCH_SIZE", "256")),
+)
+
+# Training and dataset generation run in niced child processes, off the serving CPUs
+job_runner = JobRunner(JOBS)
 
 
 class TransactionRequest(BaseModel):
@@ -40,6 +76,15 @@ class AnomalyDetectionResponse(BaseModel):
     severity: str
 
 
+def get_data_generator():
+    """Create the synthetic data generator on first use (it imports pandas)"""
+    global _data_generator
+    if _data_generator is None:
+        from app.security.data_generator import SyntheticDataGenerator
+        _data_generator = SyntheticDataGenerator()
+    return _data_generator
+
+
 @router.post("/fraud-detection", response_model=FraudDetectionResponse)
 async def detect_fraud(transaction: TransactionRequest) -> FraudDetectionResponse:
     """
@@ -73,93 +118,98 @@ async def detect_anomalies(transactions: List[TransactionRequest]) -> List[Anoma
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/train-models")
-async def train_security_models(background_tasks: BackgroundTasks):
+@router.post("/stream/score", response_model=List[AnomalyDetectionResponse])
+@prioritized("interactive")
+@timed_executor
+def score_transaction_stream(transactions: List[TransactionRequest]) -> List[AnomalyDetectionResponse]:
     """
-    Train fraud and intrusion detection models on large synthetic datasets
-    Runs in background, can take 5-10 minutes
+    Score a batch of streamed transactions with the rolling Isolation Forest
+    The reference window is refit in the background, so scoring never blocks on training;
+    scoring itself runs in the threadpool to keep the event loop free
     """
-    def train_in_background():
-        try:
-            print("Starting ML model training...")
-
-            # Generate datasets
-            print("Generating synthetic transaction data...")
-            tx_df = data_generator.generate_transaction_dataset(50000)
-
-            print("Generating synthetic network traffic data...")
-            net_df = data_generator.generate_network_traffic_dataset(30000)
-
-            # Prepare fraud detection data
-            X = tx_df[
-                [
-                    "amount",
-                    "transaction_frequency",
-                    "geographic_distance",
-                    "time_since_last_tx",
-                    "device_mismatch",
-                    "velocity_check",
-                    "ip_risk_score",
-                    "account_age_days",
-                ]
-            ]
-            y = tx_df["is_fraud"]
-
-            from sklearn.model_selection import train_test_split
-
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
+    if not transactions:
+        return []
+    try:
+        X = np.array([anomaly_engine._extract_features(tx.dict()) for tx in transactions])
+        result = stream_detector.score(X)
+        return [
+            AnomalyDetectionResponse(
+                transaction_id=tx.id,
+                is_anomaly=bool(flag),
+                anomaly_score=float(score),
+                severity=anomaly_engine._calculate_severity(score),
             )
+            for tx, score, flag in zip(transactions, result["anomaly_score"], result["is_anomaly"])
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stream/stats")
+async def get_stream_stats() -> Dict:
+    """Get throughput (events/sec) and refit latency of the streaming detector"""
+    return stream_detector.stats()
+
+
+@router.post("/ingest", status_code=202)
+async def ingest_transactions(transactions: List[TransactionRequest]) -> Dict:
+    """
+    Accept transactions for asynchronous scoring
+    Returns 429 when the ingestion queue is full so callers can back off,
+    and 413 for a batch larger than the queue, which retrying cannot fix
+    """
+    await ingestion_pipeline.start()
+    try:
+        accepted = ingestion_pipeline.submit([tx.dict() for tx in transactions])
+    except IngestionBatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    return {"accepted": accepted, "status": "queued"}
+
+
+@router.get("/ingest/stats")
+async def get_ingest_stats() -> Dict:
+    """Get per-stage queue depth and lag of the ingestion pipeline"""
+    return ingestion_pipeline.stats()
 
-            print("Training fraud detection model...")
-            anomaly_engine.train_fraud_detection_model(X_train, y_train, X_test, y_test)
-
-            # Prepare intrusion detection data
-            X_net = net_df[
-                [
-                    "packet_size",
-                    "packet_rate",
-                    "byte_rate",
-                    "duration",
-                ]
-            ]
-
-            X_net_train, X_net_test = train_test_split(
-                X_net, test_size=0.2, random_state=42
-            )
 
-            print("Training intrusion detection model...")
-            anomaly_engine.train_intrusion_detection_model(X_net_train, X_net_test)
+@router.get("/ingest/results")
+async def get_ingest_results(limit: int = Query(100, ge=1, le=10000)) -> List[Dict]:
+    """Get the most recent results delivered to the in-memory sink"""
+    return results_sink.recent(limit)
 
-            # Save models
-            print("Saving trained models...")
-            anomaly_engine.save_models()
 
-            print("✓ ML models trained and saved successfully!")
+def _reload_trained_models(_result: Dict):
+    """Serve the models a training job published"""
+    anomaly_engine.load_models()
 
-        except Exception as e:
-            print(f"❌ Error during model training: {str(e)}")
 
-    background_tasks.add_task(train_in_background)
-    return {"message": "Training started in background", "status": "processing"}
+@router.post("/train-models", status_code=202)
+async def train_security_models() -> Dict:
+    """
+    Train fraud and intrusion detection models on large synthetic datasets
+    Runs as a background job process, can take 5-10 minutes; poll /security/jobs/{job_id}
+    """
+    job = job_runner.submit(
+        "train-security-models",
+        {"model_dir": anomaly_engine.model_dir},
+        on_success=_reload_trained_models,
+    )
+    return {"message": "Training job submitted", "status": job.status, "job_id": job.id}
 
 
-@router.get("/generate-datasets")
-async def generate_datasets(background_tasks: BackgroundTasks):
+@router.get("/generate-datasets", status_code=202)
+async def generate_datasets() -> Dict:
     """
     Generate large-scale synthetic datasets for training
     Creates 115,000+ labeled samples across 4 datasets
     """
-    def generate_in_background():
-        try:
-            data_generator.save_datasets_to_file("ml-service/data")
-            print("✓ Datasets generated successfully")
-        except Exception as e:
-            print(f"❌ Error generating datasets: {str(e)}")
-
-    background_tasks.add_task(generate_in_background)
+    job = job_runner.submit("generate-datasets", {"output_dir": "ml-service/data"})
     return {
         "message": "Dataset generation started",
+        "status": job.status,
+        "job_id": job.id,
         "estimated_samples": 115000,
         "datasets": [
             {"name": "transactions", "samples": 50000},
@@ -170,6 +220,44 @@ async def generate_datasets(background_tasks: BackgroundTasks):
     }
 
 
+@router.get("/jobs")
+async def list_jobs(kind: Optional[str] = None) -> Dict:
+    """List training and generation jobs, newest first"""
+    return {
+        "jobs": [job.to_dict() for job in job_runner.list(kind)],
+        "runner": job_runner.stats(),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict:
+    """Get status, progress and result of a job"""
+    try:
+        return job_runner.get(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str) -> Dict:
+    """Cancel a queued or running job"""
+    try:
+        return job_runner.cancel(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    except JobFinished as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def _last_training() -> Optional[Dict]:
+    """Registry record of the last successful training job, if any"""
+    try:
+        with open(os.path.join(anomaly_engine.model_dir, TRAINING_MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
 @router.get("/model-status")
 async def get_model_status() -> Dict:
     """Get status of trained models"""
@@ -177,6 +265,7 @@ async def get_model_status() -> Dict:
         "fraud_model_loaded": anomaly_engine.fraud_model is not None,
         "intrusion_model_loaded": anomaly_engine.intrusion_model is not None,
         "scaler_loaded": anomaly_engine.scaler is not None,
+        "last_training": _last_training(),
         "timestamp": datetime.now().isoformat(),
     }
 
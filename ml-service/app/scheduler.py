@@ -0,0 +1,277 @@
+"""
+CAPSTACK ML Scheduler - Priority classes for request work
+Interactive requests take worker slots ahead of bulk work, which runs in chunks and yields between them
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import is_dataclass, fields
+from typing import Any, Callable, Deque, Dict, Iterator, Mapping, Optional
+
+import numpy as np
+
+from .metrics import SCHEDULER_ACTIVE, SCHEDULER_PREEMPTIONS, SCHEDULER_QUEUE_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PRIORITY_CLASSES = ("interactive", "bulk")
+
+# Priority class of the work running in this context, None outside the scheduler
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("priority_class", default=None)
+
+
+def scheduler_enabled() -> bool:
+    return os.getenv("SCHEDULER_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def chunk_rows() -> int:
+    """Rows per bulk chunk from SCHEDULER_CHUNK_ROWS (default 10000)"""
+    return max(int(os.getenv("SCHEDULER_CHUNK_ROWS", "10000")), 1)
+
+
+class _Waiter:
+    """A queued slot request, woken on the event loop or in a thread"""
+
+    __slots__ = ("priority", "enqueued", "granted", "_future", "_loop", "_event")
+
+    def __init__(self, priority: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self._loop = loop
+        self._future = loop.create_future() if loop is not None else None
+        self._event = None if loop is not None else threading.Event()
+
+    def grant(self):
+        self.granted = True
+        if self._future is not None:
+            self._loop.call_soon_threadsafe(self._resolve)
+        else:
+            self._event.set()
+
+    def _resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+    async def wait_async(self):
+        await self._future
+
+    def wait(self):
+        self._event.wait()
+
+
+class PriorityScheduler:
+    """
+    Worker slots shared by priority classes.
+
+    At most ``max_concurrency`` requests run at once and each class has its
+    own cap. Freed slots go to the highest-priority class with waiters, FIFO
+    within a class. Bulk handlers call ``checkpoint()`` between chunks: when
+    a higher class is waiting they hand their slot over and rejoin the head
+    of their queue, so an interactive request waits for at most one chunk.
+    """
+
+    def __init__(self, max_concurrency: int = 0, caps: Optional[Mapping[str, int]] = None):
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("SCHEDULER_MAX_CONCURRENCY", str(2 * (os.cpu_count() or 1)))
+        )
+        defaults = {
+            "interactive": self.max_concurrency,
+            "bulk": max(1, self.max_concurrency // 2),
+        }
+        self.caps = {
+            name: int((caps or {}).get(name) or os.getenv(
+                f"SCHEDULER_{name.upper()}_CONCURRENCY", str(defaults[name])
+            ))
+            for name in PRIORITY_CLASSES
+        }
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in PRIORITY_CLASSES}
+        self._active = {name: 0 for name in PRIORITY_CLASSES}
+
+    def _dispatch(self):
+        """Grant free slots to waiters in priority order (lock held)"""
+        total = sum(self._active.values())
+        for name in PRIORITY_CLASSES:
+            queue = self._queues[name]
+            while queue and total < self.max_concurrency and self._active[name] < self.caps[name]:
+                waiter = queue.popleft()
+                self._active[name] += 1
+                total += 1
+                SCHEDULER_QUEUE_DELAY.labels(name).observe(time.perf_counter() - waiter.enqueued)
+                SCHEDULER_ACTIVE.labels(name).set(self._active[name])
+                waiter.grant()
+            if queue:
+                # Lower classes may not overtake a class waiting for capacity
+                break
+
+    def _enqueue(self, waiter: _Waiter, front: bool = False):
+        with self._lock:
+            if front:
+                self._queues[waiter.priority].appendleft(waiter)
+            else:
+                self._queues[waiter.priority].append(waiter)
+            self._dispatch()
+
+    def release(self, priority: str):
+        with self._lock:
+            self._active[priority] -= 1
+            SCHEDULER_ACTIVE.labels(priority).set(self._active[priority])
+            self._dispatch()
+
+    async def acquire_async(self, priority: str):
+        """Wait on the event loop for a slot of ``priority``"""
+        waiter = _Waiter(priority, asyncio.get_running_loop())
+        self._enqueue(waiter)
+        if waiter.granted:
+            return
+        try:
+            await waiter.wait_async()
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._queues[priority].remove(waiter)
+            if granted:
+                # Granted after the cancellation was delivered: hand the slot back
+                self.release(priority)
+            raise
+
+    def acquire(self, priority: str, front: bool = False):
+        """Block the calling thread until a slot of ``priority`` is free"""
+        waiter = _Waiter(priority)
+        self._enqueue(waiter, front)
+        waiter.wait()
+
+    def higher_waiting(self, priority: str) -> bool:
+        higher = PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority)]
+        return any(self._queues[name] for name in higher)
+
+    def checkpoint(self):
+        """
+        Yield the current slot to waiting higher-priority work.
+
+        A no-op outside scheduled work or when nothing outranks it; otherwise
+        the slot is released and re-acquired at the head of the class queue.
+        """
+        priority = _current_priority.get()
+        if priority is None or not self.higher_waiting(priority):
+            return
+        SCHEDULER_PREEMPTIONS.labels(priority).inc()
+        self.release(priority)
+        self.acquire(priority, front=True)
+
+    @contextlib.contextmanager
+    def hold(self, priority: str) -> Iterator[None]:
+        """Run a block of thread work (e.g. a background task) in ``priority``"""
+        if not scheduler_enabled():
+            yield
+            return
+        self.acquire(priority)
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+            self.release(priority)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "caps": dict(self.caps),
+                "active": dict(self._active),
+                "waiting": {name: len(queue) for name, queue in self._queues.items()},
+            }
+
+
+scheduler = PriorityScheduler()
+
+
+def prioritized(priority: str) -> Callable[[Callable], Callable]:
+    """
+    Declare the priority class of an async route handler.
+
+    Apply it above ``timed_executor`` (and below ``coalesce_requests``, so
+    coalesced duplicates take no slot). The handler runs once a slot of its
+    class is granted; the class is visible to ``checkpoint()`` in the
+    handler's worker thread.
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority}")
+
+    def decorator(func: Callable) -> Callable:
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError("prioritized() needs an async handler; apply it above timed_executor")
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not scheduler_enabled():
+                return await func(*args, **kwargs)
+            await scheduler.acquire_async(priority)
+            token = _current_priority.set(priority)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_priority.reset(token)
+                scheduler.release(priority)
+
+        wrapper.priority_class = priority
+        return wrapper
+
+    return decorator
+
+
+def _concat(parts):
+    first = parts[0]
+    if first is None:
+        return None
+    if isinstance(first, np.ndarray):
+        return np.concatenate(parts)
+    if isinstance(first, dict):
+        return {key: _concat([part[key] for part in parts]) for key in first}
+    if is_dataclass(first):
+        return type(first)(**{f.name: _concat([getattr(part, f.name) for part in parts])
+                              for f in fields(first)})
+    if isinstance(first, list):
+        return [item for part in parts for item in part]
+    raise TypeError(f"Cannot concatenate chunk results of type {type(first).__name__}")
+
+
+def run_chunked(func: Callable[[Dict[str, Any]], Any], columns: Mapping[str, Any],
+                n_rows: int, size: int = 0,
+                on_chunk: Optional[Callable[[int, Any], None]] = None) -> Any:
+    """
+    ``func(columns)`` computed over row chunks with a checkpoint between them.
+
+    ``func`` must be row-wise; chunk results (arrays, dicts of arrays or
+    dataclasses of arrays) are concatenated back in order. ``on_chunk(rows
+    done, chunk result)`` is called after each chunk, e.g. to report partial
+    results.
+    """
+    size = size or chunk_rows()
+    if n_rows <= size:
+        result = func(dict(columns))
+        if on_chunk is not None:
+            on_chunk(n_rows, result)
+        return result
+    parts = []
+    for start in range(0, n_rows, size):
+        if parts:
+            scheduler.checkpoint()
+        parts.append(func({
+            name: values[start:start + size] if values is not None else None
+            for name, values in columns.items()
+        }))
+        if on_chunk is not None:
+            on_chunk(min(start + size, n_rows), parts[-1])
+    return _concat(parts)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 class RiskScoreRequest(BaseModel):
@@ -20,6 +22,8 @@ class HealthScoreRequest(BaseModel):
 class HealthScoreResponse(BaseModel):
     score: float
     category: str
+    # Rule-based score served because the risk model missed the deadline
+    degraded: bool = False
 
 class SurvivalRequest(BaseModel):
     emergency_fund: float
@@ -28,4 +32,29 @@ class SurvivalRequest(BaseModel):
 
 class SurvivalResponse(BaseModel):
     months: float
-    category: str
\ No newline at end of file
+    category: str
+
+class HealthScoreBatchRequest(BaseModel):
+    user_ids: Optional[list[str]] = None
+    income: list[float]
+    expenses: list[float]
+    savings: list[float]
+    debt: list[float]
+
+class HealthScoreBatchResponse(BaseModel):
+    count: int
+    user_ids: Optional[list[str]]
+    score: list[float]
+    category: list[str]
+
+class SurvivalBatchRequest(BaseModel):
+    user_ids: Optional[list[str]] = None
+    emergency_fund: list[float]
+    monthly_expenses: list[float]
+    income_stability: list[float]
+
+class SurvivalBatchResponse(BaseModel):
+    count: int
+    user_ids: Optional[list[str]]
+    months: list[float]
+    category: list[str]
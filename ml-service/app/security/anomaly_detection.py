@@ -1,14 +1,20 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
-import joblib
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 import json
 from datetime import datetime, timedelta
 import hashlib
+import logging
+import threading
+import time
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+# sklearn and joblib are imported where models are trained or loaded, which
+# keeps them off the service's import path
+
+logger = logging.getLogger(__name__)
 
 class AnomalyDetectionEngine:
     """
@@ -20,7 +26,7 @@ class AnomalyDetectionEngine:
         self.model_dir = model_dir
         self.fraud_model = None
         self.intrusion_model = None
-        self.scaler = StandardScaler()
+        self._scaler = None
         self.feature_names = [
             "transaction_amount",
             "transaction_frequency",
@@ -32,11 +38,25 @@ class AnomalyDetectionEngine:
             "account_age_days",
         ]
 
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, value):
+        self._scaler = value
+
     def train_fraud_detection_model(self, X_train, y_train, X_test, y_test):
         """
         Train Random Forest model for fraud detection
         y_train: 1 for fraud, 0 for legitimate
         """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import classification_report
+
         self.fraud_model = RandomForestClassifier(
             n_estimators=200,
             max_depth=15,
@@ -60,6 +80,8 @@ class AnomalyDetectionEngine:
         Train Isolation Forest for intrusion/anomaly detection
         Unsupervised learning for network traffic anomalies
         """
+        from sklearn.ensemble import IsolationForest
+
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
 
@@ -105,25 +127,25 @@ class AnomalyDetectionEngine:
         if self.intrusion_model is None:
             raise ValueError("Intrusion model not trained")
 
-        results = []
-        for tx in transactions:
-            features = self._extract_features(tx)
-            X = np.array([features])
-            X_scaled = self.scaler.transform(X)
+        if not transactions:
+            return []
 
-            anomaly_score = self.intrusion_model.score_samples(X_scaled)[0]
-            is_anomaly = self.intrusion_model.predict(X_scaled)[0] == -1
+        X = np.array([self._extract_features(tx) for tx in transactions])
+        X_scaled = self.scaler.transform(X)
 
-            results.append(
-                {
-                    "transaction_id": tx.get("id"),
-                    "is_anomaly": bool(is_anomaly),
-                    "anomaly_score": float(anomaly_score),
-                    "severity": self._calculate_severity(anomaly_score),
-                }
-            )
+        # Score the whole batch with one call; predict() is score < offset_
+        anomaly_scores = self.intrusion_model.score_samples(X_scaled)
+        is_anomaly = anomaly_scores < self.intrusion_model.offset_
 
-        return results
+        return [
+            {
+                "transaction_id": tx.get("id"),
+                "is_anomaly": bool(flag),
+                "anomaly_score": float(score),
+                "severity": self._calculate_severity(score),
+            }
+            for tx, score, flag in zip(transactions, anomaly_scores, is_anomaly)
+        ]
 
     def _extract_features(self, transaction: Dict) -> List[float]:
         """
@@ -153,21 +175,27 @@ class AnomalyDetectionEngine:
         else:
             return "LOW"
 
-    def save_models(self):
-        """Save trained models to disk"""
+    def save_models(self) -> List[str]:
+        """Save trained models to disk, each replacing the served file atomically"""
+        from app.model_registry import publish_artifact
+
+        saved = []
         if self.fraud_model:
-            joblib.dump(
+            saved.append(publish_artifact(
                 self.fraud_model, f"{self.model_dir}/fraud_detection_model.pkl"
-            )
+            ))
         if self.intrusion_model:
-            joblib.dump(
+            saved.append(publish_artifact(
                 self.intrusion_model,
                 f"{self.model_dir}/intrusion_detection_model.pkl",
-            )
-        joblib.dump(self.scaler, f"{self.model_dir}/scaler.pkl")
+            ))
+        saved.append(publish_artifact(self.scaler, f"{self.model_dir}/scaler.pkl"))
+        return [str(path) for path in saved]
 
     def load_models(self):
         """Load pre-trained models from disk"""
+        import joblib
+
         self.fraud_model = joblib.load(
             f"{self.model_dir}/fraud_detection_model.pkl"
         )
@@ -175,3 +203,226 @@ class AnomalyDetectionEngine:
             f"{self.model_dir}/intrusion_detection_model.pkl"
         )
         self.scaler = joblib.load(f"{self.model_dir}/scaler.pkl")
+
+
+class _StreamingModelState:
+    """Immutable bundle of a fitted forest and its reference statistics"""
+
+    def __init__(self, model: "IsolationForest", scaler: "StandardScaler", version: int):
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+        self.reference_mean = scaler.mean_
+        self.reference_std = np.where(scaler.scale_ > 0, scaler.scale_, 1.0)
+
+
+class StreamingAnomalyDetector:
+    """
+    Continuous anomaly detection over a transaction stream.
+
+    Incoming events are scored in batches with the current Isolation Forest
+    and appended to a rolling reference window. A replacement forest is fit
+    on a copy of the window in a background thread every ``refit_every``
+    events, or as soon as the incoming feature means drift away from the
+    reference window, and is then swapped in atomically.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 8,
+        window_size: int = 10000,
+        refit_every: int = 5000,
+        min_fit_events: int = 500,
+        drift_threshold: float = 0.5,
+        drift_alpha: float = 0.01,
+        contamination: float = 0.05,
+        n_estimators: int = 100,
+    ):
+        self.window_size = window_size
+        self.refit_every = refit_every
+        self.min_fit_events = min_fit_events
+        self.drift_threshold = drift_threshold
+        self.drift_alpha = drift_alpha
+        self.contamination = contamination
+        self.n_estimators = n_estimators
+
+        self._window = np.zeros((window_size, n_features), dtype=np.float64)
+        self._window_pos = 0
+        self._window_filled = 0
+        self._lock = threading.Lock()
+        self._state: Optional[_StreamingModelState] = None
+        self._refit_thread: Optional[threading.Thread] = None
+        self._recent_mean: Optional[np.ndarray] = None
+
+        self.events_scored = 0
+        self._events_since_refit = 0
+        self.refit_count = 0
+        self.drift_refits = 0
+        self.last_refit_seconds = 0.0
+        self.last_refit_reason = ""
+        self.events_per_sec = 0.0
+        self._rate_window_start = time.perf_counter()
+        self._rate_window_events = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self._state is not None
+
+    def score(self, X: np.ndarray) -> Dict[str, Any]:
+        """
+        Score a batch of events and add them to the reference window.
+
+        Returns the decision scores (negative = anomalous) and anomaly flags.
+        Until the first forest is fit, every event scores 0 and is not flagged.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        state = self._state  # single read: a concurrent swap cannot tear it
+
+        if state is None:
+            scores = np.zeros(len(X))
+        else:
+            scores = state.model.decision_function(state.scaler.transform(X))
+
+        # Concurrent callers (the /stream route, ingestion workers) update the
+        # window, drift and refit state under one lock so refits never overlap
+        with self._lock:
+            self._append(X)
+            self._track_drift(X)
+            self._update_rate(len(X))
+            self._maybe_refit()
+
+        return {
+            "anomaly_score": scores,
+            "is_anomaly": scores < 0,
+            "model_version": state.version if state is not None else 0,
+        }
+
+    def _append(self, X: np.ndarray):
+        """Add events to the rolling window (lock held)"""
+        n = len(X)
+        if n >= self.window_size:
+            self._window[:] = X[-self.window_size:]
+            self._window_pos = 0
+            self._window_filled = self.window_size
+        else:
+            end = self._window_pos + n
+            if end <= self.window_size:
+                self._window[self._window_pos:end] = X
+            else:
+                split = self.window_size - self._window_pos
+                self._window[self._window_pos:] = X[:split]
+                self._window[:n - split] = X[split:]
+            self._window_pos = end % self.window_size
+            self._window_filled = min(self.window_size, self._window_filled + n)
+        self.events_scored += n
+        self._events_since_refit += n
+
+    def _track_drift(self, X: np.ndarray):
+        """Update the exponentially weighted recent feature means (lock held)"""
+        batch_mean = X.mean(axis=0)
+        if self._recent_mean is None or self._state is None:
+            self._recent_mean = batch_mean
+            return
+        weight = 1 - (1 - self.drift_alpha) ** len(X)
+        self._recent_mean = self._recent_mean + weight * (batch_mean - self._recent_mean)
+
+    def drift_score(self) -> float:
+        """Largest shift of recent feature means, in reference standard deviations"""
+        with self._lock:
+            return self._drift_score()
+
+    def _drift_score(self) -> float:
+        state = self._state
+        if state is None or self._recent_mean is None:
+            return 0.0
+        shift = np.abs(self._recent_mean - state.reference_mean) / state.reference_std
+        return float(shift.max())
+
+    def _update_rate(self, n: int):
+        self._rate_window_events += n
+        elapsed = time.perf_counter() - self._rate_window_start
+        if elapsed >= 1.0:
+            self.events_per_sec = self._rate_window_events / elapsed
+            self._rate_window_start = time.perf_counter()
+            self._rate_window_events = 0
+
+    def _maybe_refit(self):
+        """Start a background refit when one is due (lock held)"""
+        if self._refit_thread is not None and self._refit_thread.is_alive():
+            return
+        if self._window_filled < self.min_fit_events:
+            return
+
+        if self._state is None:
+            reason = "initial"
+        elif self._events_since_refit >= self.refit_every:
+            reason = "scheduled"
+        elif (
+            self._events_since_refit >= self.min_fit_events
+            and self._drift_score() > self.drift_threshold
+        ):
+            # Require enough post-drift events to represent the new regime
+            reason = "drift"
+        else:
+            return
+
+        reference = self._window[:self._window_filled].copy()
+        self._events_since_refit = 0
+        self._refit_thread = threading.Thread(
+            target=self._refit, args=(reference, reason), daemon=True
+        )
+        self._refit_thread.start()
+
+    def _refit(self, reference: np.ndarray, reason: str):
+        start = time.perf_counter()
+        try:
+            from sklearn.ensemble import IsolationForest
+            from sklearn.preprocessing import StandardScaler
+
+            scaler = StandardScaler().fit(reference)
+            model = IsolationForest(
+                n_estimators=self.n_estimators,
+                contamination=self.contamination,
+                random_state=42,
+            ).fit(scaler.transform(reference))
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Streaming anomaly refit failed: %s", str(e))
+            return
+
+        with self._lock:
+            version = self.refit_count + 1
+            self._state = _StreamingModelState(model, scaler, version)
+            self._recent_mean = self._state.reference_mean.copy()
+            self.refit_count = version
+            if reason == "drift":
+                self.drift_refits += 1
+            self.last_refit_reason = reason
+            self.last_refit_seconds = time.perf_counter() - start
+        logger.info(
+            "Streaming anomaly model v%d fit on %d events (%s) in %.3fs",
+            version, len(reference), reason, self.last_refit_seconds,
+        )
+
+    def wait_for_refit(self, timeout: Optional[float] = None):
+        """Block until a running background refit has finished"""
+        if self._refit_thread is not None:
+            self._refit_thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Return throughput and refit statistics"""
+        return {
+            "model_ready": self.is_ready,
+            "model_version": self.refit_count,
+            "events_scored": self.events_scored,
+            "events_per_sec": round(self.events_per_sec, 2),
+            "window_filled": self._window_filled,
+            "window_size": self.window_size,
+            "refit_count": self.refit_count,
+            "drift_refits": self.drift_refits,
+            "refit_in_progress": (
+                self._refit_thread is not None and self._refit_thread.is_alive()
+            ),
+            "last_refit_seconds": round(self.last_refit_seconds, 4),
+            "last_refit_reason": self.last_refit_reason,
+            "drift_score": round(self.drift_score(), 4),
+        }
@@ -168,35 +168,33 @@ class SyntheticDataGenerator:
 
         return pd.DataFrame(data)
 
-    def save_datasets_to_file(self, output_dir: str = "ml-service/data"):
-        """Save all datasets to CSV files"""
+    def save_datasets_to_file(self, output_dir: str = "ml-service/data", progress=None):
+        """
+        Save all datasets to CSV files
+        ``progress(fraction, message)`` is called after each dataset; returns the files written
+        """
         import os
         os.makedirs(output_dir, exist_ok=True)
 
         print("Generating large-scale training datasets...")
 
-        # Transaction dataset
-        tx_df = self.generate_transaction_dataset(50000)
-        tx_df.to_csv(f"{output_dir}/transactions_50k.csv", index=False)
-        print(f"✓ Generated transaction dataset: {len(tx_df)} samples")
-
-        # Network traffic dataset
-        net_df = self.generate_network_traffic_dataset(30000)
-        net_df.to_csv(f"{output_dir}/network_traffic_30k.csv", index=False)
-        print(f"✓ Generated network traffic dataset: {len(net_df)} samples")
-
-        # User behavior dataset
-        behavior_df = self.generate_user_behavior_dataset(25000)
-        behavior_df.to_csv(f"{output_dir}/user_behavior_25k.csv", index=False)
-        print(f"✓ Generated user behavior dataset: {len(behavior_df)} samples")
-
-        # Compliance logs
-        compliance_df = self.generate_compliance_audit_logs(10000)
-        compliance_df.to_csv(f"{output_dir}/compliance_audit_10k.csv", index=False)
-        print(f"✓ Generated compliance audit logs: {len(compliance_df)} samples")
+        datasets = [
+            ("transaction dataset", self.generate_transaction_dataset, 50000, "transactions_50k.csv"),
+            ("network traffic dataset", self.generate_network_traffic_dataset, 30000, "network_traffic_30k.csv"),
+            ("user behavior dataset", self.generate_user_behavior_dataset, 25000, "user_behavior_25k.csv"),
+            ("compliance audit logs", self.generate_compliance_audit_logs, 10000, "compliance_audit_10k.csv"),
+        ]
+        files = []
+        for i, (name, generate, n_samples, filename) in enumerate(datasets, start=1):
+            df = generate(n_samples)
+            df.to_csv(f"{output_dir}/{filename}", index=False)
+            files.append({"name": filename, "samples": len(df)})
+            print(f"✓ Generated {name}: {len(df)} samples")
+            if progress is not None:
+                progress(i / len(datasets), f"Generated {name}")
 
         print(f"\nTotal: 115,000 training samples generated in {output_dir}/")
-
+        return files
 
 if __name__ == "__main__":
     generator = SyntheticDataGenerator()
@@ -9,6 +9,9 @@ import joblib
 import os
 from typing import Dict, List, Tuple, Any
 import warnings
+
+from .financial_anomaly import ANOMALY_FEATURES
+from .income_volatility import CATEGORICAL_FEATURES, NUMERIC_FEATURES
 warnings.filterwarnings('ignore')
 
 class EnhancedFinancialModels:
@@ -259,21 +262,17 @@ class EnhancedFinancialModels:
         # Target: income_volatility_risk (categorical)
         target_column = 'income_volatility_risk'
         
-        # Feature columns
-        feature_columns = [
-            'age', 'experience_years', 'base_salary', 'variable_income_ratio',
-            'job_stability_score', 'automation_risk_score', 'industry_growth_rate',
-            'skill_relevance_score', 'layoff_risk_score'
-        ]
+        # Feature columns, in the order the serving engine builds them
+        feature_columns = list(NUMERIC_FEATURES)
         
         # Handle categorical features
-        categorical_features = ['education', 'industry']
-        for feature in categorical_features:
-            if feature in df.columns:
-                le = LabelEncoder()
-                df[f'{feature}_encoded'] = le.fit_transform(df[feature].astype(str))
-                feature_columns.append(f'{feature}_encoded')
-                self.encoders[f'income_{feature}'] = le
+        income_encoders = {}
+        for feature in CATEGORICAL_FEATURES:
+            le = LabelEncoder()
+            df[f'{feature}_encoded'] = le.fit_transform(df[feature].astype(str))
+            feature_columns.append(f'{feature}_encoded')
+            self.encoders[f'income_{feature}'] = le
+            income_encoders[feature] = le
         
         X = df[feature_columns].fillna(0)
         y = df[target_column]
@@ -318,6 +317,7 @@ class EnhancedFinancialModels:
         self.scalers['income_volatility'] = scaler
         joblib.dump(model, f"{self.model_dir}/income_volatility.pkl")
         joblib.dump(scaler, f"{self.model_dir}/income_volatility_scaler.pkl")
+        joblib.dump(income_encoders, f"{self.model_dir}/income_volatility_encoders.pkl")
         
         return {
             'model_type': 'income_volatility',
@@ -336,12 +336,7 @@ class EnhancedFinancialModels:
         df = pd.read_csv(data_path)
         
         # Select numerical features for anomaly detection
-        numerical_features = [
-            'monthly_income', 'monthly_expenses', 'emergency_fund_months',
-            'debt_to_income_ratio', 'savings_rate', 'crisis_severity',
-            'income_loss_percentage', 'expense_increase_percentage',
-            'survival_months', 'financial_stress_score'
-        ]
+        numerical_features = list(ANOMALY_FEATURES)
         
         # Filter available features
         available_features = [f for f in numerical_features if f in df.columns]
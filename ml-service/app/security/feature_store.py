@@ -0,0 +1,226 @@
+"""
+Online per-user transaction feature store
+Keeps sliding-window velocity, EWMA amount and recency features in memory
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Window lengths in seconds: 1 hour, 24 hours, 7 days
+DEFAULT_WINDOWS: Tuple[int, ...] = (3600, 86400, 604800)
+# Window used for the fraud model's ``velocity_check`` feature
+VELOCITY_WINDOW = 86400
+# Feature values for users without any history (training data mean)
+DEFAULT_TIME_SINCE_LAST_TX_HOURS = 24.0
+
+
+class TransactionFeatureStore:
+    """
+    In-process feature store keyed by user id.
+
+    Every user owns one row of preallocated NumPy arrays: a ring buffer of
+    recent transaction timestamps, the EWMA of transaction amounts and the
+    last transaction time. Updates are O(1) per event and memory is bounded
+    by ``max_users * ring_size``; the least recently active users are
+    evicted when the store is full.
+    """
+
+    def __init__(
+        self,
+        max_users: int = 50_000,
+        ring_size: int = 64,
+        windows: Tuple[int, ...] = DEFAULT_WINDOWS,
+        ewma_alpha: float = 0.1,
+    ):
+        if VELOCITY_WINDOW not in windows:
+            raise ValueError("windows must include the velocity window")
+        self.max_users = max_users
+        self.ring_size = ring_size
+        self.windows = np.asarray(sorted(windows), dtype=np.float64)
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+        self._free = list(range(max_users - 1, -1, -1))
+        self._allocate()
+
+    def _allocate(self):
+        """Allocate the array-backed state for all user slots"""
+        self._timestamps = np.full(
+            (self.max_users, self.ring_size), -np.inf, dtype=np.float64
+        )
+        self._head = np.zeros(self.max_users, dtype=np.int32)
+        self._ewma_amount = np.zeros(self.max_users, dtype=np.float64)
+        self._last_ts = np.full(self.max_users, -np.inf, dtype=np.float64)
+        self._event_count = np.zeros(self.max_users, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._slots
+
+    def _evict(self):
+        """Free the least recently active ~1% of slots"""
+        n_evict = max(1, self.max_users // 100)
+        victims = np.argpartition(self._last_ts, n_evict - 1)[:n_evict]
+        victim_set = set(victims.tolist())
+        for user_id in [u for u, s in self._slots.items() if s in victim_set]:
+            del self._slots[user_id]
+        self._timestamps[victims] = -np.inf
+        self._head[victims] = 0
+        self._ewma_amount[victims] = 0.0
+        self._last_ts[victims] = -np.inf
+        self._event_count[victims] = 0
+        self._free.extend(victims.tolist())
+        logger.debug("Feature store evicted %d users", n_evict)
+
+    def _slot_for(self, user_id: str) -> int:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            if not self._free:
+                self._evict()
+            slot = self._free.pop()
+            self._slots[user_id] = slot
+        return slot
+
+    def observe(
+        self,
+        user_id: str,
+        amount: float,
+        timestamp: Optional[float] = None,
+    ):
+        """Record a transaction for a user (O(1) state update)"""
+        ts = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            slot = self._slot_for(user_id)
+            head = self._head[slot]
+            self._timestamps[slot, head] = ts
+            self._head[slot] = (head + 1) % self.ring_size
+            if self._event_count[slot] == 0:
+                self._ewma_amount[slot] = amount
+            else:
+                self._ewma_amount[slot] += self.ewma_alpha * (
+                    amount - self._ewma_amount[slot]
+                )
+            self._last_ts[slot] = max(self._last_ts[slot], ts)
+            self._event_count[slot] += 1
+
+    def window_counts(
+        self,
+        user_id: str,
+        timestamp: Optional[float] = None,
+    ) -> Dict[int, int]:
+        """Count a user's transactions inside each sliding window"""
+        now = time.time() if timestamp is None else float(timestamp)
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return {int(w): 0 for w in self.windows}
+        cutoffs = now - self.windows
+        counts = (self._timestamps[slot][None, :] > cutoffs[:, None]).sum(axis=1)
+        return {int(w): int(c) for w, c in zip(self.windows, counts)}
+
+    def features(
+        self,
+        user_id: str,
+        amount: Optional[float] = None,
+        timestamp: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """
+        Return the fraud model's velocity features for a user.
+
+        ``velocity_check`` is the number of transactions in the last 24 hours,
+        ``time_since_last_tx`` is expressed in hours and
+        ``typical_transaction_amount`` is the EWMA of past amounts. Users
+        without history fall back to the current ``amount``.
+        """
+        now = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            counts = self.window_counts(user_id, now)
+            slot = self._slots.get(user_id)
+            if slot is None or self._event_count[slot] == 0:
+                time_since_last = DEFAULT_TIME_SINCE_LAST_TX_HOURS
+                typical = amount if amount is not None else 0.0
+            else:
+                time_since_last = max(0.0, now - self._last_ts[slot]) / 3600
+                typical = float(self._ewma_amount[slot])
+
+        features = {
+            "velocity_check": float(counts[VELOCITY_WINDOW]),
+            "time_since_last_tx": float(time_since_last),
+            "typical_transaction_amount": float(typical),
+        }
+        for window, count in counts.items():
+            features[f"tx_count_{window}s"] = float(count)
+        return features
+
+    def stats(self) -> Dict[str, float]:
+        """Return occupancy and memory statistics"""
+        nbytes = sum(
+            arr.nbytes for arr in (
+                self._timestamps, self._head, self._ewma_amount,
+                self._last_ts, self._event_count,
+            )
+        )
+        return {
+            "users": len(self._slots),
+            "max_users": self.max_users,
+            "ring_size": self.ring_size,
+            "memory_bytes": nbytes,
+        }
+
+    def snapshot(self, path: str):
+        """Write the store state to a compressed ``.npz`` file"""
+        with self._lock:
+            users = list(self._slots.keys())
+            slots = np.fromiter(
+                (self._slots[u] for u in users), dtype=np.int64, count=len(users)
+            )
+            target = Path(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    users=np.asarray(users, dtype=str),
+                    windows=self.windows,
+                    ewma_alpha=np.float64(self.ewma_alpha),
+                    timestamps=self._timestamps[slots],
+                    head=self._head[slots],
+                    ewma_amount=self._ewma_amount[slots],
+                    last_ts=self._last_ts[slots],
+                    event_count=self._event_count[slots],
+                )
+        logger.info("Feature store snapshot of %d users saved to %s", len(users), path)
+
+    def restore(self, path: str):
+        """Replace the store state with a snapshot written by ``snapshot``"""
+        with np.load(path, allow_pickle=False) as data:
+            users = data["users"].tolist()
+            timestamps = data["timestamps"]
+            if timestamps.shape[1] != self.ring_size:
+                raise ValueError(
+                    f"Snapshot ring size {timestamps.shape[1]} does not match "
+                    f"store ring size {self.ring_size}"
+                )
+            if len(users) > self.max_users:
+                raise ValueError("Snapshot holds more users than max_users")
+
+            with self._lock:
+                self.windows = data["windows"].astype(np.float64)
+                self.ewma_alpha = float(data["ewma_alpha"])
+                self._allocate()
+                n = len(users)
+                self._timestamps[:n] = timestamps
+                self._head[:n] = data["head"]
+                self._ewma_amount[:n] = data["ewma_amount"]
+                self._last_ts[:n] = data["last_ts"]
+                self._event_count[:n] = data["event_count"]
+                self._slots = {u: i for i, u in enumerate(users)}
+                self._free = list(range(self.max_users - 1, n - 1, -1))
+        logger.info("Feature store restored %d users from %s", len(users), path)
@@ -0,0 +1,256 @@
+"""
+Fraud cascade scoring
+Scores every transaction with a small compiled subset of the fraud forest and sends only the uncertain band to the full model
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.compiled_trees import compile_model
+from app.metrics import record_fraud_cascade
+from app.model_slimming import greedy_select_trees, subset_forest
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = "app/models/enhanced"
+CASCADE_FILE = "fraud_detection_cascade.json"
+SCORING_MODES = ("full", "cascade")
+# Used until a calibration has been written: the first trees of the forest
+# and a conservative band
+DEFAULT_STAGE1_TREES = 8
+DEFAULT_BAND = (0.02, 0.9)
+# A handful of trees gives stage 1 a probability scale fine enough for a band
+MIN_STAGE1_TREES = 4
+
+
+def scoring_mode() -> str:
+    """Fraud scoring mode from FRAUD_SCORING_MODE (default full)"""
+    mode = os.getenv("FRAUD_SCORING_MODE", "full").lower()
+    if mode not in SCORING_MODES:
+        raise ValueError(f"FRAUD_SCORING_MODE must be one of {', '.join(SCORING_MODES)}")
+    return mode
+
+
+class FraudCascade:
+    """
+    Two-stage fraud scorer.
+
+    Stage 1, a few trees of the forest compiled to float32 node arrays,
+    scores every transaction. Scores below ``low`` are final as legitimate
+    and scores above ``high`` as fraud; only the band in between is rescored
+    by the full model, whose probability then replaces the stage-1 one.
+    """
+
+    def __init__(self, stage1, full_model, low: float, high: float,
+                 tree_indices: Sequence[int] = ()):
+        if not 0.0 <= low <= 0.5 <= high <= 1.0:
+            raise ValueError(f"Cascade band must satisfy 0 <= low <= 0.5 <= high <= 1, "
+                             f"got ({low}, {high})")
+        self.stage1 = stage1
+        self.full_model = full_model
+        self.low = float(low)
+        self.high = float(high)
+        self.tree_indices = tuple(int(i) for i in tree_indices)
+
+    @classmethod
+    def from_forest(cls, forest, full_model, tree_indices: Sequence[int],
+                    low: float, high: float) -> "FraudCascade":
+        """Cascade whose first stage is ``tree_indices`` of a bagged ``forest``"""
+        stage1 = compile_model(subset_forest(forest, tree_indices), "float32")
+        return cls(stage1, full_model, low, high, tree_indices)
+
+    def score(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fraud probability per row and whether the row reached the full model.
+
+        ``X`` is the scaled feature matrix of the full model.
+        """
+        probability = self.stage1.predict_proba(X)[:, 1].astype(np.float64)
+        escalated = (probability >= self.low) & (probability <= self.high)
+        if escalated.any():
+            probability[escalated] = self.full_model.predict_proba(X[escalated])[:, 1]
+        passed = int(escalated.sum())
+        record_fraud_cascade(
+            legitimate=int(np.count_nonzero(~escalated & (probability < self.low))),
+            fraud=int(np.count_nonzero(~escalated & (probability > self.high))),
+            escalated=passed,
+        )
+        return probability, escalated
+
+    def summary(self) -> Dict[str, Any]:
+        return {"stage1_trees": len(self.tree_indices), "low": self.low, "high": self.high}
+
+
+def load_cascade(forest, full_model, model_dir: str = MODEL_DIR) -> Optional[FraudCascade]:
+    """
+    Cascade for the served fraud forest from its calibration file.
+
+    Falls back to the default first-stage trees and band when no
+    calibration exists; returns None when the served model is not a bagged
+    forest or the calibration was made for a different one.
+    """
+    if not hasattr(forest, "estimators_") or hasattr(forest, "init_"):
+        logger.warning("Fraud cascade needs a bagged forest, got %s", type(forest).__name__)
+        return None
+    n_trees = len(forest.estimators_)
+    path = Path(model_dir) / CASCADE_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            calibration = json.load(f)
+    except FileNotFoundError:
+        logger.warning("No fraud cascade calibration at %s, using the default band %s",
+                       path, DEFAULT_BAND)
+        indices = list(range(min(DEFAULT_STAGE1_TREES, n_trees)))
+        return FraudCascade.from_forest(forest, full_model, indices, *DEFAULT_BAND)
+    except (OSError, ValueError) as e:
+        logger.warning("Unreadable fraud cascade calibration %s: %s", path, str(e))
+        return None
+    if calibration.get("forest_trees") != n_trees:
+        logger.warning("Fraud cascade calibration is for a %s-tree forest, served forest has %d",
+                       calibration.get("forest_trees"), n_trees)
+        return None
+    cascade = FraudCascade.from_forest(forest, full_model, calibration["tree_indices"],
+                                       calibration["low"], calibration["high"])
+    logger.info("Fraud cascade loaded: %d stage-1 trees, band [%.4f, %.4f]",
+                len(cascade.tree_indices), cascade.low, cascade.high)
+    return cascade
+
+
+def calibrate_band(stage1_probability: np.ndarray, full_probability: np.ndarray,
+                   y: np.ndarray, max_recall_loss: float = 0.005,
+                   max_false_positive_increase: float = 0.001) -> Tuple[float, float]:
+    """
+    Widest short-circuit band within the allowed losses.
+
+    A fraud the full model catches is lost when stage 1 scores it below
+    ``low``; ``low`` is the highest edge losing at most ``max_recall_loss``
+    of all frauds. Symmetrically, ``high`` is the lowest edge turning at
+    most ``max_false_positive_increase`` of the legitimate rows into
+    positives the full model would have cleared.
+    """
+    y = np.asarray(y).astype(bool)
+    full_positive = full_probability > 0.5
+
+    lost = np.sort(stage1_probability[y & full_positive])
+    allowed = int(np.floor(max_recall_loss * np.count_nonzero(y)))
+    low = float(lost[allowed]) if allowed < len(lost) else 0.5
+
+    flipped = np.sort(stage1_probability[~y & ~full_positive])[::-1]
+    allowed = int(np.floor(max_false_positive_increase * np.count_nonzero(~y)))
+    high = float(flipped[allowed]) if allowed < len(flipped) else 0.5
+    return min(low, 0.5), max(high, 0.5)
+
+
+def _rates(predicted: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    y = np.asarray(y).astype(bool)
+    return {
+        "recall": round(float(np.count_nonzero(predicted & y) / max(np.count_nonzero(y), 1)), 6),
+        "false_positive_rate": round(
+            float(np.count_nonzero(predicted & ~y) / max(np.count_nonzero(~y), 1)), 6
+        ),
+    }
+
+
+def calibrate(forest, X_select: np.ndarray, y_select: np.ndarray,
+              X_val: np.ndarray, y_val: np.ndarray, max_trees: int = 16,
+              tolerance: float = 0.02, max_recall_loss: float = 0.005,
+              max_false_positive_increase: float = 0.001) -> Tuple[FraudCascade, Dict[str, Any]]:
+    """
+    Pick the first-stage trees and band edges for a fraud forest.
+
+    Trees are chosen by greedy selection on one split (at most
+    ``max_trees``, stopping once ROC-AUC is within ``tolerance``); the band
+    is fitted on a second split so its losses are measured out of sample.
+    Returns the cascade and a report of pass-through rate, recall and
+    latency against the full forest.
+    """
+    indices, _ = greedy_select_trees(forest, X_select, y_select, tolerance, max_trees,
+                                     min_trees=min(MIN_STAGE1_TREES, max_trees))
+    stage1 = compile_model(subset_forest(forest, indices), "float32")
+    stage1_probability = stage1.predict_proba(X_val)[:, 1].astype(np.float64)
+    full_probability = forest.predict_proba(X_val)[:, 1]
+    low, high = calibrate_band(stage1_probability, full_probability, y_val,
+                               max_recall_loss, max_false_positive_increase)
+    cascade = FraudCascade(stage1, forest, low, high, indices)
+
+    escalated = (stage1_probability >= low) & (stage1_probability <= high)
+    cascade_probability = np.where(escalated, full_probability, stage1_probability)
+
+    def batch_ms(func):
+        start = time.perf_counter()
+        func(X_val)
+        return round((time.perf_counter() - start) * 1000, 3)
+
+    report = {
+        "forest_trees": len(forest.estimators_),
+        "tree_indices": [int(i) for i in indices],
+        "low": low,
+        "high": high,
+        "max_recall_loss": max_recall_loss,
+        "max_false_positive_increase": max_false_positive_increase,
+        "validation_rows": int(len(X_val)),
+        "pass_through_rate": round(float(escalated.mean()), 6),
+        "full": _rates(full_probability > 0.5, y_val),
+        "cascade": _rates(cascade_probability > 0.5, y_val),
+        "decision_agreement": round(
+            float(np.mean((cascade_probability > 0.5) == (full_probability > 0.5))), 6
+        ),
+        "full_batch_ms": batch_ms(forest.predict_proba),
+        "cascade_batch_ms": batch_ms(cascade.score),
+    }
+    return cascade, report
+
+
+def calibrate_service_model(n_samples: int = 20000, **kwargs) -> Dict[str, Any]:
+    """Calibrate the cascade of the saved fraud forest and write it next to the model"""
+    import warnings
+
+    import joblib
+
+    from app.model_slimming import _fraud_dataset
+
+    forest = joblib.load(Path(MODEL_DIR) / "fraud_detection_simple.pkl")
+    scaler = joblib.load(Path(MODEL_DIR) / "fraud_detection_scaler.pkl")
+    X, y = _fraud_dataset(n_samples)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        X_scaled = scaler.transform(X)
+    split = len(X_scaled) // 2
+    _, report = calibrate(forest, X_scaled[:split], y[:split], X_scaled[split:], y[split:],
+                          **kwargs)
+    path = Path(MODEL_DIR) / CASCADE_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Fraud cascade calibration written to %s", path)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calibrate the fraud scoring cascade")
+    parser.add_argument("--samples", type=int, default=20000,
+                        help="rows generated for tree selection and band calibration")
+    parser.add_argument("--max-trees", type=int, default=16,
+                        help="upper bound on first-stage trees")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="allowed ROC-AUC drop of the first stage alone")
+    parser.add_argument("--max-recall-loss", type=float, default=0.005,
+                        help="fraction of frauds the band may lose versus the full model")
+    parser.add_argument("--max-false-positive-increase", type=float, default=0.001,
+                        help="fraction of legitimate transactions the band may flag")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = calibrate_service_model(
+        args.samples, max_trees=args.max_trees, tolerance=args.tolerance,
+        max_recall_loss=args.max_recall_loss,
+        max_false_positive_increase=args.max_false_positive_increase,
+    )
+    print(json.dumps({k: v for k, v in result.items() if k != "tree_indices"}, indent=2))
@@ -0,0 +1,167 @@
+"""
+Income volatility serving engine
+Scores employment profiles with the trained income_volatility classifier, one row or a whole batch per call
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.rules import CompiledRules, get_rules
+from app.model_registry import serving_path
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = "app/models/enhanced"
+MODEL_FILE = "income_volatility.pkl"
+SCALER_FILE = "income_volatility_scaler.pkl"
+ENCODERS_FILE = "income_volatility_encoders.pkl"
+
+# Training feature order: numeric columns, then the label-encoded categoricals
+NUMERIC_FEATURES: Tuple[str, ...] = (
+    "age", "experience_years", "base_salary", "variable_income_ratio",
+    "job_stability_score", "automation_risk_score", "industry_growth_rate",
+    "skill_relevance_score", "layoff_risk_score",
+)
+CATEGORICAL_FEATURES: Tuple[str, ...] = ("education", "industry")
+FEATURE_COLUMNS: Tuple[str, ...] = NUMERIC_FEATURES + tuple(
+    f"{name}_encoded" for name in CATEGORICAL_FEATURES
+)
+
+
+def derive_columns(columns: Mapping[str, Any], rules: Optional[CompiledRules] = None) -> Dict[str, np.ndarray]:
+    """
+    Request columns plus the features the training data carries but requests do not.
+
+    ``industry_growth_rate`` comes from the industry trend table and
+    ``layoff_risk_score`` is ``1 - job_stability_score``, as in the dataset.
+    """
+    rules = rules or get_rules()
+    derived = {name: np.asarray(values) for name, values in columns.items()}
+    growth = rules.industry_trend.get_batch(derived["industry"])
+    derived["industry_growth_rate"] = np.asarray([trend["growth"] for trend in growth], dtype=np.float64)
+    derived["layoff_risk_score"] = 1 - np.asarray(derived["job_stability_score"], dtype=np.float64)
+    return derived
+
+
+def encode_labels(values: Sequence[str], classes: np.ndarray) -> np.ndarray:
+    """
+    LabelEncoder codes for ``values`` without its per-call validation.
+
+    Categories unseen in training get -1, below every fitted code, instead
+    of failing the whole batch.
+    """
+    values = np.asarray(values).astype(str)
+    index = np.searchsorted(classes, values)
+    clipped = np.minimum(index, len(classes) - 1)
+    return np.where(classes[clipped] == values, index, -1).astype(np.float64)
+
+
+def rule_assessment(columns: Mapping[str, Any], rules: Optional[CompiledRules] = None) -> Dict[str, np.ndarray]:
+    """
+    Rule-derived volatility score, income range, layoff risk and level per row.
+
+    The weighted formula of the single-profile analysis, evaluated on whole
+    columns.
+    """
+    rules = rules or get_rules()
+    age = np.asarray(columns["age"], dtype=np.float64)
+    job_stability = np.asarray(columns["job_stability_score"], dtype=np.float64)
+    automation_risk = np.asarray(columns["automation_risk_score"], dtype=np.float64)
+    skill_relevance = np.asarray(columns["skill_relevance_score"], dtype=np.float64)
+    base_salary = np.asarray(columns["base_salary"], dtype=np.float64)
+    industry_risk = rules.industry_risk.get_batch(columns["industry"]).astype(np.float64)
+    education_factor = rules.education_factor.get_batch(columns["education"]).astype(np.float64)
+
+    age_factor = np.where(age < 45, 1.0, 1.2)
+    volatility_score = (
+        (1 - job_stability) * 0.3 +
+        automation_risk * 0.25 +
+        industry_risk * 0.2 +
+        (1 - skill_relevance) * 0.15 +
+        (1 - education_factor) * 0.1
+    ) * age_factor
+    return {
+        "volatility_score": volatility_score,
+        "risk_level": rules.volatility_risk_level.classify_batch(volatility_score),
+        "monthly_low": base_salary * (1 - volatility_score * 0.5),
+        "monthly_high": base_salary * (1 + volatility_score * 0.3),
+        "layoff_risk_score": (1 - job_stability) * industry_risk * (1 - skill_relevance),
+        "industry_risk": industry_risk,
+        "education_factor": education_factor,
+    }
+
+
+class IncomeVolatilityEngine:
+    """
+    Trained income volatility classifier with its scaler and encoders.
+
+    Artifacts are loaded once on first use; when any is missing the engine
+    reports itself unavailable and callers fall back to the rules alone.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR):
+        self.model_dir = Path(model_dir)
+        self.model = None
+        self.classes: Tuple[str, ...] = ()
+        self._mean: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+        self._encoder_classes: Dict[str, np.ndarray] = {}
+        self._attempted = False
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Load the artifacts; returns whether the model is servable"""
+        import joblib
+
+        try:
+            model = joblib.load(serving_path(self.model_dir / MODEL_FILE))
+            scaler = joblib.load(self.model_dir / SCALER_FILE)
+            encoders = joblib.load(self.model_dir / ENCODERS_FILE)
+            encoder_classes = {name: np.asarray(encoders[name].classes_).astype(str)
+                               for name in CATEGORICAL_FEATURES}
+            if scaler.n_features_in_ != len(FEATURE_COLUMNS):
+                raise ValueError(f"scaler expects {scaler.n_features_in_} features, "
+                                 f"pipeline builds {len(FEATURE_COLUMNS)}")
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Income volatility model unavailable: %s", str(e))
+            self.model = None
+        else:
+            self.model = model
+            self.classes = tuple(str(c) for c in model.classes_)
+            self._mean = np.asarray(scaler.mean_, dtype=np.float64)
+            self._scale = np.asarray(scaler.scale_, dtype=np.float64)
+            self._encoder_classes = encoder_classes
+            logger.info("Income volatility model loaded (classes: %s)", ", ".join(self.classes))
+        self._attempted = True
+        return self.model is not None
+
+    @property
+    def available(self) -> bool:
+        if not self._attempted:
+            with self._lock:
+                if not self._attempted:
+                    self.load()
+        return self.model is not None
+
+    def feature_matrix(self, columns: Mapping[str, Any]) -> np.ndarray:
+        """Scaled model input (rows x FEATURE_COLUMNS) from derived columns"""
+        n = len(columns["age"])
+        features = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float64)
+        for i, name in enumerate(NUMERIC_FEATURES):
+            features[:, i] = columns[name]
+        for i, name in enumerate(CATEGORICAL_FEATURES, start=len(NUMERIC_FEATURES)):
+            features[:, i] = encode_labels(columns[name], self._encoder_classes[name])
+        return (features - self._mean) / self._scale
+
+    def predict_proba(self, columns: Mapping[str, Any]) -> Optional[np.ndarray]:
+        """Class probabilities (rows x classes) from one predict_proba call, or None"""
+        if not self.available:
+            return None
+        return self.model.predict_proba(self.feature_matrix(derive_columns(columns)))
+
+
+engine = IncomeVolatilityEngine()
@@ -0,0 +1,283 @@
+"""
+Asyncio event-ingestion pipeline for security scoring
+Bounded queues decouple bursty producers from vectorized micro-batch scoring
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue cannot accept a batch of events right now"""
+
+
+class IngestionBatchTooLarge(Exception):
+    """Raised when a batch exceeds the ingestion queue capacity and can never fit"""
+
+
+class InMemorySink:
+    """Keeps the most recent results and fans them out to subscribers"""
+
+    name = "memory"
+
+    def __init__(self, max_results: int = 10000):
+        self.results: Deque[Dict[str, Any]] = deque(maxlen=max_results)
+        self._subscribers: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+    def subscribe(self, callback: Callable[[List[Dict[str, Any]]], None]):
+        """Register a callback invoked with every delivered result batch"""
+        self._subscribers.append(callback)
+
+    async def deliver(self, results: List[Dict[str, Any]]):
+        self.results.extend(results)
+        for callback in self._subscribers:
+            try:
+                callback(results)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Ingestion subscriber failed: %s", str(e))
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return list(self.results)[-limit:]
+
+
+class FileSink:
+    """Appends results to a JSON-lines file"""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, results: List[Dict[str, Any]]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    async def deliver(self, results: List[Dict[str, Any]]):
+        await asyncio.to_thread(self._write, results)
+
+
+class CallbackSink:
+    """
+    Stub for delivering results to a callback URL.
+
+    Payloads are logged and kept for inspection instead of being POSTed,
+    until an HTTP client is added to the service dependencies.
+    """
+
+    name = "callback"
+
+    def __init__(self, url: str, max_pending: int = 1000):
+        self.url = url
+        self.pending: Deque[Dict[str, Any]] = deque(maxlen=max_pending)
+
+    async def deliver(self, results: List[Dict[str, Any]]):
+        payload = {"url": self.url, "results": results}
+        self.pending.append(payload)
+        logger.debug("Callback stub: %d results for %s", len(results), self.url)
+
+
+class _StageStats:
+    """Counters for one pipeline stage"""
+
+    def __init__(self):
+        self.processed = 0
+        self.batches = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def record(self, n: int, lag: float):
+        self.processed += n
+        self.batches += 1
+        self.last_lag_seconds = lag
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+
+class IngestionPipeline:
+    """
+    Three-stage pipeline: bounded ingest queue -> scoring -> result sinks.
+
+    ``submit`` is all-or-nothing: a batch that does not fit in the ingest
+    queue raises ``IngestionQueueFull`` so the caller can apply backpressure,
+    or ``IngestionBatchTooLarge`` when it exceeds the queue's capacity.
+    The scoring stage drains up to ``batch_size`` events at a time and hands
+    them to ``scorer`` as one feature matrix off the event loop.
+    """
+
+    def __init__(
+        self,
+        extract_features: Callable[[Dict[str, Any]], List[float]],
+        scorer: Callable[[np.ndarray], Dict[str, Any]],
+        sinks: List[Any],
+        max_queue: int = 10000,
+        max_results_queue: int = 10000,
+        batch_size: int = 256,
+        max_batch_wait: float = 0.01,
+    ):
+        self.extract_features = extract_features
+        self.scorer = scorer
+        self.sinks = sinks
+        self.max_queue = max_queue
+        self.max_results_queue = max_results_queue
+        self.batch_size = batch_size
+        self.max_batch_wait = max_batch_wait
+
+        self._ingest_queue: Optional[asyncio.Queue] = None
+        self._results_queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.rejected = 0
+        self.scoring_errors = 0
+        self.scoring = _StageStats()
+        self.delivery = _StageStats()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and not any(t.done() for t in self._tasks)
+
+    async def start(self):
+        """
+        Create the queues and stage workers on the running event loop
+
+        A stage worker that has died is restarted on the existing queues,
+        so events already queued are still scored and delivered.
+        """
+        if self.running:
+            return
+        if self._ingest_queue is None:
+            self._ingest_queue = asyncio.Queue(maxsize=self.max_queue)
+            self._results_queue = asyncio.Queue(maxsize=self.max_results_queue)
+            logger.info("Ingestion pipeline started (queue=%d, batch=%d)", self.max_queue, self.batch_size)
+        stages = (self._scoring_stage, self._delivery_stage)
+        tasks = self._tasks or [None] * len(stages)
+        for i, (task, stage) in enumerate(zip(tasks, stages)):
+            if task is None or not task.done():
+                continue
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("Ingestion stage %s died, restarting: %s", stage.__name__, task.exception())
+            tasks[i] = None
+        self._tasks = [task or asyncio.create_task(stage()) for task, stage in zip(tasks, stages)]
+
+    async def stop(self):
+        """Cancel the stage workers"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, events: List[Dict[str, Any]]) -> int:
+        """Enqueue events or raise without enqueuing any (see the class docstring)"""
+        queue = self._ingest_queue
+        if queue is None:
+            raise RuntimeError("Ingestion pipeline is not started")
+        if len(events) > queue.maxsize:
+            self.rejected += len(events)
+            raise IngestionBatchTooLarge(
+                f"Batch of {len(events)} events exceeds the ingestion queue capacity of {queue.maxsize}; "
+                "split it into smaller batches"
+            )
+        if queue.maxsize - queue.qsize() < len(events):
+            self.rejected += len(events)
+            raise IngestionQueueFull(
+                f"Ingestion queue full ({queue.qsize()}/{queue.maxsize})"
+            )
+        now = time.monotonic()
+        for event in events:
+            queue.put_nowait((now, event))
+        self.accepted += len(events)
+        return len(events)
+
+    async def _drain(self, queue: asyncio.Queue) -> List[Any]:
+        """Wait for one item, then collect up to a micro-batch of items"""
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_batch_wait
+        while len(batch) < self.batch_size:
+            if queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(queue.get_nowait())
+        return batch
+
+    async def _scoring_stage(self):
+        while True:
+            batch = await self._drain(self._ingest_queue)
+            lag = time.monotonic() - batch[0][0]
+            events = [event for _, event in batch]
+            try:
+                X = np.array([self.extract_features(event) for event in events])
+                scored = await asyncio.to_thread(self.scorer, X)
+            except Exception as e:  # pylint: disable=broad-except
+                self.scoring_errors += len(events)
+                logger.error("Ingestion scoring failed: %s", str(e))
+                continue
+            self.scoring.record(len(events), lag)
+
+            scored_at = time.monotonic()
+            for i, event in enumerate(events):
+                result = {
+                    "transaction_id": event.get("id"),
+                    "user_id": event.get("user_id"),
+                    "anomaly_score": float(scored["anomaly_score"][i]),
+                    "is_anomaly": bool(scored["is_anomaly"][i]),
+                }
+                # Awaiting here propagates backpressure from slow sinks
+                await self._results_queue.put((scored_at, result))
+
+    async def _delivery_stage(self):
+        while True:
+            batch = await self._drain(self._results_queue)
+            lag = time.monotonic() - batch[0][0]
+            results = [result for _, result in batch]
+            for sink in self.sinks:
+                try:
+                    await sink.deliver(results)
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error("Ingestion sink %s failed: %s", sink.name, str(e))
+            self.delivery.record(len(results), lag)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-stage queue depth, throughput and lag"""
+        ingest_depth = self._ingest_queue.qsize() if self._ingest_queue else 0
+        results_depth = self._results_queue.qsize() if self._results_queue else 0
+        return {
+            "running": self.running,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "stages": {
+                "ingest": {
+                    "queue_depth": ingest_depth,
+                    "queue_capacity": self.max_queue,
+                },
+                "scoring": {
+                    "processed": self.scoring.processed,
+                    "batches": self.scoring.batches,
+                    "errors": self.scoring_errors,
+                    "lag_seconds": round(self.scoring.last_lag_seconds, 4),
+                    "max_lag_seconds": round(self.scoring.max_lag_seconds, 4),
+                },
+                "delivery": {
+                    "queue_depth": results_depth,
+                    "queue_capacity": self.max_results_queue,
+                    "processed": self.delivery.processed,
+                    "lag_seconds": round(self.delivery.last_lag_seconds, 4),
+                    "max_lag_seconds": round(self.delivery.max_lag_seconds, 4),
+                },
+            },
+            "sinks": [sink.name for sink in self.sinks],
+        }
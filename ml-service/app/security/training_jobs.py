@@ -0,0 +1,98 @@
+"""
+Security training jobs
+Model training and dataset generation run by the job runner in a separate process
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+Progress = Callable[[float, str], None]
+
+FRAUD_FEATURES = [
+    "amount",
+    "transaction_frequency",
+    "geographic_distance",
+    "time_since_last_tx",
+    "device_mismatch",
+    "velocity_check",
+    "ip_risk_score",
+    "account_age_days",
+]
+NETWORK_FEATURES = ["packet_size", "packet_rate", "byte_rate", "duration"]
+# Registry record of the last training run, next to the artifacts it published
+TRAINING_MANIFEST = "security_training.json"
+
+
+def train_security_models(progress: Progress, model_dir: str, job_id: str = "",
+                          transactions: int = 50000, network_events: int = 30000) -> Dict[str, Any]:
+    """
+    Train the fraud and intrusion models on synthetic data and publish them.
+
+    Artifacts replace the served ones atomically and a manifest with the
+    evaluation metrics is written next to them.
+    """
+    from sklearn.model_selection import train_test_split
+
+    from app.model_registry import publish_manifest
+    from app.security.anomaly_detection import AnomalyDetectionEngine
+    from app.security.data_generator import SyntheticDataGenerator
+
+    engine = AnomalyDetectionEngine(model_dir=model_dir)
+    generator = SyntheticDataGenerator()
+
+    progress(0.0, "Generating synthetic transaction data")
+    tx_df = generator.generate_transaction_dataset(transactions)
+    progress(0.1, "Generating synthetic network traffic data")
+    net_df = generator.generate_network_traffic_dataset(network_events)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        tx_df[FRAUD_FEATURES], tx_df["is_fraud"], test_size=0.2, random_state=42,
+        stratify=tx_df["is_fraud"]
+    )
+    progress(0.2, "Training fraud detection model")
+    engine.train_fraud_detection_model(X_train, y_train, X_test, y_test)
+
+    X_net_train, X_net_test = train_test_split(
+        net_df[NETWORK_FEATURES], test_size=0.2, random_state=42
+    )
+    progress(0.7, "Training intrusion detection model")
+    engine.train_intrusion_detection_model(X_net_train, X_net_test)
+
+    metrics = {
+        "fraud_test_accuracy": round(float(engine.fraud_model.score(X_test, y_test)), 4),
+        "intrusion_test_anomaly_rate": round(float(
+            (engine.intrusion_model.predict(engine.scaler.transform(X_net_test)) == -1).mean()
+        ), 4),
+    }
+    progress(0.9, "Publishing trained models")
+    artifacts = engine.save_models()
+    manifest = {
+        "job_id": job_id,
+        "trained_at": datetime.now().isoformat(),
+        "training_samples": {"transactions": transactions, "network_events": network_events},
+        "metrics": metrics,
+        "artifacts": artifacts,
+    }
+    publish_manifest(manifest, Path(model_dir) / TRAINING_MANIFEST)
+    logger.info("Security models trained and published: %s", metrics)
+    return manifest
+
+
+def generate_datasets(progress: Progress, output_dir: str, job_id: str = "") -> Dict[str, Any]:
+    """Write the synthetic training datasets as CSV files"""
+    from app.security.data_generator import SyntheticDataGenerator
+
+    progress(0.0, "Generating datasets")
+    files = SyntheticDataGenerator().save_datasets_to_file(output_dir, progress=progress)
+    return {"output_dir": output_dir, "files": files,
+            "total_samples": sum(f["samples"] for f in files)}
+
+
+JOBS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "train-security-models": train_security_models,
+    "generate-datasets": generate_datasets,
+}
@@ -0,0 +1,190 @@
+"""
+CAPSTACK ML Single-Flight - Request coalescing
+Concurrent identical requests share one in-flight computation instead of each running inference
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+from .deadline import degraded_reasons, request_budget_ms
+from .metrics import COALESCED_REQUESTS, COALESCING_RATIO, SUPPRESS_REQUEST_METRICS
+
+logger = logging.getLogger(__name__)
+
+
+def singleflight_enabled() -> bool:
+    return os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def canonical_key(name: str, args: Sequence[Any], kwargs: Dict[str, Any],
+                  budget_ms: float = 0.0) -> str:
+    """
+    Hash of a handler call that ignores field order and formatting.
+
+    Validated request models are dumped to JSON-compatible data and encoded
+    with sorted keys, so payloads differing only in key order, whitespace or
+    ``10`` vs ``10.0`` coalesce. Calls under different inference budgets
+    never share a key, since the budget decides whether the answer may come
+    from the rule-based fallback.
+    """
+    payload = {
+        "args": [_canonical(v) for v in args],
+        "kwargs": {k: _canonical(v) for k, v in kwargs.items()},
+        "budget_ms": float(budget_ms),
+    }
+    encoded = json.dumps([name, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _SyncCall:
+    """In-flight computation shared by threads"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key.
+
+    The first caller (leader) runs the computation; callers arriving while it
+    is in flight (followers) wait for and share its result or exception.
+    Nothing is cached once the computation finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._async_calls: Dict[str, asyncio.Future] = {}
+        self._sync_calls: Dict[str, _SyncCall] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _record(self, follower: bool):
+        if SUPPRESS_REQUEST_METRICS.get():
+            return
+        with self._lock:
+            if follower:
+                self.followers += 1
+            else:
+                self.leaders += 1
+            ratio = self.followers / (self.leaders + self.followers)
+        COALESCED_REQUESTS.labels(self.name, "follower" if follower else "leader").inc()
+        COALESCING_RATIO.labels(self.name).set(ratio)
+
+    async def do_async(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """Await ``func`` once per key among concurrent callers on this event loop"""
+        task = self._async_calls.get(key)
+        follower = task is not None
+        if not follower:
+            # A separate task keeps the shared computation alive if the leader's
+            # client disconnects and its request is cancelled
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._async_calls[key] = task
+            task.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        self._record(follower)
+        return await asyncio.shield(task)
+
+    def do(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """Call ``func`` once per key among concurrent threads"""
+        with self._lock:
+            call = self._sync_calls.get(key)
+            follower = call is not None
+            if not follower:
+                call = self._sync_calls[key] = _SyncCall()
+        self._record(follower)
+        if follower:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._sync_calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.followers
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "coalescing_ratio": round(self.followers / total, 4) if total else 0.0,
+        }
+
+
+def _inherit_degraded(leader_reasons: Optional[List[str]]):
+    """Copy the leader's fallback reasons into a follower's request"""
+    reasons = degraded_reasons()
+    if reasons is not None and leader_reasons is not None and reasons is not leader_reasons:
+        reasons.extend(leader_reasons)
+
+
+def coalesce_requests(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorate a sync (``def``) or async route handler with single-flight.
+
+    Apply it above ``timed_executor`` so duplicate requests wait on the event
+    loop rather than occupying worker threads. Only use it on handlers whose
+    response depends solely on their arguments and inference budget.
+    Followers share the leader's rule-based fallback reasons, so their
+    responses carry the same ``X-Degraded`` header.
+    """
+    flight = SingleFlight(name)
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            async def async_call(*args, **kwargs):
+                return await func(*args, **kwargs), degraded_reasons()
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not singleflight_enabled():
+                    return await func(*args, **kwargs)
+                key = canonical_key(name, args, kwargs, request_budget_ms())
+                result, leader_reasons = await flight.do_async(key, async_call, *args, **kwargs)
+                _inherit_degraded(leader_reasons)
+                return result
+
+            async_wrapper.singleflight = flight
+            return async_wrapper
+
+        def sync_call(*args, **kwargs):
+            return func(*args, **kwargs), degraded_reasons()
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            if not singleflight_enabled():
+                return func(*args, **kwargs)
+            key = canonical_key(name, args, kwargs, request_budget_ms())
+            result, leader_reasons = flight.do(key, sync_call, *args, **kwargs)
+            _inherit_degraded(leader_reasons)
+            return result
+
+        sync_wrapper.singleflight = flight
+        return sync_wrapper
+
+    return decorator
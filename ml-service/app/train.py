@@ -24,6 +24,7 @@ from sklearn.metrics import (
 sys.path.insert(0, str(Path(__file__).parent))
 
 # Import models
+from app.core.savings_projection import CONTRIBUTION_TIMING, future_values
 from app.models import (
     FinancialRiskModel,
     LayoffRiskModel,
@@ -168,14 +169,14 @@ def generate_savings_training_data(
         investment_type
     ])
 
-    # Calculate future values
-    y = np.zeros(n_samples)
-    for i in range(n_samples):
-        future = float(current_savings[i])
-        monthly_ret = expected_return[i] / 100 / 12
-        for _ in range(int(months[i])):
-            future = (future + monthly_savings[i]) * (1 + monthly_ret)
-        y[i] = future
+    # Future values with each month's deposit made before that month's growth
+    y = future_values(
+        current_savings,
+        monthly_savings,
+        expected_return,
+        months,
+        contribution_timing=CONTRIBUTION_TIMING
+    )
 
     logger.info("Generated X shape: %s, y shape: %s", X.shape, y.shape)
     return X, y
@@ -1,5 +1,14 @@
 # Shared utilities for ML service
 
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core.rules import get_rules
+
 def validate_financial_data(income, expenses, savings, debt):
     """
     Validate financial input data.
@@ -14,24 +23,74 @@ def categorize_score(score):
     """
     Categorize health score into categories.
     """
-    if score >= 80:
-        return "excellent"
-    elif score >= 60:
-        return "good"
-    elif score >= 40:
-        return "fair"
-    else:
-        return "poor"
+    return get_rules().score_category.classify(score)
 
 def categorize_survival(months):
     """
     Categorize survival months.
     """
-    if months < 1:
-        return "critical"
-    elif months < 3:
-        return "low"
-    elif months < 6:
-        return "adequate"
-    else:
-        return "good"
\ No newline at end of file
+    return get_rules().survival_category.classify(months)
+
+def categorize_scores(scores):
+    """
+    Categorize an array of health scores.
+    """
+    return get_rules().score_category.classify_batch(scores)
+
+def categorize_survivals(months):
+    """
+    Categorize an array of survival months.
+    """
+    return get_rules().survival_category.classify_batch(months)
+
+def batch_columns(
+    request: BaseModel,
+    max_rows: int,
+    bounds: Optional[Dict[str, Any]] = None,
+    columns: Optional[Dict[str, Any]] = None,
+    allow_empty: bool = True
+) -> Dict[str, Any]:
+    """
+    Validate a columnar batch request and convert its numeric columns to arrays.
+
+    Every field but ``user_ids`` is a column; ``columns`` holds already
+    converted ones (e.g. enums) that replace the request's. Numeric columns
+    must be finite and within ``bounds``, which maps column name to (lower
+    bound, upper bound, lower bound inclusive); string columns are kept
+    as lists. Raises 413 above ``max_rows`` rows, 422 otherwise.
+    """
+    columns = dict(columns or {})
+    names = [name for name in type(request).model_fields
+             if name != "user_ids" and name not in columns and getattr(request, name) is not None]
+    n = len(getattr(request, names[0]) if names else next(iter(columns.values())))
+    if n > max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {max_rows} rows"
+        )
+    for name in names:
+        values = getattr(request, name)
+        if values and isinstance(values[0], str):
+            columns[name] = values
+            continue
+        low, high, inclusive = (bounds or {}).get(name, (-math.inf, math.inf, True))
+        column = np.asarray(values, dtype=np.float64)
+        below = column < low if inclusive else column <= low
+        invalid = ~np.isfinite(column) | below | (column > high)
+        if invalid.any():
+            raise HTTPException(
+                status_code=422,
+                detail=f"{name}[{int(np.argmax(invalid))}] is out of range"
+            )
+        columns[name] = column
+    lengths = {name: len(values) for name, values in columns.items()}
+    if request.user_ids is not None:
+        lengths["user_ids"] = len(request.user_ids)
+    if set(lengths.values()) != {n}:
+        raise HTTPException(
+            status_code=422,
+            detail=f"All columns must have the same length: {lengths}"
+        )
+    if n == 0 and not allow_empty:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    return columns
@@ -0,0 +1,189 @@
+"""
+CAPSTACK ML Warm-up - Startup traffic replay
+Runs synthetic batches and requests through models and routes before readiness
+"""
+
+import asyncio
+import logging
+import os
+import time
+import warnings
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .core.portfolio_optimizer import portfolio_optimizer
+from .metrics import SUPPRESS_REQUEST_METRICS, WARMUP_DURATION
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES: Tuple[int, ...] = (1, 32, 256, 1024)
+
+# (method, path, payload) replayed in-process; every response model
+# and validator on the hot paths is exercised. The fraud payload carries its
+# velocity features so warm-up never writes to the online feature store.
+WARMUP_REQUESTS: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("POST", "/risk-score", {
+        "income": 50000, "expenses": 30000, "savings": 10000, "debt": 5000,
+    }),
+    ("POST", "/allocation-optimize", {
+        "income": 50000, "expenses": 30000, "emergency_fund": 60000, "debt": 10000,
+        "age": 35, "risk_tolerance": "medium", "job_stability": 8,
+        "market_conditions": "neutral", "inflation_rate": 3.5,
+    }),
+    ("POST", "/profile", {
+        "income": 50000, "expenses": 30000, "savings": 40000, "emergency_fund": 60000,
+        "debt": 10000, "age": 35, "risk_tolerance": "medium", "job_stability": 8,
+        "market_conditions": "neutral", "employment": {"industry": "IT", "experience_years": 5},
+    }),
+] + [
+    ("POST", "/predictive-analytics", {
+        "user_data": {
+            "emergency_months": 4, "debt_ratio": 0.3, "savings_rate": 15,
+            "industry": "IT", "experience_years": 5, "current_savings": 10000,
+            "monthly_savings": 1000, "expected_return": 7,
+        },
+        "prediction_type": prediction_type,
+        "time_horizon": "90day",
+    })
+    for prediction_type in ("survival_probability", "layoff_risk", "savings_trajectory")
+] + [
+    ("POST", "/enhanced-security/fraud-detection-enhanced", {
+        "amount": 120.0, "merchant_category": "retail", "geographic_distance": 15.0,
+        "time_since_last_tx": 12.0, "device_mismatch": 0, "velocity_check": 3.0,
+        "ip_risk_score": 12.0, "account_age_days": 700.0,
+        "typical_transaction_amount": 90.0,
+    }),
+    ("POST", "/enhanced-security/income-volatility-analysis", {
+        "age": 35, "education": "bachelors", "industry": "technology",
+        "experience_years": 8.0, "base_salary": 8000.0, "variable_income_ratio": 0.1,
+        "job_stability_score": 0.7, "automation_risk_score": 0.3,
+        "skill_relevance_score": 0.8,
+    }),
+]
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def batch_sizes_from_env() -> Tuple[int, ...]:
+    """Parse WARMUP_BATCH_SIZES, e.g. ``1,32,256,1024``"""
+    raw = os.getenv("WARMUP_BATCH_SIZES")
+    if not raw:
+        return DEFAULT_BATCH_SIZES
+    return tuple(sorted({int(size) for size in raw.split(",") if size.strip()}))
+
+
+class WarmupState:
+    """Readiness flag and timings of the startup warm-up"""
+
+    def __init__(self):
+        self.ready = False
+        self.skipped = False
+        self.duration = None
+        self.phases: Dict[str, float] = {}
+        self.errors: List[str] = []
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "skipped": self.skipped,
+            "duration_seconds": None if self.duration is None else round(self.duration, 4),
+            "phases": {k: round(v, 4) for k, v in self.phases.items()},
+            "errors": self.errors,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def _loaded_estimators() -> List[Tuple[str, Any, Any]]:
+    """(name, estimator, scaler) for every trained model in this worker"""
+    from .models import layoff_model, risk_model, savings_model
+    from .routers import enhanced_security
+
+    loaded = [
+        (name, model.model, model.scaler)
+        for name, model in (("risk", risk_model), ("layoff", layoff_model),
+                            ("savings", savings_model))
+        if model.is_trained
+    ]
+    fraud_model, fraud_scaler = enhanced_security.get_fraud_model()
+    if fraud_model is not None and fraud_scaler is not None:
+        loaded.append(("fraud", fraud_model, fraud_scaler))
+    return loaded
+
+
+def warm_models(batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES) -> List[str]:
+    """Run a synthetic batch of each size through every loaded model"""
+    rng = np.random.default_rng(0)
+    warmed = []
+    with warnings.catch_warnings():
+        # Scalers fitted on DataFrames warn about missing feature names
+        warnings.simplefilter("ignore", UserWarning)
+        for name, estimator, scaler in _loaded_estimators():
+            predict = getattr(estimator, "predict_proba", estimator.predict)
+            for size in batch_sizes:
+                X = scaler.transform(rng.random((size, scaler.n_features_in_)))
+                predict(X)
+            warmed.append(name)
+    return warmed
+
+
+async def warm_routes(app, rounds: int = 2) -> int:
+    """Replay WARMUP_REQUESTS in-process through the full ASGI stack"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    sent = 0
+    token = SUPPRESS_REQUEST_METRICS.set(True)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            for method, path, payload in WARMUP_REQUESTS:
+                for _ in range(rounds):
+                    response = await client.request(method, path, json=payload)
+                    sent += 1
+                    if response.status_code >= 500:
+                        warmup_state.errors.append(f"{path}: HTTP {response.status_code}")
+                        break
+    finally:
+        SUPPRESS_REQUEST_METRICS.reset(token)
+    return sent
+
+
+async def run_warmup(app, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES):
+    """Warm models and routes, then mark the worker ready"""
+    start = time.perf_counter()
+    try:
+        phase_start = time.perf_counter()
+        warmed = await asyncio.to_thread(warm_models, batch_sizes)
+        warmup_state.phases["models"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        await asyncio.to_thread(portfolio_optimizer.precompute)
+        warmup_state.phases["frontiers"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        sent = await warm_routes(app)
+        warmup_state.phases["routes"] = time.perf_counter() - phase_start
+        logger.info(
+            "Warm-up ran batches %s through models %s and replayed %d requests",
+            list(batch_sizes), warmed, sent,
+        )
+    except Exception as e:  # pylint: disable=broad-except
+        # A failed warm-up only costs first-request latency, so never block readiness
+        logger.error("Warm-up failed: %s", str(e))
+        warmup_state.errors.append(str(e))
+    finally:
+        warmup_state.duration = time.perf_counter() - start
+        warmup_state.phases["total"] = warmup_state.duration
+        for phase, seconds in warmup_state.phases.items():
+            WARMUP_DURATION.labels(phase).set(seconds)
+        warmup_state.ready = True
+        logger.info("Warm-up finished in %.2fs, worker ready", warmup_state.duration)
+
+
+def skip_warmup():
+    warmup_state.skipped = True
+    warmup_state.ready = True
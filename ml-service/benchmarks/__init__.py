@@ -0,0 +1,4 @@
+"""
+CAPSTACK ML Service benchmark suite
+Run with ``python -m benchmarks`` from the ml-service directory
+"""
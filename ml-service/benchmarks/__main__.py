@@ -0,0 +1,128 @@
+"""
+Run the benchmark suite and compare against the stored baseline
+
+    python -m benchmarks                       # all sections
+    python -m benchmarks --sections latency,batch --quick
+    python -m benchmarks --update-baseline     # record a new baseline
+
+Exits with status 1 when any metric regresses beyond ``--tolerance`` or
+``import app.main`` exceeds its cold-start budget or batch allocation falls
+below its throughput target.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from . import allocation, baseline, batch_scaling, importtime, latency, startup, throughput, training
+
+SECTIONS = ("latency", "throughput", "batch", "allocation", "training", "startup", "imports")
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CAPSTACK ML service benchmarks")
+    parser.add_argument("--sections", default=",".join(SECTIONS),
+                        help="comma-separated subset of " + ", ".join(SECTIONS))
+    parser.add_argument("--output", type=Path, help="write results JSON to this file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative regression before failing (default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--quick", action="store_true", help="smaller sample sizes")
+    parser.add_argument("--profile", action="store_true",
+                        help="attach cProfile output to the latency results")
+    parser.add_argument("--import-budget-ms", type=float, default=importtime.DEFAULT_BUDGET_MS,
+                        help="cold-start budget for importing app.main")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "quick": args.quick,
+        }
+    }
+    trained = None
+    if "training" in sections or "batch" in sections:
+        results["training"], trained = training.run(2000 if args.quick else 10000)
+        if "training" not in sections:
+            del results["training"]
+    if "latency" in sections:
+        results["latency"] = latency.run(100 if args.quick else 1000, profile=args.profile)
+    if "throughput" in sections:
+        results["throughput"] = throughput.run(duration=2.0 if args.quick else 10.0)
+    if "batch" in sections:
+        sizes = batch_scaling.DEFAULT_SIZES[:-1] if args.quick else batch_scaling.DEFAULT_SIZES
+        results["batch"] = batch_scaling.run(trained, sizes)
+        results["batch"]["fraud"] = batch_scaling.fraud_curve(sizes)
+    if "allocation" in sections:
+        results["allocation"] = allocation.run(200_000 if args.quick else 1_000_000)
+    if "startup" in sections:
+        results.update(startup.run(1 if args.quick else 3))
+    if "imports" in sections:
+        results["imports"] = importtime.run(1 if args.quick else 3,
+                                            budget_ms=args.import_budget_ms)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    over_budget = "imports" in results and not results["imports"]["within_budget"]
+    if over_budget:
+        imports = results["imports"]
+        print(
+            f"IMPORT BUDGET exceeded: {imports['import_ms']:g} ms "
+            f"(budget {imports['budget_ms']:g} ms), heavy modules: "
+            f"{', '.join(imports['heavy_modules_imported']) or 'none'}",
+            file=sys.stderr,
+        )
+
+    below_target = "allocation" in results and not results["allocation"]["library"]["meets_target"]
+    if below_target:
+        library = results["allocation"]["library"]
+        print(
+            f"ALLOCATION THROUGHPUT below target: {library['users_per_sec']:g} users/s "
+            f"(target {library['target_users_per_sec']:g})",
+            file=sys.stderr,
+        )
+    over_budget = over_budget or below_target
+
+    if args.update_baseline:
+        baseline.save(args.baseline, results)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 1 if over_budget else 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; skipping comparison", file=sys.stderr)
+        return 1 if over_budget else 0
+
+    regressions = baseline.compare(results, baseline.load(args.baseline), args.tolerance)
+    for r in regressions:
+        print(
+            f"REGRESSION {r['metric']}: {r['baseline']:g} -> {r['current']:g} "
+            f"({r['change_pct']:+.1f}%)",
+            file=sys.stderr,
+        )
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    print("No regressions against baseline", file=sys.stderr)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
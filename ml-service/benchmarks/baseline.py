@@ -0,0 +1,71 @@
+"""
+Baseline comparison: flag metrics that regressed beyond a tolerance
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Metric name suffixes, whether a larger value is better and the smallest
+# absolute change that counts (so microsecond jitter never fails a run)
+_DIRECTIONS = (
+    ("_per_sec", True, 0.0),
+    ("_ms", False, 1.0),
+    ("seconds", False, 0.001),
+    ("_mb", False, 5.0),
+)
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results into ``section.sub.metric`` numeric entries"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def _direction(metric: str):
+    leaf = metric.rsplit(".", 1)[-1]
+    for suffix, higher, floor in _DIRECTIONS:
+        if leaf.endswith(suffix):
+            return higher, floor
+    return None, 0.0
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float) -> List[Dict[str, Any]]:
+    """Return the metrics that are more than ``tolerance`` worse than baseline"""
+    current = flatten(results)
+    reference = flatten(baseline)
+    regressions = []
+    for metric, base in reference.items():
+        higher, floor = _direction(metric)
+        if higher is None or metric not in current or base <= 0:
+            continue
+        value = current[metric]
+        if abs(value - base) < floor:
+            continue
+        change = (value - base) / base
+        if (higher and change < -tolerance) or (not higher and change > tolerance):
+            regressions.append({
+                "metric": metric,
+                "baseline": base,
+                "current": value,
+                "change_pct": round(change * 100, 1),
+            })
+    return regressions
+
+
+def load(path: Path) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(path: Path, results: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
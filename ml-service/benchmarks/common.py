@@ -0,0 +1,102 @@
+"""
+Shared helpers for the benchmark suite
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+
+RISK_PAYLOAD = {"income": 50000, "expenses": 30000, "savings": 10000, "debt": 5000}
+
+ALLOCATION_PAYLOAD = {
+    "income": 50000,
+    "expenses": 30000,
+    "emergency_fund": 60000,
+    "debt": 10000,
+    "age": 35,
+    "risk_tolerance": "medium",
+    "job_stability": 8,
+    "market_conditions": "neutral",
+    "inflation_rate": 3.5,
+}
+
+PREDICTIVE_PAYLOAD = {
+    "user_data": {
+        "emergency_months": 4,
+        "debt_ratio": 0.3,
+        "savings_rate": 15,
+        "industry": "IT",
+        "experience_years": 5,
+        "current_savings": 10000,
+        "monthly_savings": 1000,
+        "expected_return": 7,
+    },
+    "prediction_type": "layoff_risk",
+    "time_horizon": "90day",
+}
+
+FRAUD_PAYLOAD = {
+    "amount": 120.0,
+    "merchant_category": "retail",
+    "geographic_distance": 15.0,
+    "time_since_last_tx": 12.0,
+    "device_mismatch": 0,
+    "velocity_check": 3.0,
+    "ip_risk_score": 12.0,
+    "account_age_days": 700.0,
+    "typical_transaction_amount": 90.0,
+}
+
+# (method, path, payload) for every benchmarked endpoint
+ENDPOINTS = [
+    ("POST", "/risk-score", RISK_PAYLOAD),
+    ("POST", "/allocation-optimize", ALLOCATION_PAYLOAD),
+    ("POST", "/predictive-analytics", PREDICTIVE_PAYLOAD),
+    ("POST", "/enhanced-security/fraud-detection-enhanced", FRAUD_PAYLOAD),
+]
+
+
+def percentiles(samples_seconds: Sequence[float]) -> Dict[str, float]:
+    """Summarize latency samples in milliseconds"""
+    arr = np.asarray(samples_seconds, dtype=np.float64) * 1000
+    if arr.size == 0:
+        return {}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(arr.mean()), 4),
+        "max_ms": round(float(arr.max()), 4),
+    }
+
+
+def time_call(func: Callable[[], object], repeat: int) -> List[float]:
+    """Time ``repeat`` calls of ``func`` and return per-call seconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_python(code: str, timeout: float = 120) -> subprocess.CompletedProcess:
+    """Run a Python snippet in a fresh interpreter from the service root"""
+    env = dict(os.environ, PYTHONPATH=str(SERVICE_ROOT))
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SERVICE_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=True,
+    )
@@ -0,0 +1,68 @@
+"""
+Import-time cold start of app.main, measured with ``python -X importtime``
+"""
+
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+from .common import SERVICE_ROOT
+
+# Cold-start budget for ``import app.main`` on a warm disk cache
+DEFAULT_BUDGET_MS = 750.0
+# Libraries that must only be imported by the routes or loaders using them
+HEAVY_MODULES = ("pandas", "sklearn", "xgboost", "scipy", "joblib")
+
+
+def _parse(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse importtime lines into (module, self_us, cumulative_us)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _import_once(module: str) -> List[Tuple[str, int, int]]:
+    env = dict(os.environ, PYTHONPATH=str(SERVICE_ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVICE_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=True,
+    )
+    return _parse(proc.stderr)
+
+
+def run(repeat: int = 3, module: str = "app.main",
+        budget_ms: float = DEFAULT_BUDGET_MS) -> Dict[str, Any]:
+    """Report the best-of-``repeat`` import time and which heavy libraries load"""
+    best = None
+    for _ in range(repeat):
+        rows = _import_once(module)
+        total = next(cum for name, _, cum in rows if name == module)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    total_us, rows = best
+
+    top_level = {}
+    for name, _, cumulative in rows:
+        root = name.split(".", 1)[0]
+        top_level[root] = max(top_level.get(root, 0), cumulative)
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:10]
+    heavy = sorted({name.split(".", 1)[0] for name, _, _ in rows} & set(HEAVY_MODULES))
+
+    total_ms = total_us / 1000
+    return {
+        "import_ms": round(total_ms, 1),
+        "budget_ms": budget_ms,
+        "within_budget": total_ms <= budget_ms and not heavy,
+        "heavy_modules_imported": heavy,
+        "slowest_packages": [{"package": n, "ms": round(us / 1000, 1)} for n, us in slowest],
+    }
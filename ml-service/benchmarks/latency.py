@@ -0,0 +1,45 @@
+"""
+Single-row latency percentiles per endpoint (in-process TestClient)
+"""
+
+import cProfile
+import io
+import pstats
+from typing import Any, Dict
+
+from .common import ENDPOINTS, percentiles, time_call
+
+
+def run(requests_per_endpoint: int = 500, profile: bool = False) -> Dict[str, Any]:
+    """Measure per-request latency of every endpoint"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    results: Dict[str, Any] = {}
+    with TestClient(app) as client:
+        for method, path, payload in ENDPOINTS:
+            def call(path=path, method=method, payload=payload):
+                response = client.request(method, path, json=payload)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path} returned {response.status_code}")
+
+            try:
+                # Warm up once so one-time initialization is excluded
+                call()
+            except RuntimeError as e:
+                results[path] = {"error": str(e)}
+                continue
+
+            profiler = cProfile.Profile() if profile else None
+            if profiler:
+                profiler.enable()
+            samples = time_call(call, requests_per_endpoint)
+            if profiler:
+                profiler.disable()
+
+            results[path] = percentiles(samples)
+            if profiler:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+                results[path]["profile"] = stream.getvalue()
+    return results
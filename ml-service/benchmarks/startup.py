@@ -0,0 +1,51 @@
+"""
+Cold start time and memory per worker, measured in fresh interpreters
+"""
+
+import json
+from typing import Any, Dict
+
+from .common import run_python
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+try:
+    app.main.load_all_models()
+except Exception:
+    pass  # the service falls back to rule-based models the same way
+loaded = time.perf_counter()
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+print(json.dumps({
+    "import_seconds": imported - start,
+    "model_load_seconds": loaded - imported,
+    "rss_mb": rss_mb(),
+}))
+"""
+
+
+def run(repeat: int = 3) -> Dict[str, Any]:
+    """Report the best-of-``repeat`` cold start and the worker RSS"""
+    probes = []
+    for _ in range(repeat):
+        output = run_python(_PROBE).stdout.strip().splitlines()[-1]
+        probes.append(json.loads(output))
+    best = min(probes, key=lambda p: p["import_seconds"] + p["model_load_seconds"])
+    return {
+        "cold_start": {
+            "import_seconds": round(best["import_seconds"], 4),
+            "model_load_seconds": round(best["model_load_seconds"], 4),
+            "total_seconds": round(best["import_seconds"] + best["model_load_seconds"], 4),
+        },
+        "memory": {"worker_rss_mb": round(max(p["rss_mb"] for p in probes), 1)},
+    }
@@ -0,0 +1,101 @@
+"""
+Concurrent throughput against a locally started uvicorn server
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from .common import ENDPOINTS, SERVICE_ROOT, percentiles
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int = 1) -> Tuple[subprocess.Popen, float]:
+    """Start uvicorn and return the process and its time-to-healthy in seconds"""
+    import httpx
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=SERVICE_ROOT,
+        env=dict(os.environ, PYTHONPATH=str(SERVICE_ROOT)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = start + 60
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process, time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60s")
+
+
+async def _load(base_url: str, method: str, path: str, payload: Any,
+                concurrency: int, duration: float) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=payload)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "requests_per_sec": round(len(latencies) / elapsed, 2),
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+    }
+    result.update(percentiles(latencies))
+    return result
+
+
+def run(concurrency: int = 32, duration: float = 5.0, workers: int = 1) -> Dict[str, Any]:
+    """Drive every endpoint with an async load generator"""
+    port = _free_port()
+    process, startup_seconds = start_server(port, workers)
+    try:
+        results: Dict[str, Any] = {"server_startup_seconds": round(startup_seconds, 3)}
+        for method, path, payload in ENDPOINTS:
+            results[path] = asyncio.run(
+                _load(f"http://127.0.0.1:{port}", method, path, payload, concurrency, duration)
+            )
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
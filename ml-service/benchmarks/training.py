@@ -0,0 +1,59 @@
+"""
+Data generation and training throughput
+"""
+
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+
+def _timed(func: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(n_samples: int = 5000) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Time synthetic data generation and model training.
+
+    Returns the results and the trained models with row generators, so the
+    batch scaling benchmark can reuse them.
+    """
+    from app.models import FinancialRiskModel, LayoffRiskModel, SavingsProjectionModel
+    from app.security.data_generator import SyntheticDataGenerator
+    from app.train import (
+        generate_layoff_training_data,
+        generate_risk_training_data,
+        generate_savings_training_data,
+    )
+
+    np.random.seed(42)
+    results: Dict[str, Any] = {}
+    trained: Dict[str, Any] = {}
+    specs = {
+        "risk": (generate_risk_training_data, FinancialRiskModel),
+        "layoff": (generate_layoff_training_data, LayoffRiskModel),
+        "savings": (generate_savings_training_data, SavingsProjectionModel),
+    }
+
+    for name, (generate, model_cls) in specs.items():
+        (X, y), gen_seconds = _timed(lambda generate=generate: generate(n_samples))
+        model = model_cls()
+        _, train_seconds = _timed(lambda model=model, X=X, y=y: model.train(X, y))
+        results[name] = {
+            "generation_rows_per_sec": round(n_samples / gen_seconds, 1),
+            "training_seconds": round(train_seconds, 4),
+            "training_rows_per_sec": round(n_samples / train_seconds, 1),
+        }
+
+        def make_rows(n, X=X):
+            idx = np.random.default_rng(1).integers(0, len(X), n)
+            return X[idx]
+
+        trained[name] = (model, make_rows)
+
+    _, tx_seconds = _timed(lambda: SyntheticDataGenerator().generate_transaction_dataset(n_samples))
+    results["transactions"] = {"generation_rows_per_sec": round(n_samples / tx_seconds, 1)}
+    return results, trained
@@ -4,7 +4,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.security.enhanced_models import EnhancedFinancialModels
+from app.security.enanced_models import EnhancedFinancialModels
 
 def main():
     """Train all enhanced models with real-world data"""